@@ -0,0 +1,47 @@
+"""
+Nombre de requêtes SQL et durée des listes de l'administration, sur la base indiquée par
+DATABASE_URL. Chaque liste doit tenir en une seule requête quel que soit le nombre de lignes :
+le script échoue (queries/query_counter.py) dès qu'une liste repasse en N+1.
+
+Usage, depuis app/ :
+    python -m benchmarks.admin_queries [--limit 100]
+"""
+import argparse
+import time
+from models.api.filter import (
+    AdminCompanyFilter, AdminCollaboratorFilter, AdminEstimateFilter, AdminBillFilter,
+    AdminTicketFilter, AdminContractorFilter, AdminNgoFilter,
+)
+from queries.admin_queries import AdminQuery
+from queries.query_counter import assert_max_queries
+
+
+def listings(query: AdminQuery, limit: int) -> dict:
+    return {
+        "companies": lambda: query.get_all_companies(AdminCompanyFilter(limit=limit)).rows,
+        "collaborators": lambda: query.get_all(AdminCollaboratorFilter(limit=limit)).rows,
+        "estimates": lambda: query.get_all_estimates_with_company_name(None, AdminEstimateFilter(limit=limit)).rows,
+        "contracts": lambda: query.get_all_contracts_with_company_name(None),
+        "bills": lambda: query.get_all_bills_with_company_name(None, AdminBillFilter(limit=limit)).rows,
+        "tickets": lambda: query.get_all_tickets(AdminTicketFilter(limit=limit)).rows,
+        "contractors": lambda: query.get_all_contractors(AdminContractorFilter(limit=limit)).rows,
+        "ngos": lambda: query.get_all_ngos(AdminNgoFilter(limit=limit)).rows,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limit", type=int, default=100, help="taille de page des listes paginées")
+    args = parser.parse_args()
+
+    for name, run in listings(AdminQuery(), args.limit).items():
+        start = time.perf_counter()
+        with assert_max_queries(1, current_thread_only=True) as counter:
+            rows = run()
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{name:<14} {len(rows):>6} ligne(s)  {counter.count} requête(s)  {elapsed:8.1f} ms")
+    print("une requête par liste")
+
+
+if __name__ == "__main__":
+    main()
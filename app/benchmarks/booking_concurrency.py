@@ -0,0 +1,91 @@
+"""
+Réservations concurrentes d'un même créneau : N threads tentent simultanément de réserver le
+même prestataire au même moment (ou à des heures décalées qui se chevauchent, --jitter), via
+CollaboratorQuery.reserve_medical_appointment. Chaque tour doit avoir exactement un gagnant.
+
+Usage, depuis app/ (base indiquée par DATABASE_URL, prestataire et salarié existants) :
+    python -m benchmarks.booking_concurrency --contractor-id <id> --collaborator-id <id> \\
+        [--threads 32] [--rounds 10] [--jitter 20]
+
+Les rendez-vous créés sont supprimés à la fin.
+"""
+import argparse
+import random
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete
+from models.database.medical_appointments_model import MedicalAppointmentTable
+from queries.collaborator_queries import CollaboratorQuery
+
+
+def _appointment(contractor_id, collaborator_id, slot):
+    return MedicalAppointmentTable(
+        medical_appointment_id=str(uuid.uuid4()),
+        contractor_id=contractor_id,
+        collaborator_id=collaborator_id,
+        medical_appointment_date=slot,
+        creation_date=datetime.now(timezone.utc),
+        status="PAYED",
+        price=0,
+        bill_file=f"benchmark_{uuid.uuid4()}.pdf",
+        place="incall",
+    )
+
+
+def _round(query, args, slot):
+    barrier = threading.Barrier(args.threads)
+
+    def attempt(_):
+        offset = timedelta(minutes=random.randint(0, args.jitter)) if args.jitter else timedelta(0)
+        appointment = _appointment(args.contractor_id, args.collaborator_id, slot + offset)
+        barrier.wait()
+        start = time.perf_counter()
+        result = query.reserve_medical_appointment(appointment)
+        return result is not None, (time.perf_counter() - start) * 1000
+
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        return list(pool.map(attempt, range(args.threads)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--contractor-id", required=True)
+    parser.add_argument("--collaborator-id", required=True)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--jitter", type=int, default=0, help="décalage aléatoire max. (minutes, < 30) entre tentatives")
+    args = parser.parse_args()
+
+    query = CollaboratorQuery()
+    # Créneaux lointains, espacés d'une heure : aucun tour ne gêne le suivant
+    base = (datetime.now(timezone.utc) + timedelta(days=3650)).replace(minute=0, second=0, microsecond=0, tzinfo=None)
+    latencies, failures = [], 0
+    try:
+        for i in range(args.rounds):
+            results = _round(query, args, base + timedelta(hours=i))
+            winners = sum(1 for won, _ in results if won)
+            latencies.extend(latency for _, latency in results)
+            status = "ok" if winners == 1 else "ÉCHEC"
+            failures += winners != 1
+            print(f"tour {i + 1:>3} : {winners} réservation(s) sur {args.threads} tentatives  {status}")
+    finally:
+        with query.get_session() as session:
+            session.exec(delete(MedicalAppointmentTable).where(
+                MedicalAppointmentTable.contractor_id == args.contractor_id,
+                MedicalAppointmentTable.bill_file.like("benchmark_%"),
+            ))
+            session.commit()
+
+    latencies.sort()
+    print(f"latence réservation : médiane {statistics.median(latencies):.1f} ms, "
+          f"p99 {latencies[int(len(latencies) * 0.99) - 1]:.1f} ms, max {latencies[-1]:.1f} ms")
+    assert failures == 0, f"{failures} tour(s) sans exactement un gagnant"
+    print("exactement un gagnant par tour")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Appels du chatbot vers l'API de complétion, contre un serveur bouchon local (pas de clé ni de réseau).
+
+Compare un httpx.AsyncClient ouvert pour chaque message (ancien comportement) au client partagé de
+service/http_client.py, en réponse complète puis en flux SSE relayé par routes/chatbot._relay_tokens :
+temps par message, temps jusqu'au premier événement et connexions TCP ouvertes côté bouchon.
+Le bouchon parle HTTP/1.1 en clair : l'écart mesuré compte la création du client et la poignée de
+main TCP, pas celle de TLS, qui s'y ajoute en production.
+
+Usage, depuis app/ :
+    python -m benchmarks.chatbot_upstream [--n 200] [--tokens 20] [--token-delay 0.005]
+
+Le bouchon peut aussi tourner seul pour essayer /chatbot/chat de bout en bout :
+    python -m benchmarks.chatbot_upstream --serve --port 8765
+    OPENROUTER_URL=http://127.0.0.1:8765/chat/completions uvicorn main:app
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import httpx
+from routes.chatbot import _relay_tokens, _upstream_request
+from service.http_client import close_http_client, start_http_client
+
+
+class _StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, tokens: int, token_delay: float):
+        super().__init__(address, _CompletionHandler)
+        self.tokens = tokens
+        self.token_delay = token_delay
+        self.connections = 0
+        self.lock = threading.Lock()
+
+
+class _CompletionHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # En-têtes et corps partent en deux écritures : sans TCP_NODELAY, l'ACK retardé ajoute ~40 ms en keep-alive
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        words = [f"mot{i} " for i in range(self.server.tokens)]
+        if not payload.get("stream"):
+            time.sleep(self.server.token_delay * self.server.tokens)
+            body = json.dumps({"choices": [{"message": {"role": "assistant", "content": "".join(words)}}]}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for word in words:
+            time.sleep(self.server.token_delay)
+            self._chunk(f"data: {json.dumps({'choices': [{'delta': {'content': word}}]})}\n\n")
+        self._chunk("data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _chunk(self, text: str):
+        data = text.encode()
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+
+async def _complete(client: httpx.AsyncClient, url: str, message: str):
+    response = await client.post(url, **_upstream_request(message))
+    response.raise_for_status()
+    return response.json()["choices"][0]["message"]["content"]
+
+
+async def _stream(client: httpx.AsyncClient, url: str, message: str):
+    upstream = await client.send(client.build_request("POST", url, **_upstream_request(message, stream=True)), stream=True)
+    first = None
+    start = time.perf_counter()
+    async for event in _relay_tokens(upstream, message):
+        if first is None:
+            first = time.perf_counter() - start
+    return first
+
+
+async def _run(url: str, n: int, stream: bool, shared: bool):
+    call = _stream if stream else _complete
+    timings, first_events = [], []
+    client = start_http_client() if shared else None
+    for i in range(n):
+        # Messages distincts : le cache de réponses (service/chatbot_cache.py) n'intervient pas
+        message = f"question {i} {time.time_ns()}"
+        start = time.perf_counter()
+        if shared:
+            result = await call(client, url, message)
+        else:
+            async with httpx.AsyncClient() as fresh:
+                result = await call(fresh, url, message)
+        timings.append(time.perf_counter() - start)
+        if stream:
+            first_events.append(result)
+    if shared:
+        await close_http_client()
+    return timings, first_events
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n", type=int, default=200, help="messages envoyés par cas")
+    parser.add_argument("--tokens", type=int, default=20, help="morceaux par réponse")
+    parser.add_argument("--token-delay", type=float, default=0.005, help="délai du bouchon par morceau (s)")
+    parser.add_argument("--serve", action="store_true", help="lance seulement le bouchon")
+    parser.add_argument("--port", type=int, default=0)
+    args = parser.parse_args()
+
+    server = _StubServer(("127.0.0.1", args.port), args.tokens, args.token_delay)
+    url = f"http://127.0.0.1:{server.server_address[1]}/chat/completions"
+    if args.serve:
+        print(f"Bouchon à l'écoute sur {url}")
+        server.serve_forever()
+        return
+
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"{'cas':<26}{'ms/message':>12}{'1er évén. (ms)':>16}{'connexions':>12}")
+    for stream in (False, True):
+        for shared in (False, True):
+            before = server.connections
+            timings, first_events = asyncio.run(_run(url, args.n, stream, shared))
+            name = f"{'flux' if stream else 'complet'} / {'client partagé' if shared else 'client par message'}"
+            first = f"{statistics.median(first_events) * 1000:.1f}" if first_events else "-"
+            print(f"{name:<26}{statistics.median(timings) * 1000:>12.2f}{first:>16}{server.connections - before:>12}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Compare le rendu FPDF complet et le rendu par gabarits précompilés (devis et contrat),
+avec des signatures transmises en base64 ou par empreinte (service/signature_store.py).
+
+Usage, depuis app/ :
+    python -m benchmarks.pdf_render --n 200
+"""
+import argparse
+import base64
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from io import BytesIO
+from os import path
+from PIL import Image, ImageDraw
+from service.pdf_generator import PDFGenerator
+from service.signature_store import store_signature
+
+
+def _signature():
+    image = Image.new("RGBA", (600, 200), (0, 0, 0, 0))
+    ImageDraw.Draw(image).line([(20, 150), (200, 40), (380, 160), (580, 50)], fill=(0, 0, 80, 255), width=6)
+    buffer = BytesIO()
+    image.save(buffer, "PNG")
+    return "data:image/png;base64," + base64.b64encode(buffer.getvalue()).decode()
+
+
+def _devis_args(i):
+    return dict(
+        company_name=f"Entreprise {i}", subscription_id=f"sub-{i}", plan="Premium", employees=120,
+        price_per_employee=180, consultation_nb=6, chatbot_msgs="illimité", staff_size=250,
+        signature_date=datetime.now(),
+    )
+
+
+def _contrat_args(i, signature=None, signature_hash=None):
+    return dict(
+        company_name=f"Entreprise {i}", subscription_id=f"sub-{i}", plan="Premium", employees=120,
+        price_per_employee=180, consultation_nb=6, chatbot_msgs="illimité", signature_date=datetime.now(),
+        company_signature_base64=signature, admin_signature_base64=signature,
+        company_signature=signature_hash, admin_signature=signature_hash,
+    )
+
+
+def _measure(render, n, workdir):
+    render(path.join(workdir, "warmup.pdf"), -1)
+    start = time.perf_counter()
+    for i in range(n):
+        render(path.join(workdir, f"doc_{i}.pdf"), i)
+    elapsed = time.perf_counter() - start
+    # Mémoire mesurée à part : tracemalloc ralentit fortement les allocations et fausserait le temps.
+    tracemalloc.start()
+    render(path.join(workdir, "traced.pdf"), n)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    size = path.getsize(path.join(workdir, "doc_0.pdf"))
+    return elapsed / n * 1000, peak / 1024, size / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n", type=int, default=100, help="documents rendus par cas")
+    args = parser.parse_args()
+
+    signature = _signature()
+    signature_hash = store_signature(signature)
+    cases = {
+        "devis / fpdf": lambda f, i: PDFGenerator.generate_devis_fpdf(**_devis_args(i), filepath=f),
+        "devis / gabarit": lambda f, i: PDFGenerator.generate_devis(**_devis_args(i), filepath=f),
+        "contrat / fpdf": lambda f, i: PDFGenerator.generate_contrat_fpdf(**_contrat_args(i, signature), filepath=f),
+        "contrat / gabarit": lambda f, i: PDFGenerator.generate_contrat(**_contrat_args(i, signature), filepath=f),
+        "contrat / fpdf+emp.": lambda f, i: PDFGenerator.generate_contrat_fpdf(**_contrat_args(i, signature_hash=signature_hash), filepath=f),
+        "contrat / gab.+emp.": lambda f, i: PDFGenerator.generate_contrat(**_contrat_args(i, signature_hash=signature_hash), filepath=f),
+    }
+
+    print(f"{'cas':<20}{'ms/doc':>10}{'pic mém. (Kio)':>16}{'taille (Kio)':>14}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, render in cases.items():
+            per_doc, peak, size = _measure(render, args.n, workdir)
+            print(f"{name:<20}{per_doc:>10.2f}{peak:>16.0f}{size:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
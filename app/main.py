@@ -3,12 +3,10 @@ from fastapi.middleware.cors import CORSMiddleware
 from routes.company import router as company_router
 from routes.auth import router as auth_router
 from routes.checkout import router as checkout_router
-from fastapi.staticfiles import StaticFiles
 from routes.stats_client import router as client_stats_router
 from routes.stats_prestations import router as prestations_stats_router
 from routes.company_inscription_route import router as company_inscription_router
 from routes.ticket import router as ticket_router
-from fastapi.staticfiles import StaticFiles
 from routes.chatbot import router as chatbot_router
 import os
 from dotenv import load_dotenv 
@@ -20,13 +18,51 @@ from routes.forum import router as forum_router
 from routes.contractor import router as contractor_router
 from routes.collaborator import router as collaborator_router
 from routes.admin import router as admin_router
+from routes.metrics import router as metrics_router
+from routes.documents import router as documents_router, files_router as documents_files_router
+from queries.base_queries import get_engine, dispose_engines
+from queries.user_queries import UserQuery
+from queries.stats_rollup_queries import StatsRollupQuery
+from service.jobs import register_job, start_jobs, stop_jobs
+from service.http_client import start_http_client, close_http_client
+from service.render_queue import resume_pending_renders, shutdown_render_pool
+from service.mailer import start_mail_worker, stop_mail_worker
+from service.stripe_events import process_pending_events
+from service.document_store import collect_garbage
+import asyncio
+from contextlib import asynccontextmanager
 import stripe
 
 logging.basicConfig(level=logging.DEBUG)
 
 stripe.api_key = os.environ.get("STRIPE_SECRET_KEY")
 
-app = FastAPI(debug=True)
+
+register_job("expire_sessions", int(os.environ.get("SESSION_EXPIRY_INTERVAL", 300)), lambda: UserQuery().update_expired_token())
+register_job("refresh_stats_rollups", int(os.environ.get("STATS_REFRESH_INTERVAL", 300)), lambda: StatsRollupQuery().refresh())
+register_job("rebuild_stats_rollups", int(os.environ.get("STATS_REBUILD_INTERVAL", 86400)), lambda: StatsRollupQuery().refresh(full=True))
+# Reprise des événements Stripe en échec temporaire (le webhook déclenche lui-même le premier traitement)
+register_job("process_stripe_events", int(os.environ.get("STRIPE_EVENTS_INTERVAL", 60)), process_pending_events)
+# Documents du stockage par empreinte qui ne sont plus référencés (service/document_store.py)
+register_job("collect_document_garbage", int(os.environ.get("DOCUMENT_GC_INTERVAL", 3600)), collect_garbage)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    get_engine()
+    start_http_client()
+    start_jobs()
+    await asyncio.to_thread(resume_pending_renders)
+    start_mail_worker()
+    yield
+    await stop_jobs()
+    await asyncio.to_thread(stop_mail_worker)
+    await asyncio.to_thread(shutdown_render_pool)
+    await close_http_client()
+    dispose_engines()
+
+
+app = FastAPI(debug=True, lifespan=lifespan)
 
 app.add_middleware(ProxyHeadersMiddleware, trusted_hosts="*")
 
@@ -43,6 +79,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*", "token"],
+    expose_headers=["X-Next-Cursor", "X-Render-Jobs", "ETag", "Content-Disposition"],
 )
 
 
@@ -53,7 +90,7 @@ def home():
 
 
 os.makedirs("uploads", exist_ok=True)
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+app.include_router(documents_files_router, prefix="/uploads", tags=["documents"])
 app.include_router(chatbot_router, prefix="/chatbot")
 app.include_router(company_inscription_router , prefix="/company_inscription_route", tags=["company_inscription_route"])
 app.include_router(company_router, prefix="/company", tags=["company"])
@@ -66,6 +103,8 @@ app.include_router(collaborator_router, prefix="/collaborator", tags=["collabora
 app.include_router(checkout_router, prefix="/checkout", tags=["checkout"])
 app.include_router(client_stats_router, prefix="/stats_client", tags=["stats_client"])
 app.include_router(prestations_stats_router, prefix="/stats_prestations", tags=["stats_prestations"])
+app.include_router(metrics_router, prefix="/metrics", tags=["metrics"])
+app.include_router(documents_router, prefix="/documents", tags=["documents"])
 
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
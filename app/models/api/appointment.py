@@ -18,4 +18,15 @@ class MedicalAppointmentResponse(MyBaseModel):
     place: Literal["incall", "outcall"]
     bill_file: str
     status: Literal["PAYED", "CANCELED"]
-    note: Optional[int]
\ No newline at end of file
+    note: Optional[int]
+
+
+class FreeSlotResponse(MyBaseModel):
+    contractor_id: str
+    firstname: str
+    lastname: str
+    service: str
+    service_price: int
+    intervention: str
+    beginning: datetime
+    end: datetime
@@ -1,8 +1,84 @@
+import os
 from datetime import date, datetime
 from typing import Optional, Literal
-from pydantic import BaseModel, EmailStr, constr
+from pydantic import BaseModel, EmailStr, constr, Field
 from .api_base import MyBaseModel
 
 class MedicalContractorFilter(MyBaseModel):
     intervention: Optional[Literal["incall", "outcall", "both"]] = None
-    service: Optional[str] = None
\ No newline at end of file
+    service: Optional[str] = None
+
+
+class FreeSlotFilter(MedicalContractorFilter):
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+    limit: int = Field(20, ge=1, le=200)
+
+
+# --- Listes de l'administration (pagination par curseur, voir queries/keyset.py) ---
+ADMIN_PAGE_SIZE = int(os.environ.get("ADMIN_PAGE_SIZE", 100))
+ADMIN_PAGE_MAX_SIZE = int(os.environ.get("ADMIN_PAGE_MAX_SIZE", 500))
+
+
+class AdminListFilter(MyBaseModel):
+    after: Optional[str] = Field(None, description="Curseur X-Next-Cursor de la page précédente")
+    limit: int = Field(ADMIN_PAGE_SIZE, ge=1, le=ADMIN_PAGE_MAX_SIZE)
+    order: Literal["asc", "desc"] = "asc"
+
+
+class AdminCompanyFilter(AdminListFilter):
+    sort: Literal["name", "registration_date", "revenue", "size"] = "name"
+    name: Optional[str] = Field(None, description="Début du nom")
+    industry: Optional[str] = None
+    country: Optional[str] = None
+    city: Optional[str] = None
+
+
+class AdminCollaboratorFilter(AdminListFilter):
+    sort: Literal["lastname", "firstname", "email", "inscription_date", "company_name"] = "lastname"
+    lastname: Optional[str] = Field(None, description="Début du nom")
+    email: Optional[str] = Field(None, description="Début de l'adresse")
+    company_id: Optional[str] = None
+    company_name: Optional[str] = Field(None, description="Début du nom de l'entreprise")
+    verified: Optional[bool] = None
+
+
+class AdminEstimateFilter(AdminListFilter):
+    sort: Literal["creation_date", "amount", "company_name", "signature_date"] = "creation_date"
+    order: Literal["asc", "desc"] = "desc"
+    company_id: Optional[str] = None
+    company_name: Optional[str] = Field(None, description="Début du nom de l'entreprise")
+    subscription_status: Optional[str] = None
+    signed: Optional[bool] = None
+
+
+class AdminBillFilter(AdminListFilter):
+    sort: Literal["company_name", "payed"] = "company_name"
+    company_id: Optional[str] = None
+    company_name: Optional[str] = Field(None, description="Début du nom de l'entreprise")
+    subscription_status: Optional[str] = None
+    payed: Optional[bool] = None
+
+
+class AdminTicketFilter(AdminListFilter):
+    sort: Literal["open_date", "title"] = "open_date"
+    order: Literal["asc", "desc"] = "desc"
+    title: Optional[str] = Field(None, description="Début du titre")
+    user_role: Optional[str] = None
+    closed: Optional[bool] = None
+
+
+class AdminContractorFilter(AdminListFilter):
+    sort: Literal["lastname", "registration_date", "service", "service_price", "sign_date"] = "lastname"
+    lastname: Optional[str] = Field(None, description="Début du nom")
+    service: Optional[str] = None
+    type: Optional[str] = None
+    intervention: Optional[Literal["incall", "outcall", "both"]] = None
+    city: Optional[str] = None
+
+
+class AdminNgoFilter(AdminListFilter):
+    sort: Literal["name", "registration_date", "country", "type"] = "name"
+    name: Optional[str] = Field(None, description="Début du nom")
+    type: Optional[str] = None
+    country: Optional[str] = None
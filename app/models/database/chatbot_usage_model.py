@@ -1,10 +1,20 @@
 from sqlmodel import SQLModel, Field
 from uuid import uuid4
-from datetime import datetime
+from datetime import date, datetime
+from typing import Optional
 
 class ChatbotUsage(SQLModel, table=True):
     __tablename__ = "chatbot_usages"
 
     usage_id: str = Field(default_factory=lambda: str(uuid4()), primary_key=True)
     collaborator_id: str = Field(foreign_key="collaborators.collaborator_id", nullable=False)
-    used_at: datetime = Field(default_factory=datetime.utcnow)
\ No newline at end of file
+    used_at: datetime = Field(default_factory=datetime.utcnow)
+    message_text: Optional[str] = Field(default=None)
+
+
+class ChatbotMonthlyUsage(SQLModel, table=True):
+    __tablename__ = "chatbot_monthly_usages"
+
+    collaborator_id: str = Field(foreign_key="collaborators.collaborator_id", primary_key=True)
+    month: date = Field(primary_key=True)
+    messages_count: int = Field(nullable=False, default=0)
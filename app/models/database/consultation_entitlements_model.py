@@ -0,0 +1,12 @@
+from sqlmodel import SQLModel, Field
+from datetime import datetime
+
+
+class ConsultationEntitlement(SQLModel, table=True):
+    """Rendez-vous actifs d'un salarié sur une période mensuelle de son abonnement (consultations offertes)."""
+    __tablename__ = "consultation_entitlements"
+
+    collaborator_id: str = Field(foreign_key="collaborators.collaborator_id", primary_key=True)
+    period_start: datetime = Field(primary_key=True)
+    period_end: datetime = Field(nullable=False)
+    used: int = Field(nullable=False, default=0)
@@ -0,0 +1,24 @@
+from sqlmodel import SQLModel, Field
+from datetime import datetime
+from typing import Optional
+
+
+class DocumentBlobTable(SQLModel, table=True):
+    """Contenu d'un document, stocké une seule fois sous son empreinte SHA-256 (service/document_store.py)."""
+    __tablename__ = "document_blobs"
+
+    sha256: str = Field(primary_key=True, min_length=64, max_length=64)
+    extension: str = Field(nullable=False, default="", max_length=10)
+    size: int = Field(nullable=False)
+    ref_count: int = Field(nullable=False, default=0)
+    created_at: datetime = Field(nullable=False)
+    unreferenced_at: Optional[datetime] = Field(default=None)
+
+
+class DocumentRefTable(SQLModel, table=True):
+    """Chemin logique d'un document (relatif à uploads, tel que servi sur /uploads) vers son contenu."""
+    __tablename__ = "document_refs"
+
+    file: str = Field(primary_key=True, max_length=255)
+    sha256: str = Field(nullable=False, foreign_key="document_blobs.sha256", max_length=64, index=True)
+    created_at: datetime = Field(nullable=False)
@@ -0,0 +1,22 @@
+# models/email_outbox_model.py
+from sqlmodel import SQLModel, Field
+from uuid import uuid4
+from datetime import datetime
+from typing import Optional
+
+
+class EmailOutboxTable(SQLModel, table=True):
+    __tablename__ = "email_outbox"
+
+    email_id: str = Field(default_factory=lambda: str(uuid4()), primary_key=True, max_length=36)
+    sender: str = Field(nullable=False, max_length=255)
+    recipient: str = Field(nullable=False, max_length=255)
+    subject: str = Field(nullable=False, max_length=255)
+    html: str = Field(nullable=False)
+    attachment_path: Optional[str] = Field(default=None, max_length=255)
+    status: str = Field(nullable=False, default="PENDING", max_length=20)
+    attempts: int = Field(nullable=False, default=0)
+    next_attempt_at: datetime = Field(nullable=False)
+    last_error: Optional[str] = Field(default=None)
+    created_at: datetime = Field(nullable=False)
+    sent_at: Optional[datetime] = Field(default=None)
@@ -1,4 +1,5 @@
 from sqlmodel import SQLModel, Field
+from sqlalchemy import UniqueConstraint
 from uuid import UUID, uuid4
 from datetime import datetime
 from typing import Optional
@@ -6,6 +7,8 @@ from typing import Optional
 
 class MedicalAppointmentTable(SQLModel, table=True):
     __tablename__ = "medical_appointments"
+    # Un seul rendez-vous actif par prestataire et par créneau ; active_slot passe à NULL à l'annulation
+    __table_args__ = (UniqueConstraint("contractor_id", "active_slot", name="uq_medical_appointments_contractor_slot"),)
 
     medical_appointment_id: str = Field(primary_key=True,  min_length=36, max_length=36)
     contractor_id: str = Field(default=None, foreign_key="contractors.contractor_id")
@@ -16,4 +19,5 @@ class MedicalAppointmentTable(SQLModel, table=True):
     bill_file: str = Field(nullable=False, unique=True, max_length=255)
     place: str = Field(nullable=False, max_length=8)
     price: int = Field(nullable=False)
-    note: Optional[int] = Field(default=None)
\ No newline at end of file
+    note: Optional[int] = Field(default=None)
+    active_slot: Optional[datetime] = Field(default=None)
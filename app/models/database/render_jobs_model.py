@@ -0,0 +1,20 @@
+# models/render_jobs_model.py
+from sqlmodel import SQLModel, Field
+from uuid import uuid4
+from datetime import datetime
+from typing import Optional
+
+
+class RenderJobTable(SQLModel, table=True):
+    __tablename__ = "render_jobs"
+
+    job_id: str = Field(default_factory=lambda: str(uuid4()), primary_key=True, max_length=36)
+    kind: str = Field(nullable=False, max_length=30)
+    file: str = Field(nullable=False, max_length=255, index=True)
+    output_path: str = Field(nullable=False, max_length=255)
+    payload: str = Field(nullable=False)
+    status: str = Field(nullable=False, default="PENDING", max_length=20, index=True)
+    error: Optional[str] = Field(default=None)
+    owner_id: Optional[str] = Field(default=None, max_length=36)
+    created_at: datetime = Field(nullable=False)
+    finished_at: Optional[datetime] = Field(default=None)
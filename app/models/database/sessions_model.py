@@ -9,5 +9,5 @@ class SessionTable(SQLModel, table=True):
     session_id: str = Field(primary_key=True, min_length=32, max_length=32)
     user_id: str = Field(foreign_key="users.user_id", primary_key=True, min_length=36, max_length=36)
     creation_date: datetime = Field(nullable=False)
-    exp_date: datetime = Field(nullable=False)
+    exp_date: datetime = Field(nullable=False, index=True)
     revoked: bool = Field(nullable=False, default=False)
\ No newline at end of file
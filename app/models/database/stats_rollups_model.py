@@ -0,0 +1,56 @@
+# models/stats_rollups_model.py
+from sqlmodel import SQLModel, Field
+from datetime import date, datetime
+
+
+class StatsDailyPackTable(SQLModel, table=True):
+    __tablename__ = "stats_daily_packs"
+
+    day: date = Field(primary_key=True)
+    pack_id: str = Field(primary_key=True, max_length=36)
+    pack_name: str = Field(nullable=False, max_length=50)
+    estimates_count: int = Field(nullable=False, default=0)
+    estimates_amount: float = Field(nullable=False, default=0)
+
+
+class StatsDailyCompanyTable(SQLModel, table=True):
+    __tablename__ = "stats_daily_companies"
+
+    day: date = Field(primary_key=True)
+    company_id: str = Field(primary_key=True, max_length=36)
+    company_name: str = Field(nullable=False, max_length=255)
+    estimates_count: int = Field(nullable=False, default=0)
+    estimates_amount: float = Field(nullable=False, default=0)
+
+
+class StatsDailyServiceTable(SQLModel, table=True):
+    __tablename__ = "stats_daily_services"
+
+    day: date = Field(primary_key=True)
+    service: str = Field(primary_key=True, max_length=255)
+    appointments_count: int = Field(nullable=False, default=0)
+
+
+class StatsServiceTable(SQLModel, table=True):
+    __tablename__ = "stats_services"
+
+    service: str = Field(primary_key=True, max_length=255)
+    type: str = Field(primary_key=True, max_length=10)
+    intervention: str = Field(primary_key=True, max_length=50)
+    contractor_count: int = Field(nullable=False, default=0)
+    service_price: int = Field(nullable=False, default=0)
+
+
+class StatsPackSubscriptionTable(SQLModel, table=True):
+    __tablename__ = "stats_pack_subscriptions"
+
+    pack_id: str = Field(primary_key=True, max_length=36)
+    pack_name: str = Field(nullable=False, max_length=50)
+    subscriptions_count: int = Field(nullable=False, default=0)
+
+
+class StatsWatermarkTable(SQLModel, table=True):
+    __tablename__ = "stats_watermarks"
+
+    source: str = Field(primary_key=True, max_length=50)
+    last_value: datetime = Field(nullable=False)
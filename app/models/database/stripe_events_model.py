@@ -0,0 +1,18 @@
+# models/stripe_events_model.py
+from sqlmodel import SQLModel, Field
+from datetime import datetime
+from typing import Optional
+
+
+class StripeEventTable(SQLModel, table=True):
+    __tablename__ = "stripe_events"
+
+    event_id: str = Field(primary_key=True, max_length=255)
+    type: str = Field(nullable=False, max_length=100)
+    payload: str = Field(nullable=False)
+    status: str = Field(nullable=False, default="PENDING", max_length=20)
+    attempts: int = Field(nullable=False, default=0)
+    next_attempt_at: datetime = Field(nullable=False)
+    last_error: Optional[str] = Field(default=None)
+    received_at: datetime = Field(nullable=False)
+    processed_at: Optional[datetime] = Field(default=None)
@@ -1,74 +1,90 @@
-
 # queries/chatbot_queries.py
-from sqlmodel import select
-from sqlalchemy import extract
-from datetime import datetime
-from models.database.chatbot_usage_model import ChatbotUsage
+import logging
+from sqlmodel import select, func
+from sqlalchemy.dialects.mysql import insert
+from datetime import date, datetime, time, timedelta, timezone
+from models.database.chatbot_usage_model import ChatbotUsage, ChatbotMonthlyUsage
 from models.database.collaborators_model import CollaboratorTable
 from models.database.company_subscriptions_model import CompanySubscription
 from models.database.packs_model import Pack
-from models.database.companies_model import CompanyTable
 from queries.base_queries import BaseQuery
+from service.cache import message_limit_cache
 
-class ChatbotQuery(BaseQuery):
+logger = logging.getLogger(__name__)
 
-    def get_message_limit(self, collaborator_id: str) -> int | None:
-     with self.get_session() as session:
-        print(f" Recherche de l’abonnement pour le collaborateur : {collaborator_id}")
+def current_month() -> date:
+    today = datetime.now(timezone.utc).date()
+    return today.replace(day=1)
 
-       
-        company_id = session.exec(
-            select(CollaboratorTable.company_id)
-            .where(CollaboratorTable.collaborator_id == collaborator_id)
-        ).first()
 
-        if not company_id:
-            print(" Aucun collaborateur trouvé avec cet ID.")
-            return None
+class ChatbotQuery(BaseQuery):
 
-        print(f" Company ID trouvé : {company_id}")
+    def get_message_limit(self, collaborator_id: str) -> int | None:
+     cached = message_limit_cache.get(collaborator_id)
+     if cached is not None:
+        return cached["limit"]
 
-     
-        sub = session.exec(
-            select(CompanySubscription)
-            .where(CompanySubscription.company_id == company_id)
+     generation = message_limit_cache.generation()
+     with self.get_session() as session:
+        # Collaborateur -> abonnement ACTIVE de son entreprise -> pack, en une seule requête
+        row = session.exec(
+            select(CollaboratorTable.company_id, CompanySubscription.company_subscription_id, Pack.chatbot_messages_number)
+            .join(CompanySubscription, CompanySubscription.company_id == CollaboratorTable.company_id)
+            .join(Pack, Pack.pack_id == CompanySubscription.pack_id)
+            .where(CollaboratorTable.collaborator_id == collaborator_id)
             .where(CompanySubscription.status == "ACTIVE")
             .order_by(CompanySubscription.company_subscription_id.desc())
         ).first()
 
-        if not sub:
-            print(" Aucune subscription ACTIVE trouvée.")
+        if not row:
+            logger.info("Aucun abonnement ACTIVE trouvé pour le collaborateur %s", collaborator_id)
             return None
 
-        print(f" Subscription ID : {sub.company_subscription_id} | Pack ID : {sub.pack_id}")
-
-     
-        pack = session.exec(
-            select(Pack)
-            .where(Pack.pack_id == sub.pack_id)
-        ).first()
-
-        if not pack:
-            print(" Aucun pack trouvé pour ce subscription.")
-            return None
-
-        print(f" Pack : {pack.name} | Messages chatbot autorisés : {pack.chatbot_messages_number}")
-
-        return pack.chatbot_messages_number
+        company_id, subscription_id, limit = row
+        message_limit_cache.set(collaborator_id, {
+            "company_id": company_id,
+            "company_subscription_id": subscription_id,
+            "limit": limit,
+        }, generation=generation)
+        return limit
 
     def get_usage_count_this_month(self, collaborator_id: str) -> int:
-        now = datetime.utcnow()
+        month = current_month()
         with self.get_session() as session:
-            stmt = (
-                select(ChatbotUsage)
-                .where(ChatbotUsage.collaborator_id == collaborator_id)
-                .where(extract("month", ChatbotUsage.used_at) == now.month)
-                .where(extract("year", ChatbotUsage.used_at) == now.year)
-            )
-            return len(session.exec(stmt).all())
+            counter = session.get(ChatbotMonthlyUsage, (collaborator_id, month))
+            if counter is not None:
+                return counter.messages_count
+            return self._count_messages(session, collaborator_id, month)
 
     def log_question(self, collaborator_id: str, message: str):
         with self.get_session() as session:
-            usage = ChatbotUsage(collaborator_id=collaborator_id, message_text=message)
-            session.add(usage)
+            session.add(ChatbotUsage(collaborator_id=collaborator_id, message_text=message, used_at=datetime.now(timezone.utc)))
+            session.flush()
+            self._increment_monthly_usage(session, collaborator_id, current_month())
             session.commit()
+
+    def _count_messages(self, session, collaborator_id: str, month: date) -> int:
+        month_start = datetime.combine(month, time.min)
+        month_end = datetime.combine((month + timedelta(days=32)).replace(day=1), time.min)
+        return session.exec(
+            select(func.count()).select_from(ChatbotUsage).where(
+                ChatbotUsage.collaborator_id == collaborator_id,
+                ChatbotUsage.used_at >= month_start,
+                ChatbotUsage.used_at < month_end,
+            )
+        ).one()
+
+    def _increment_monthly_usage(self, session, collaborator_id: str, month: date):
+        # Incrémente le compteur du mois ; sans ligne, elle est initialisée en comptant les messages
+        # du mois (question en cours comprise), comme CollaboratorQuery._adjust_entitlement.
+        exists = session.exec(
+            select(ChatbotMonthlyUsage.messages_count)
+            .where(ChatbotMonthlyUsage.collaborator_id == collaborator_id)
+            .where(ChatbotMonthlyUsage.month == month)
+        ).first() is not None
+        upsert = insert(ChatbotMonthlyUsage).values(
+            collaborator_id=collaborator_id,
+            month=month,
+            messages_count=1 if exists else self._count_messages(session, collaborator_id, month),
+        )
+        session.execute(upsert.on_duplicate_key_update(messages_count=ChatbotMonthlyUsage.messages_count + 1))
@@ -34,9 +34,128 @@ from models.database.ngo_model import Ngo
 from models.database.messages_model import Message
 from uuid import uuid4
 from datetime import datetime
+from service.cache import invalidate_user_sessions, invalidate_company_message_limits, invalidate_company_consultation_quota
+from .keyset import ListSpec, Page, paginate
+from models.api.filter import (
+    AdminCompanyFilter, AdminCollaboratorFilter, AdminEstimateFilter, AdminBillFilter,
+    AdminTicketFilter, AdminContractorFilter, AdminNgoFilter,
+)
+
+# Tris et filtres des listes de l'administration (index correspondants dans init.sql)
+COMPANY_LIST = ListSpec(
+    key=CompanyTable.company_id,
+    sort={
+        "name": CompanyTable.name,
+        "registration_date": CompanyTable.registration_date,
+        "revenue": CompanyTable.revenue,
+        "size": CompanyTable.size,
+    },
+    filters={
+        "name": CompanyTable.name,
+        "industry": CompanyTable.industry,
+        "country": UserTable.country,
+        "city": UserTable.city,
+    },
+    prefix=("name",),
+)
+COLLABORATOR_LIST = ListSpec(
+    key=UserTable.user_id,
+    sort={
+        "lastname": UserTable.lastname,
+        "firstname": UserTable.firstname,
+        "email": UserTable.email,
+        "inscription_date": UserTable.inscription_date,
+        "company_name": CompanyTable.name,
+    },
+    filters={
+        "lastname": UserTable.lastname,
+        "email": UserTable.email,
+        "company_id": CollaboratorTable.company_id,
+        "company_name": CompanyTable.name,
+        "verified": UserTable.verified,
+    },
+    prefix=("lastname", "email", "company_name"),
+)
+ESTIMATE_LIST = ListSpec(
+    key=Estimate.company_subscription_id,
+    sort={
+        "creation_date": Estimate.creation_date,
+        "amount": Estimate.amount,
+        "company_name": CompanyTable.name,
+        # Devis non signés en tête du tri croissant, comme le tri fait auparavant par le frontend
+        "signature_date": func.coalesce(Estimate.signature_date, datetime(1970, 1, 1)),
+    },
+    filters={
+        "company_id": Estimate.company_id,
+        "company_name": CompanyTable.name,
+        "subscription_status": CompanySubscription.status,
+        "signed": lambda signed: Estimate.signature_date.isnot(None) if signed else Estimate.signature_date.is_(None),
+    },
+    prefix=("company_name",),
+)
+BILL_LIST = ListSpec(
+    key=BillTable.company_subscription_id,
+    sort={
+        "company_name": CompanyTable.name,
+        "payed": BillTable.payed,
+    },
+    filters={
+        "company_id": BillTable.company_id,
+        "company_name": CompanyTable.name,
+        "subscription_status": CompanySubscription.status,
+        "payed": BillTable.payed,
+    },
+    prefix=("company_name",),
+)
+TICKET_LIST = ListSpec(
+    key=Ticket.ticket_id,
+    sort={
+        "open_date": Ticket.open_date,
+        "title": Ticket.title,
+    },
+    filters={
+        "title": Ticket.title,
+        "user_role": UserTable.role,
+        "closed": lambda closed: Ticket.close_date.isnot(None) if closed else Ticket.close_date.is_(None),
+    },
+    prefix=("title",),
+)
+CONTRACTOR_LIST = ListSpec(
+    key=ContractorTable.contractor_id,
+    sort={
+        "lastname": UserTable.lastname,
+        "registration_date": ContractorTable.registration_date,
+        "service": ContractorTable.service,
+        "service_price": ContractorTable.service_price,
+        "sign_date": func.coalesce(ContractorTable.sign_date, ""),
+    },
+    filters={
+        "lastname": UserTable.lastname,
+        "service": ContractorTable.service,
+        "type": ContractorTable.type,
+        "intervention": ContractorTable.intervention,
+        "city": UserTable.city,
+    },
+    prefix=("lastname",),
+)
+NGO_LIST = ListSpec(
+    key=Ngo.ngo_id,
+    sort={
+        "name": Ngo.name,
+        "registration_date": Ngo.registration_date,
+        "country": Ngo.country,
+        "type": Ngo.type,
+    },
+    filters={
+        "name": Ngo.name,
+        "type": Ngo.type,
+        "country": Ngo.country,
+    },
+    prefix=("name",),
+)
+
 def get_random_admin_id() -> str:
-    query = AdminQuery()
-    with query.get_session() as session:
+    with BaseQuery().get_session() as session:
         admin_ids = session.query(AdministratorTable.admin_id).all()
         if not admin_ids:
             raise Exception("Aucun administrateur disponible")
@@ -48,12 +167,18 @@ class AdminQuery(UserQuery):
     def __init__(self):
         super().__init__()
 
-    def get_all_companies(self):
+    def read_admin_emails(self) -> List[str]:
+        with self.get_session() as session:
+            return session.exec(
+                select(UserTable.email).join(AdministratorTable, AdministratorTable.admin_id == UserTable.user_id)
+            ).all()
+
+    def get_all_companies(self, filter: AdminCompanyFilter) -> Page:
         with self.get_session() as session:
             statement = select(CompanyTable, UserTable).join(UserTable, CompanyTable.company_id == UserTable.user_id)
-            results = session.exec(statement).all()
+            page = paginate(session, statement, COMPANY_LIST, filter)
 
-            return [
+            return page._replace(rows=[
                 CompanyAdminResponse(
                     company_id=company.company_id,
                     name=company.name,
@@ -72,8 +197,8 @@ class AdminQuery(UserQuery):
                     street=user.street,
                     pc=user.pc,
                 )
-                for company, user in results
-            ]
+                for company, user, *_ in page.rows
+            ])
 
 
     def update_company(self, company_id: str, data: CompanyUpdate) -> CompanyAdminResponse:
@@ -85,6 +210,7 @@ class AdminQuery(UserQuery):
                 setattr(company, key, value)
             session.add(company)
             session.commit()
+            invalidate_user_sessions(company_id)
             session.refresh(company)
             user = session.get(UserTable, company_id)
             return CompanyAdminResponse(**company.dict(), **user.dict())
@@ -100,16 +226,17 @@ class AdminQuery(UserQuery):
         if user:
             session.delete(user)
         session.commit()
+        invalidate_user_sessions(company_id)
         
-    def get_all(self) -> List[CollaboratorWithCompanyResponse]:
+    def get_all(self, filter: AdminCollaboratorFilter) -> Page:
        with self.get_session() as session:
             statement = (
                 select(UserTable, CompanyTable.name)
                 .join(CollaboratorTable, CollaboratorTable.collaborator_id == UserTable.user_id)
                 .join(CompanyTable, CollaboratorTable.company_id == CompanyTable.company_id)
             )
-            results = session.exec(statement).all()
-            return [
+            page = paginate(session, statement, COLLABORATOR_LIST, filter)
+            return page._replace(rows=[
                 CollaboratorWithCompanyResponse(
                     user_id=user.user_id,
                     firstname=user.firstname,
@@ -125,8 +252,8 @@ class AdminQuery(UserQuery):
                     inscription_date=user.inscription_date,
                     company_name=company_name,
                 )
-                for user, company_name in results
-            ]
+                for user, company_name, *_ in page.rows
+            ])
 
     def update_collaborator(self, collaborator_id: str, data: dict) -> CollaboratorWithCompanyResponse:
      with self.get_session() as session:
@@ -140,6 +267,7 @@ class AdminQuery(UserQuery):
 
         session.add(user)
         session.commit()
+        invalidate_user_sessions(collaborator_id)
         session.refresh(user)
 
         company = session.exec(
@@ -161,6 +289,7 @@ class AdminQuery(UserQuery):
                 session.delete(user)
 
                 session.commit()
+                invalidate_user_sessions(collaborator_id)
             except IntegrityError as e:
                 session.rollback()
                 # Remonte l'erreur avec un message descriptif pour le front
@@ -175,7 +304,7 @@ class AdminQuery(UserQuery):
                     detail=f"Erreur inattendue: {str(e)}"
                 )
 
-    def get_all_estimates_with_company_name(self, token: str) -> List[EstimateAdminResponse]:
+    def get_all_estimates_with_company_name(self, token: str, filter: AdminEstimateFilter) -> Page:
      query = CompanyQuery()
      with query.get_session() as session:
         statement = (
@@ -192,9 +321,9 @@ class AdminQuery(UserQuery):
             .join(CompanyTable, Estimate.company_id == CompanyTable.company_id)
             .join(CompanySubscription, Estimate.company_subscription_id == CompanySubscription.company_subscription_id)
         )
-        results = session.exec(statement).all()
+        page = paginate(session, statement, ESTIMATE_LIST, filter)
 
-        return [
+        return page._replace(rows=[
             EstimateAdminResponse(
                 company_subscription_id=row.company_subscription_id,
                 file=row.file,
@@ -205,8 +334,8 @@ class AdminQuery(UserQuery):
                 company_name=row.company_name,
                 subscription_status=row.subscription_status,
             )
-            for row in results
-        ]
+            for row in page.rows
+        ])
     def get_all_contracts_with_company_name(self, token: str) -> List[ContractAdminResponse]:
      query = CompanyQuery()
      with query.get_session() as session:
@@ -228,40 +357,36 @@ class AdminQuery(UserQuery):
                 (Contract.company_id == CompanySubscription.company_id)  
             )
             .join(CompanyTable, Contract.company_id == CompanyTable.company_id)
+            # Seuls les contrats issus d'un devis : semi-jointure servie par la clé primaire d'estimates
+            .where(
+                select(Estimate.company_subscription_id)
+                .where(
+                    Estimate.company_id == Contract.company_id,
+                    Estimate.company_subscription_id == Contract.company_subscription_id,
+                )
+                .exists()
+            )
         )
 
         results = session.exec(statement).all()
 
-        filtered_contracts = []
-        for row in results:
-            estimate = session.exec(
-                select(Estimate).where(
-                    Estimate.company_id == row.company_id,
-                    Estimate.company_subscription_id == row.company_subscription_id
-                )
-            ).first()
-
-            if not estimate:
-                continue
-
-            filtered_contracts.append(
-                ContractAdminResponse(
-                    company_id=row.company_id,
-                    company_subscription_id=row.company_subscription_id,
-                    file=row.file,
-                    creation_date=row.creation_date,
-                    signature_date=row.signature_date,
-                    company_signed=row.company_signed,
-                    admin_signed=row.admin_signed,
-                    company_name=row.company_name,
-                    subscription_status=row.subscription_status,  # ✅ sera bien renseigné
-                )
+        return [
+            ContractAdminResponse(
+                company_id=row.company_id,
+                company_subscription_id=row.company_subscription_id,
+                file=row.file,
+                creation_date=row.creation_date,
+                signature_date=row.signature_date,
+                company_signed=row.company_signed,
+                admin_signed=row.admin_signed,
+                company_name=row.company_name,
+                subscription_status=row.subscription_status,
             )
-
-        return filtered_contracts
+            for row in results
+        ]
 
 
-    def get_all_bills_with_company_name(self, token: str) -> List[BillAdminResponse]:
+    def get_all_bills_with_company_name(self, token: str, filter: AdminBillFilter) -> Page:
         query = CompanyQuery()
         with query.get_session() as session:
             statement = (
@@ -276,9 +401,9 @@ class AdminQuery(UserQuery):
                 .join(CompanyTable, BillTable.company_id == CompanyTable.company_id)
             )
 
-            results = session.exec(statement).all()
+            page = paginate(session, statement, BILL_LIST, filter)
 
-            return [
+            return page._replace(rows=[
                 BillAdminResponse(
                     company_subscription_id=row.company_subscription_id,
                     file=row.file,
@@ -286,8 +411,8 @@ class AdminQuery(UserQuery):
                     company_name=row.company_name,
                     subscription_status=row.subscription_status,
                 )
-                for row in results
-            ]
+                for row in page.rows
+            ])
         
 
 
@@ -409,8 +534,10 @@ class AdminQuery(UserQuery):
         ).first()
         if not bill:
             return False
+        company_id = bill.company_id
         session.delete(bill)
         session.commit()
+        invalidate_company_consultation_quota(company_id)
         return True
      
 
@@ -428,7 +555,7 @@ class AdminQuery(UserQuery):
         return True
  
 
-    def get_all_tickets(self):
+    def get_all_tickets(self, filter: AdminTicketFilter) -> Page:
         with self.get_session() as session:
             statement = (
                 select(
@@ -439,9 +566,9 @@ class AdminQuery(UserQuery):
                 )
                 .join(UserTable, Ticket.user_id == UserTable.user_id)
             )
-            results = session.exec(statement).all()
+            page = paginate(session, statement, TICKET_LIST, filter)
 
-            return [
+            return page._replace(rows=[
                 TicketAdminResponse(
                     ticket_id=ticket.ticket_id,
                     title=ticket.title,
@@ -453,8 +580,8 @@ class AdminQuery(UserQuery):
                     user_role=role,
                     status="Terminé" if ticket.close_date else "En attente"
                 )
-                for ticket, firstname, lastname, role in results
-            ]
+                for ticket, firstname, lastname, role, *_ in page.rows
+            ])
         
 
     def delete_ticket(self, ticket_id: str) -> bool:
@@ -531,7 +658,7 @@ class AdminQuery(UserQuery):
         }
 
 
-    def get_all_contractors(self):
+    def get_all_contractors(self, filter: AdminContractorFilter) -> Page:
         with self.get_session() as session:
             statement = (
                 select(
@@ -554,10 +681,10 @@ class AdminQuery(UserQuery):
                 )
                 .join(UserTable, UserTable.user_id == ContractorTable.contractor_id)
             )
-            return session.exec(statement).all()
+            return paginate(session, statement, CONTRACTOR_LIST, filter)
         
 
-    def get_all_ngos(self):
+    def get_all_ngos(self, filter: AdminNgoFilter) -> Page:
         with self.get_session() as session:
             statement = select(
                 Ngo.ngo_id,
@@ -571,7 +698,7 @@ class AdminQuery(UserQuery):
                 Ngo.website,
                 Ngo.phone
             )
-            return session.exec(statement).all()    
+            return paginate(session, statement, NGO_LIST, filter)    
         
         
     def insert_ngo(self, ngo_data):
@@ -663,6 +790,8 @@ class AdminQuery(UserQuery):
         subscription.status = "RESILIE"
         session.add(subscription)
         session.commit()
+        invalidate_company_message_limits(company_id)
+        invalidate_company_consultation_quota(company_id)
 
         return {"message": "Abonnement résilié avec succès"}
 
@@ -0,0 +1,67 @@
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from sqlmodel import select, or_
+from .base_queries import BaseQuery
+from models.database.medical_appointments_model import MedicalAppointmentTable
+from models.database.calendars_model import CalendarTable
+from models.database.contractors_model import ContractorTable
+from models.database.users_model import UserTable
+
+# Durée d'une consultation : un rendez-vous occupe [date, date + 30 min)
+APPOINTMENT_DURATION = timedelta(minutes=30)
+
+
+def _utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+class AvailabilityQuery(BaseQuery):
+
+    def read_busy_periods(self, contractor_id: str, start: datetime, end: datetime = None) -> list:
+        """
+        Périodes occupées d'un prestataire qui chevauchent [start, end) : rendez-vous non annulés
+        et indisponibilités. Parcours d'index (contractor_id, date de début) dans les deux tables.
+        """
+        return self.read_busy_periods_by_contractor([contractor_id], start, end).get(contractor_id, [])
+
+    def read_busy_periods_by_contractor(self, contractor_ids: list, start: datetime, end: datetime = None) -> dict:
+        """Même lecture pour plusieurs prestataires en deux requêtes : contractor_id -> périodes."""
+        appointments = select(MedicalAppointmentTable.contractor_id, MedicalAppointmentTable.medical_appointment_date).where(
+            MedicalAppointmentTable.contractor_id.in_(contractor_ids),
+            MedicalAppointmentTable.medical_appointment_date > start - APPOINTMENT_DURATION,
+            or_(MedicalAppointmentTable.status.is_(None), MedicalAppointmentTable.status != 'CANCELED')
+        )
+        calendars = select(CalendarTable.contractor_id, CalendarTable.unvailable_begin_date, CalendarTable.unvailable_end_date).where(
+            CalendarTable.contractor_id.in_(contractor_ids),
+            CalendarTable.unvailable_end_date > start
+        )
+        if end is not None:
+            appointments = appointments.where(MedicalAppointmentTable.medical_appointment_date < end)
+            calendars = calendars.where(CalendarTable.unvailable_begin_date < end)
+
+        periods = defaultdict(list)
+        if not contractor_ids:
+            return periods
+        with self.get_session() as session:
+            for contractor_id, begin in session.exec(appointments).all():
+                periods[contractor_id].append((_utc(begin), _utc(begin) + APPOINTMENT_DURATION))
+            for contractor_id, begin, end in session.exec(calendars).all():
+                periods[contractor_id].append((_utc(begin), _utc(end)))
+        return periods
+
+    def read_medical_contractors(self, service: str = None, intervention: str = None) -> list:
+        """Prestataires médicaux correspondant aux filtres de /contractor/medical, colonnes utiles seulement."""
+        stmt = (
+            select(
+                ContractorTable.contractor_id, UserTable.firstname, UserTable.lastname,
+                ContractorTable.service, ContractorTable.service_price, ContractorTable.intervention
+            )
+            .join(UserTable, ContractorTable.contractor_id == UserTable.user_id)
+            .where(ContractorTable.type == 'Medical')
+        )
+        if service:
+            stmt = stmt.where(ContractorTable.service == service)
+        if intervention:
+            stmt = stmt.where(ContractorTable.intervention.in_([intervention, "both"]))
+        with self.get_session() as session:
+            return session.exec(stmt).all()
@@ -1,10 +1,139 @@
 # base_queries.py
 import os
+import threading
+import time
+from sqlalchemy.pool import QueuePool
 from sqlmodel import Session, create_engine, SQLModel
 
+
+# Un seul moteur (et donc un seul pool de connexions) par URL et par worker.
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+class MeteredQueuePool(QueuePool):
+    """QueuePool qui mesure le nombre de checkouts et le temps d'attente d'une connexion."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._metrics_lock = threading.Lock()
+        self.checkouts = 0
+        self.checkout_errors = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except Exception:
+            with self._metrics_lock:
+                self.checkout_errors += 1
+            raise
+        waited = time.perf_counter() - start
+        with self._metrics_lock:
+            self.checkouts += 1
+            self.wait_time_total += waited
+            if waited > self.wait_time_max:
+                self.wait_time_max = waited
+        return conn
+
+    def metrics(self) -> dict:
+        with self._metrics_lock:
+            return {
+                "pool_size": self.size(),
+                "max_overflow": self._max_overflow,
+                "checked_out": self.checkedout(),
+                "checked_in": self.checkedin(),
+                "overflow": self.overflow(),
+                "checkouts": self.checkouts,
+                "checkout_errors": self.checkout_errors,
+                "wait_time_total_ms": round(self.wait_time_total * 1000, 3),
+                "wait_time_avg_ms": round(self.wait_time_total * 1000 / self.checkouts, 3) if self.checkouts else 0.0,
+                "wait_time_max_ms": round(self.wait_time_max * 1000, 3),
+            }
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def get_engine(url: str = None):
+    url = url or os.environ.get("DATABASE_URL")
+    engine = _engines.get(url)
+    if engine is not None:
+        return engine
+
+    with _engines_lock:
+        engine = _engines.get(url)
+        if engine is None:
+            engine = create_engine(
+                url,
+                poolclass=MeteredQueuePool,
+                pool_size=int(os.environ.get("DB_POOL_SIZE", 10)),
+                max_overflow=int(os.environ.get("DB_MAX_OVERFLOW", 20)),
+                pool_timeout=float(os.environ.get("DB_POOL_TIMEOUT", 30)),
+                pool_recycle=int(os.environ.get("DB_POOL_RECYCLE", 1800)),
+                pool_pre_ping=_env_bool("DB_POOL_PRE_PING", True),
+            )
+            _engines[url] = engine
+    return engine
+
+
+def dispose_engines():
+    with _engines_lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
+
+
+def get_pool_metrics() -> dict:
+    metrics = {}
+    for url, engine in list(_engines.items()):
+        pool = engine.pool
+        name = engine.url.render_as_string(hide_password=True)
+        if isinstance(pool, MeteredQueuePool):
+            metrics[name] = pool.metrics()
+        else:
+            metrics[name] = {"status": pool.status()}
+    return metrics
+
+
 class BaseQuery:
     def __init__(self, engine=None):
-        self.engine = engine or create_engine(os.environ.get("DATABASE_URL"))
+        self.engine = engine or get_engine()
 
     def get_session(self):
         return Session(self.engine)
+
+
+# Sessions ouvertes par la dépendance get_db et pas encore fermées.
+_open_sessions = 0
+_open_sessions_max = 0
+_open_sessions_lock = threading.Lock()
+
+
+def get_db():
+    """Dépendance FastAPI : une session du pool partagé par requête, toujours fermée à la fin."""
+    global _open_sessions, _open_sessions_max
+    session = Session(get_engine())
+    with _open_sessions_lock:
+        _open_sessions += 1
+        _open_sessions_max = max(_open_sessions_max, _open_sessions)
+    try:
+        yield session
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+        with _open_sessions_lock:
+            _open_sessions -= 1
+
+
+def get_session_metrics() -> dict:
+    with _open_sessions_lock:
+        return {"open_sessions": _open_sessions, "open_sessions_max": _open_sessions_max}
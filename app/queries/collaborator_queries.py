@@ -1,4 +1,4 @@
-from sqlmodel import select
+from sqlmodel import select, or_, update, func
 from .user_queries import UserQuery
 from models.database.users_model import UserTable
 from models.database.companies_model import CompanyTable
@@ -6,9 +6,13 @@ from models.database.collaborators_model import CollaboratorTable
 from models.local.user import CollaboratorSchema, ContractorSchema
 from service.logging import logging
 from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.mysql import insert
 from models.database.contractors_model import ContractorTable
 from models.database.medical_appointments_model import MedicalAppointmentTable
 from models.database.calendars_model import CalendarTable
+from service.cache import invalidate_contractor_availability, invalidate_free_consultations
+from queries.availability_queries import APPOINTMENT_DURATION
 from datetime import datetime, date, timezone
 from models.database.ngo_model import Ngo
 from models.database.events_model import Event
@@ -18,10 +22,15 @@ from models.database.donations_model import Donation
 from models.database.packs_model import Pack
 from models.database.company_subscriptions_model import CompanySubscription
 from models.database.bills_model import BillTable
+from models.database.consultation_entitlements_model import ConsultationEntitlement
 
 logger = logging.getLogger(__name__)
 
 
+class NoFreeConsultationLeft(Exception):
+    """Plus de consultation offerte sur la période : la réservation doit passer par le paiement."""
+
+
 # to_print = stmt.compile(compile_kwargs={"literal_binds": True}) print la requete
 # logger.debug(f"Query : {to_print}")
 
@@ -34,6 +43,8 @@ class CollaboratorQuery(UserQuery):
             stmt = (select(CollaboratorTable, UserTable).join(UserTable, CollaboratorTable.collaborator_id == UserTable.user_id).where(
                 CollaboratorTable.collaborator_id == uuid))
             result = session.execute(stmt).one_or_none()
+            if result is None:
+                return None
 
             collaborator, user = result
             data = {**user.__dict__, **collaborator.__dict__}
@@ -87,12 +98,144 @@ class CollaboratorQuery(UserQuery):
             return ContractorSchema.from_orm(combined_data)
 
     def create_medical_appointment(self, appointment: MedicalAppointmentTable) -> MedicalAppointmentTable:
+        if appointment.status != 'CANCELED':
+            appointment.active_slot = appointment.medical_appointment_date
         with self.get_session() as session:
             session.add(appointment)
             session.commit()
             session.refresh(appointment)
+            invalidate_contractor_availability(appointment.contractor_id)
+            return appointment
+
+    def reserve_medical_appointment(self, appointment: MedicalAppointmentTable, entitlement_period: tuple = None,
+                                    free_quota: int = None):
+        """
+        Réserve le créneau et crée le rendez-vous dans une seule transaction ; None si le créneau est pris.
+        La ligne du prestataire est verrouillée (FOR UPDATE) : les réservations d'un même prestataire
+        passent une à une entre le contrôle de chevauchement et l'insertion. La contrainte unique
+        (contractor_id, active_slot) garantit en dernier ressort un seul rendez-vous actif par créneau.
+        Le compteur de consultations de la période (entitlement_period) est mis à jour dans la même transaction.
+        Avec free_quota, la consultation offerte n'est accordée que si le compteur est encore sous le quota
+        (UPDATE conditionnel sur la ligne du compteur) ; sinon NoFreeConsultationLeft, rien n'est réservé.
+        """
+        begin = appointment.medical_appointment_date
+        end = begin + APPOINTMENT_DURATION
+        appointment.active_slot = begin
+        with self.get_session() as session:
+            session.exec(
+                select(ContractorTable.contractor_id)
+                .where(ContractorTable.contractor_id == appointment.contractor_id)
+                .with_for_update()
+            ).first()
+
+            taken = session.exec(
+                select(MedicalAppointmentTable.medical_appointment_id).where(
+                    MedicalAppointmentTable.contractor_id == appointment.contractor_id,
+                    MedicalAppointmentTable.medical_appointment_date > begin - APPOINTMENT_DURATION,
+                    MedicalAppointmentTable.medical_appointment_date < end,
+                    or_(MedicalAppointmentTable.status.is_(None), MedicalAppointmentTable.status != 'CANCELED')
+                ).limit(1)
+            ).first() or session.exec(
+                select(CalendarTable.calendar_id).where(
+                    CalendarTable.contractor_id == appointment.contractor_id,
+                    CalendarTable.unvailable_begin_date < end,
+                    CalendarTable.unvailable_end_date > begin
+                ).limit(1)
+            ).first()
+            if taken:
+                session.rollback()
+                return None
+
+            session.add(appointment)
+            try:
+                if entitlement_period:
+                    session.flush()
+                    if free_quota is not None:
+                        if not self._consume_free_consultation(session, appointment, entitlement_period, free_quota):
+                            session.rollback()
+                            raise NoFreeConsultationLeft()
+                    else:
+                        self._adjust_entitlement(session, appointment.collaborator_id, entitlement_period, 1)
+                session.commit()
+            except IntegrityError:
+                session.rollback()
+                return None
+            session.refresh(appointment)
+            invalidate_contractor_availability(appointment.contractor_id)
+            invalidate_free_consultations(appointment.collaborator_id)
             return appointment
 
+    def _count_active_appointments(self, session, collaborator_id: str, period: tuple, exclude_id: str = None) -> int:
+        period_start, period_end = period
+        stmt = select(func.count()).select_from(MedicalAppointmentTable).where(
+            MedicalAppointmentTable.collaborator_id == collaborator_id,
+            MedicalAppointmentTable.medical_appointment_date >= period_start,
+            MedicalAppointmentTable.medical_appointment_date < period_end,
+            or_(MedicalAppointmentTable.status.is_(None), MedicalAppointmentTable.status != 'CANCELED')
+        )
+        if exclude_id:
+            stmt = stmt.where(MedicalAppointmentTable.medical_appointment_id != exclude_id)
+        return session.exec(stmt).one()
+
+    def _adjust_entitlement(self, session, collaborator_id: str, period: tuple, delta: int, exclude_id: str = None):
+        # Ajoute delta au compteur de la période ; sans ligne, elle est initialisée en comptant
+        # les rendez-vous actifs (sauf exclude_id).
+        period_start, period_end = period
+        exists = session.exec(
+            select(ConsultationEntitlement.used)
+            .where(ConsultationEntitlement.collaborator_id == collaborator_id)
+            .where(ConsultationEntitlement.period_start == period_start)
+        ).first() is not None
+        upsert = insert(ConsultationEntitlement).values(
+            collaborator_id=collaborator_id,
+            period_start=period_start,
+            period_end=period_end,
+            used=0 if exists else self._count_active_appointments(session, collaborator_id, period, exclude_id),
+        )
+        session.execute(upsert.on_duplicate_key_update(used=ConsultationEntitlement.used + delta))
+
+    def _consume_free_consultation(self, session, appointment: MedicalAppointmentTable, period: tuple, quota: int) -> bool:
+        # La ligne du compteur (créée au besoin, sans le rendez-vous en cours) n'est incrémentée que sous
+        # le quota : le verrou de ligne de l'UPDATE sérialise les réservations gratuites du salarié.
+        self._adjust_entitlement(session, appointment.collaborator_id, period, 0, exclude_id=appointment.medical_appointment_id)
+        consumed = session.execute(
+            update(ConsultationEntitlement)
+            .where(ConsultationEntitlement.collaborator_id == appointment.collaborator_id)
+            .where(ConsultationEntitlement.period_start == period[0])
+            .where(ConsultationEntitlement.used < quota)
+            .values(used=ConsultationEntitlement.used + 1)
+        )
+        return consumed.rowcount == 1
+
+    def read_free_consultations_used(self, collaborator_id: str, period: tuple) -> int:
+        """Rendez-vous actifs du salarié sur la période : lecture par clé primaire du compteur."""
+        with self.get_session() as session:
+            entitlement = session.get(ConsultationEntitlement, (collaborator_id, period[0]))
+            if entitlement is not None:
+                return entitlement.used
+
+            used = self._count_active_appointments(session, collaborator_id, period)
+            session.add(ConsultationEntitlement(collaborator_id=collaborator_id, period_start=period[0], period_end=period[1], used=used))
+            try:
+                session.commit()
+            except IntegrityError:
+                session.rollback()
+            return used
+
+    def read_consultation_quota(self, company_id: str):
+        """Dernière facture payée de l'entreprise avec le statut de son abonnement et le quota du pack, en une requête."""
+        with self.get_session() as session:
+            stmt = (
+                select(BillTable.payed_date, CompanySubscription.status, Pack.default_consultation_number)
+                .join(CompanySubscription, (CompanySubscription.company_id == BillTable.company_id)
+                      & (CompanySubscription.company_subscription_id == BillTable.company_subscription_id))
+                .join(Pack, Pack.pack_id == CompanySubscription.pack_id)
+                .where(BillTable.company_id == company_id, BillTable.payed_date.is_not(None))
+                .order_by(BillTable.payed_date.desc())
+                .limit(1)
+            )
+            return session.exec(stmt).first()
+
     def read_medical_appointment(self, uuid, filter_date=None):
         with self.get_session() as session:
             stmt = select(MedicalAppointmentTable).where(MedicalAppointmentTable.collaborator_id == uuid)
@@ -124,7 +267,7 @@ class CollaboratorQuery(UserQuery):
             result = session.execute(stmt).scalar_one_or_none()
             return result
 
-    def update_medical_appointment_by_appointment_id(self, appointment_id: str, data: dict):
+    def update_medical_appointment_by_appointment_id(self, appointment_id: str, data: dict, entitlement_period: tuple = None):
         with self.get_session() as session:
             stmt = select(MedicalAppointmentTable).where(
                 MedicalAppointmentTable.medical_appointment_id == appointment_id)
@@ -133,12 +276,20 @@ class CollaboratorQuery(UserQuery):
             if appointment is None:
                 return appointment
 
+            was_active = appointment.status != 'CANCELED'
             for key, value in data.items():
                 setattr(appointment, key, value)
+            if appointment.status == 'CANCELED':
+                appointment.active_slot = None
 
             session.add(appointment)
+            if was_active and appointment.status == 'CANCELED' and entitlement_period:
+                session.flush()
+                self._adjust_entitlement(session, appointment.collaborator_id, entitlement_period, -1)
             session.commit()
             session.refresh(appointment)
+            invalidate_contractor_availability(appointment.contractor_id)
+            invalidate_free_consultations(appointment.collaborator_id)
             return appointment
 
     def get_all_ngos(self):
@@ -32,7 +32,8 @@ from sqlalchemy import insert
 logger = logging.getLogger(__name__)
 from uuid import uuid4
 from datetime import datetime
-from service.pdf_generator import PDFGenerator  
+from service.render_queue import submit_render
+from service.cache import invalidate_user_sessions, invalidate_company_message_limits, invalidate_company_consultation_quota
 
 from typing import Optional
 
@@ -73,6 +74,7 @@ class CompanyQuery(UserQuery):
             setattr(db_obj, field, value)
 
         session.commit()
+        invalidate_user_sessions(company_id)
         session.refresh(db_obj)
         return CompanyUpdateSchema.model_validate(db_obj.__dict__) 
 
@@ -182,6 +184,7 @@ class CompanyQuery(UserQuery):
                 setattr(user, field, update_data[field])
 
         session.commit()
+        invalidate_user_sessions(collaborator_id)
         session.refresh(collaborator)
         session.refresh(user)
 
@@ -213,6 +216,7 @@ class CompanyQuery(UserQuery):
             session.delete(user)
 
         session.commit()
+        invalidate_user_sessions(collaborator_id)
         return True
 
 
@@ -246,6 +250,7 @@ class CompanyQuery(UserQuery):
             session.add(bill)
             session.commit()
             session.refresh(bill)
+            invalidate_company_consultation_quota(bill.company_id)
             return BillSchema.model_validate(bill)
         except Exception as e:
             session.rollback()
@@ -268,6 +273,7 @@ class CompanyQuery(UserQuery):
         }
         result = session.execute(query, values)
         session.commit()
+        invalidate_company_consultation_quota(company_id)
         return result.rowcount > 0
 
 
@@ -284,6 +290,7 @@ class CompanyQuery(UserQuery):
 
         session.delete(result)
         session.commit()
+        invalidate_company_consultation_quota(company_id)
         return True
 
 
@@ -298,6 +305,8 @@ class CompanyQuery(UserQuery):
         subscription.status = new_status
         session.add(subscription)
         session.commit()
+        invalidate_company_message_limits(company_id)
+        invalidate_company_consultation_quota(company_id)
 
 
 
@@ -321,6 +330,8 @@ class CompanyQuery(UserQuery):
                         session.add(sub)
 
         session.commit()
+        invalidate_company_message_limits(company_id)
+        invalidate_company_consultation_quota(company_id)
 
         for contract in results:
             schema = ContractSchema.model_validate(contract, from_attributes=True)
@@ -540,8 +551,10 @@ class CompanyQuery(UserQuery):
 
 
     
-    def generate_estimate_pdf(self, company_name: str, subscription_id:str , employees: int, pack, signature_date: datetime) -> str:
-     return PDFGenerator.generate_devis(
+    # Rendus PDF planifiés dans le pool de processus : renvoient l'identifiant du job de rendu.
+    def schedule_estimate_pdf(self, company_name: str, subscription_id:str , employees: int, pack, signature_date: datetime, filepath: str, owner_id: str = None) -> str:
+     return submit_render(
+        "estimate", filepath, owner_id=owner_id,
         company_name=company_name,
         subscription_id=subscription_id,
         plan=pack.name,
@@ -553,8 +566,11 @@ class CompanyQuery(UserQuery):
         signature_date=signature_date
     )
 
-    def generate_contract_pdf(self, company_name: str , subscription_id:str , employees: int, pack, signature_date: datetime) -> str:
-     return PDFGenerator.generate_contrat(
+    def schedule_contract_pdf(self, company_name: str , subscription_id:str , employees: int, pack, signature_date: datetime, filepath: str, owner_id: str = None,
+                              company_signature=None, admin_signature=None) -> str:
+     # Les signatures sont transmises par empreinte (service/signature_store.py), pas en base64.
+     return submit_render(
+        "contract", filepath, owner_id=owner_id,
         company_name=company_name,
         subscription_id=subscription_id,
         plan=pack.name,
@@ -562,11 +578,14 @@ class CompanyQuery(UserQuery):
         price_per_employee=pack.annual_collaborator_price,
         consultation_nb=pack.default_consultation_number,
         chatbot_msgs=pack.chatbot_messages_number or 0,
-        signature_date=signature_date
+        signature_date=signature_date,
+        company_signature=company_signature,
+        admin_signature=admin_signature
     )
 
-    def generate_facture_pdf(self, company_name, subscription_id, pack, total_ht, tva, total_ttc, date_facture):
-     return PDFGenerator.generate_facture(
+    def schedule_facture_pdf(self, company_name, subscription_id, pack, total_ht, tva, total_ttc, date_facture, filepath: str, owner_id: str = None) -> str:
+     return submit_render(
+        "bill", filepath, owner_id=owner_id,
         company_name=company_name,
         subscription_id=subscription_id,
         plan=pack.name,
@@ -596,6 +615,7 @@ class CompanyQuery(UserQuery):
                 setattr(result, key, value)
             session.commit()
             session.refresh(result)
+            invalidate_company_consultation_quota(company_id)
             return result
 
     def read_bill_by_subscription_id(self, subscription_id: str):
@@ -10,6 +10,7 @@ from models.local.user import ContractorSchema
 from service.logging import logging
 from models.database.medical_appointments_model import MedicalAppointmentTable
 from models.database.calendars_model import CalendarTable
+from service.cache import invalidate_contractor_availability
 from datetime import datetime, timezone, timedelta
 from models.database.collaborators_model import CollaboratorTable
 
@@ -77,6 +78,7 @@ class ContractorQueries(UserQuery):
             session.add(calendar)
             session.commit()
             session.refresh(calendar)
+            invalidate_contractor_availability(calendar.contractor_id)
             return calendar
 
     def read_contractor_appointment_by_contractor_id(self, contractor_id: str):
@@ -151,6 +153,7 @@ class ContractorQueries(UserQuery):
 
             session.delete(result)
             session.commit()
+            invalidate_contractor_availability(result.contractor_id)
 
     def read_one_calendar(self, calendar_id: str):
         with self.get_session() as session:
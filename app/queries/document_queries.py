@@ -0,0 +1,40 @@
+import posixpath
+from sqlmodel import select
+from .base_queries import BaseQuery
+from models.database.estimates_model import Estimate
+from models.database.contracts_model import Contract
+from models.database.bills_model import BillTable
+from models.database.medical_appointments_model import MedicalAppointmentTable
+from models.database.contractors_model import ContractorTable
+from models.database.donations_model import Donation
+
+
+class DocumentQuery(BaseQuery):
+
+    def read_document_owners(self, path: str) -> set:
+        """
+        Utilisateurs autorisés à lire un document, `path` étant relatif au dossier uploads
+        (ex. « estimates/devis_x.pdf »). Ensemble vide pour un fichier inconnu : réservé aux administrateurs.
+        """
+        folder, name = posixpath.split(path)
+        # Les chemins sont enregistrés avec ou sans « / » initial selon les tables
+        stored = [f"uploads/{path}", f"/uploads/{path}"]
+
+        with self.get_session() as session:
+            if folder == "estimates":
+                return set(session.exec(select(Estimate.company_id).where(Estimate.file.in_(stored))).all())
+            if folder == "contracts":
+                return set(session.exec(select(Contract.company_id).where(Contract.file.in_(stored))).all())
+            if folder == "bills":
+                return set(session.exec(select(BillTable.company_id).where(BillTable.file.in_(stored))).all())
+            if folder == "medical_bill":
+                row = session.exec(
+                    select(MedicalAppointmentTable.collaborator_id, MedicalAppointmentTable.contractor_id)
+                    .where(MedicalAppointmentTable.bill_file == name)
+                ).first()
+                return set(row) if row else set()
+            if folder == "contractor_contract":
+                return set(session.exec(select(ContractorTable.contractor_id).where(ContractorTable.contract_file == name)).all())
+            if folder == "":
+                return set(session.exec(select(Donation.collaborator_id).where(Donation.bill_file.in_(stored))).all())
+        return set()
@@ -0,0 +1,130 @@
+from datetime import datetime, timezone
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select, update, delete
+from .base_queries import BaseQuery
+from models.database.document_store_model import DocumentBlobTable, DocumentRefTable
+from models.database.estimates_model import Estimate
+from models.database.contracts_model import Contract
+from models.database.bills_model import BillTable
+from models.database.medical_appointments_model import MedicalAppointmentTable
+from models.database.contractors_model import ContractorTable
+
+
+def _logical(file: str) -> str:
+    # « uploads/estimates/x.pdf » ou « /uploads/estimates/x.pdf » -> « estimates/x.pdf »
+    return file.lstrip("/").removeprefix("uploads/")
+
+
+class DocumentStoreQuery(BaseQuery):
+
+    def add_reference(self, file: str, sha256: str, extension: str, size: int):
+        """Fait pointer le chemin logique `file` vers le contenu `sha256`, compteurs de références compris."""
+        now = datetime.now(timezone.utc)
+        with self.get_session() as session:
+            try:
+                with session.begin_nested():
+                    session.add(DocumentBlobTable(sha256=sha256, extension=extension, size=size, ref_count=0, created_at=now))
+            except IntegrityError:
+                # Contenu déjà stocké (dédoublonnage)
+                pass
+
+            ref = session.exec(select(DocumentRefTable).where(DocumentRefTable.file == file).with_for_update()).first()
+            if ref is not None and ref.sha256 == sha256:
+                session.commit()
+                return
+            if ref is not None:
+                # Document réécrit sous le même nom : l'ancien contenu perd une référence
+                self._release(session, ref.sha256, now)
+                ref.sha256 = sha256
+                ref.created_at = now
+            else:
+                session.add(DocumentRefTable(file=file, sha256=sha256, created_at=now))
+
+            result = session.execute(
+                update(DocumentBlobTable)
+                .where(DocumentBlobTable.sha256 == sha256)
+                .values(ref_count=DocumentBlobTable.ref_count + 1, unreferenced_at=None)
+            )
+            if not result.rowcount:
+                # Contenu supprimé par le GC pendant l'attente du verrou : il est de nouveau stocké
+                session.add(DocumentBlobTable(sha256=sha256, extension=extension, size=size, ref_count=1, created_at=now))
+            session.commit()
+
+    def _release(self, session, sha256: str, now: datetime):
+        session.execute(
+            update(DocumentBlobTable)
+            .where(DocumentBlobTable.sha256 == sha256)
+            .values(ref_count=DocumentBlobTable.ref_count - 1)
+        )
+        session.execute(
+            update(DocumentBlobTable)
+            .where(DocumentBlobTable.sha256 == sha256, DocumentBlobTable.ref_count <= 0)
+            .values(unreferenced_at=now)
+        )
+
+    def read_reference(self, file: str):
+        """(sha256, extension) du contenu d'un chemin logique, ou None s'il n'est pas dans le stockage."""
+        with self.get_session() as session:
+            return session.exec(
+                select(DocumentBlobTable.sha256, DocumentBlobTable.extension)
+                .join(DocumentRefTable, DocumentRefTable.sha256 == DocumentBlobTable.sha256)
+                .where(DocumentRefTable.file == file)
+            ).first()
+
+    def read_live_files(self) -> set:
+        """Chemins logiques encore utilisés par les devis, contrats, factures, rendez-vous et contrats prestataires."""
+        with self.get_session() as session:
+            files = set()
+            for column in (Estimate.file, Contract.file, BillTable.file):
+                files.update(_logical(file) for file in session.exec(select(column)).all() if file)
+            files.update(
+                f"medical_bill/{name}" for name in session.exec(select(MedicalAppointmentTable.bill_file)).all() if name
+            )
+            files.update(
+                f"contractor_contract/{name}" for name in session.exec(select(ContractorTable.contract_file)).all() if name
+            )
+            return files
+
+    def read_references_before(self, before: datetime) -> list:
+        with self.get_session() as session:
+            return session.exec(select(DocumentRefTable.file).where(DocumentRefTable.created_at < before)).all()
+
+    def release_references(self, files: list):
+        now = datetime.now(timezone.utc)
+        with self.get_session() as session:
+            for file in files:
+                ref = session.exec(select(DocumentRefTable).where(DocumentRefTable.file == file).with_for_update()).first()
+                if ref is None:
+                    continue
+                self._release(session, ref.sha256, now)
+                session.delete(ref)
+            session.commit()
+
+    def delete_unreferenced_blobs(self, before: datetime, remove_file, limit: int = 500) -> list:
+        """
+        Supprime les contenus sans référence depuis `before` ; renvoie leurs (sha256, extension).
+        remove_file(sha256, extension) efface chaque fichier avant le commit : tant que la suppression
+        de la ligne n'est pas validée, un add_reference du même contenu attend son verrou.
+        """
+        with self.get_session() as session:
+            candidates = session.exec(
+                select(DocumentBlobTable.sha256, DocumentBlobTable.extension)
+                .where(DocumentBlobTable.ref_count <= 0, DocumentBlobTable.unreferenced_at < before)
+                .limit(limit)
+            ).all()
+            deleted = []
+            for sha256, extension in candidates:
+                # Condition répétée : une référence a pu être ajoutée entre-temps
+                result = session.execute(
+                    delete(DocumentBlobTable)
+                    .where(DocumentBlobTable.sha256 == sha256, DocumentBlobTable.ref_count <= 0)
+                )
+                if result.rowcount:
+                    remove_file(sha256, extension)
+                    deleted.append((sha256, extension))
+            session.commit()
+            return deleted
+
+    def read_existing_blobs(self, hashes: list) -> set:
+        with self.get_session() as session:
+            return set(session.exec(select(DocumentBlobTable.sha256).where(DocumentBlobTable.sha256.in_(hashes))).all())
@@ -0,0 +1,71 @@
+from datetime import datetime, timezone
+from sqlmodel import select, func
+from .base_queries import BaseQuery
+from models.database.email_outbox_model import EmailOutboxTable
+
+
+class EmailOutboxQuery(BaseQuery):
+
+    def enqueue(self, sender: str, recipient: str, subject: str, html: str, attachment_path: str = None) -> str:
+        now = datetime.now(timezone.utc)
+        email = EmailOutboxTable(
+            sender=sender,
+            recipient=recipient,
+            subject=subject,
+            html=html,
+            attachment_path=attachment_path,
+            next_attempt_at=now,
+            created_at=now
+        )
+        with self.get_session() as session:
+            session.add(email)
+            session.commit()
+            return email.email_id
+
+    def claim_due(self, limit: int, retry_delay) -> list:
+        """
+        Réserve jusqu'à `limit` e-mails à envoyer. La tentative est comptée et la suivante planifiée
+        dès la réservation : si le processus s'arrête pendant l'envoi, l'e-mail sera repris plus tard.
+        `retry_delay(attempts)` renvoie le délai (timedelta) avant la tentative suivante.
+        """
+        now = datetime.now(timezone.utc)
+        with self.get_session() as session:
+            stmt = (
+                select(EmailOutboxTable)
+                .where(EmailOutboxTable.status == "PENDING", EmailOutboxTable.next_attempt_at <= now)
+                .order_by(EmailOutboxTable.next_attempt_at)
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+            )
+            emails = session.exec(stmt).all()
+            claimed = []
+            for email in emails:
+                email.attempts += 1
+                email.next_attempt_at = now + retry_delay(email.attempts)
+                claimed.append(email.model_dump())
+            session.commit()
+            return claimed
+
+    def mark_sent(self, email_id: str):
+        with self.get_session() as session:
+            email = session.get(EmailOutboxTable, email_id)
+            if email:
+                email.status = "SENT"
+                email.last_error = None
+                email.sent_at = datetime.now(timezone.utc)
+                session.commit()
+
+    def mark_error(self, email_id: str, error: str, failed: bool):
+        """Enregistre l'échec d'une tentative ; `failed` abandonne définitivement l'envoi."""
+        with self.get_session() as session:
+            email = session.get(EmailOutboxTable, email_id)
+            if email:
+                email.last_error = error
+                if failed:
+                    email.status = "FAILED"
+                session.commit()
+
+    def count_by_status(self) -> dict:
+        with self.get_session() as session:
+            stmt = select(EmailOutboxTable.status, func.count()).group_by(EmailOutboxTable.status)
+            return {status: count for status, count in session.exec(stmt).all()}
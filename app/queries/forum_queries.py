@@ -1,5 +1,9 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import and_, or_
 from sqlalchemy.orm import Session
 from models.database import categories_model, subjects_model, posts_model, reports_model
+from models.database.users_model import UserTable
 
 
 
@@ -60,6 +64,24 @@ def create_post(db: Session, data: dict):
 def get_posts_by_subject(db: Session, subject_id: str):
     return db.query(posts_model.Post).filter_by(subject_id=subject_id).all()
 
+def get_posts_with_author_by_subject(db: Session, subject_id: str, after: Optional[tuple[datetime, str]] = None, limit: Optional[int] = None):
+    Post = posts_model.Post
+    query = (
+        db.query(Post, UserTable.firstname, UserTable.lastname)
+        .outerjoin(UserTable, UserTable.user_id == Post.collaborator_id)
+        .filter(Post.subject_id == subject_id)
+    )
+    if after:
+        after_date, after_id = after
+        query = query.filter(or_(
+            Post.creation_date > after_date,
+            and_(Post.creation_date == after_date, Post.post_id > after_id)
+        ))
+    query = query.order_by(Post.creation_date, Post.post_id)
+    if limit:
+        query = query.limit(limit)
+    return query.all()
+
 def delete_post(db: Session, post_id: str):
     post = db.query(posts_model.Post).filter_by(post_id=post_id).first()
     if post:
@@ -0,0 +1,124 @@
+"""
+Pagination par curseur (keyset) des listes de l'administration.
+
+Chaque liste trie sur une colonne NOT NULL choisie par le client, départagée par une clé unique :
+la page suivante reprend après le couple (valeur de tri, clé) du dernier élément, au lieu d'un
+OFFSET qui relit toutes les lignes précédentes. Avec un index (colonne de tri, clé), chaque page
+ne coûte que ses propres lignes, quelle que soit sa position dans la liste.
+
+Le curseur est opaque pour le client : il est renvoyé dans l'en-tête X-Next-Cursor, comme pour
+les posts du forum, et n'est valable que pour le tri qui l'a produit.
+"""
+import base64
+import binascii
+import json
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from types import FunctionType
+from typing import Any, NamedTuple, Optional
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+
+
+@dataclass(frozen=True)
+class ListSpec:
+    key: Any                                        # colonne unique départageant les égalités de tri
+    sort: dict                                      # nom exposé -> colonne NOT NULL
+    filters: dict = field(default_factory=dict)     # nom exposé -> colonne (égalité) ou fonction(valeur) -> condition
+    prefix: tuple = ()                              # filtres texte comparés par préfixe (LIKE 'x%', servi par un index)
+
+
+class Page(NamedTuple):
+    rows: list
+    next_cursor: Optional[str]
+
+
+def _invalid_cursor():
+    return HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _dump(value):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    return value
+
+
+def _load(value):
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+        raise ValueError(value)
+    return value
+
+
+def encode_cursor(sort: str, order: str, value, key) -> str:
+    raw = json.dumps([sort, order, _dump(value), key], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, order: str) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort, cursor_order, value, key = json.loads(raw)
+        value = _load(value)
+    except (binascii.Error, ValueError, TypeError):
+        raise _invalid_cursor()
+    # Un curseur ne vaut que pour le tri qui l'a produit
+    if (cursor_sort, cursor_order) != (sort, order):
+        raise _invalid_cursor()
+    return value, key
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def apply_filters(statement, spec: ListSpec, params):
+    for name, target in spec.filters.items():
+        value = getattr(params, name, None)
+        if value is None or value == "":
+            continue
+        if isinstance(target, FunctionType):
+            statement = statement.where(target(value))
+        elif name in spec.prefix:
+            statement = statement.where(target.like(_escape_like(value) + "%", escape="\\"))
+        else:
+            statement = statement.where(target == value)
+    return statement
+
+
+def paginate(session, statement, spec: ListSpec, params) -> Page:
+    """
+    Applique filtres, tri et curseur de `params` (voir models/api/filter.py, AdminListFilter) à
+    `statement` et renvoie une page. Les lignes portent deux colonnes de plus, `sort_value` et
+    `sort_key`, à ignorer par l'appelant.
+    """
+    column = spec.sort[params.sort]
+    descending = params.order == "desc"
+
+    statement = apply_filters(statement, spec, params)
+    statement = statement.add_columns(column.label("sort_value"), spec.key.label("sort_key"))
+
+    if params.after:
+        value, key = decode_cursor(params.after, params.sort, params.order)
+        if descending:
+            statement = statement.where(or_(column < value, and_(column == value, spec.key < key)))
+        else:
+            statement = statement.where(or_(column > value, and_(column == value, spec.key > key)))
+
+    if descending:
+        statement = statement.order_by(column.desc(), spec.key.desc())
+    else:
+        statement = statement.order_by(column, spec.key)
+
+    # Une ligne de plus que demandé : indique s'il existe une page suivante sans requête COUNT
+    rows = session.exec(statement.limit(params.limit + 1)).all()
+    if len(rows) <= params.limit:
+        return Page(rows, None)
+    rows = rows[:params.limit]
+    last = rows[-1]
+    return Page(rows, encode_cursor(params.sort, params.order, last.sort_value, last.sort_key))
@@ -0,0 +1,64 @@
+"""
+Comptage des requêtes SQL émises par un bloc de code, pour détecter les N+1 : une liste qui
+lance une requête par ligne en plus de la requête principale passe inaperçue sur une base de
+développement, mais pas devant un nombre de requêtes fixé.
+
+    with assert_max_queries(1):
+        AdminQuery().get_all_contracts_with_company_name(token)
+
+    with count_queries() as counter:
+        client.get("/admin/contracts", headers={"token": token})
+    print(counter.count, counter.statements)
+
+Le comptage se fait sur le moteur partagé (get_engine) et inclut par défaut les requêtes de
+tous les threads : les routes synchrones de FastAPI s'exécutent dans un pool de threads.
+current_thread_only=True ignore celles des tâches de fond.
+"""
+import threading
+from contextlib import contextmanager
+from sqlalchemy import event
+from .base_queries import get_engine
+
+
+class QueryCounter:
+    def __init__(self, engine=None, current_thread_only: bool = False):
+        self.engine = engine or get_engine()
+        self.thread_id = threading.get_ident() if current_thread_only else None
+        self.statements = []
+        self._lock = threading.Lock()
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        if self.thread_id is not None and threading.get_ident() != self.thread_id:
+            return
+        with self._lock:
+            self.statements.append(statement)
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc_info):
+        event.remove(self.engine, "before_cursor_execute", self._record)
+        return False
+
+
+def count_queries(engine=None, current_thread_only: bool = False) -> QueryCounter:
+    return QueryCounter(engine, current_thread_only)
+
+
+class TooManyQueries(AssertionError):
+    pass
+
+
+@contextmanager
+def assert_max_queries(limit: int, engine=None, current_thread_only: bool = False):
+    """Échoue si le bloc émet plus de `limit` requêtes ; le message liste les requêtes émises."""
+    with QueryCounter(engine, current_thread_only) as counter:
+        yield counter
+    if counter.count > limit:
+        statements = "\n".join(f"  {statement}" for statement in counter.statements)
+        raise TooManyQueries(f"{counter.count} requêtes émises (maximum {limit}) :\n{statements}")
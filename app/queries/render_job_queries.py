@@ -0,0 +1,46 @@
+from datetime import datetime, timezone
+from sqlmodel import select
+from .base_queries import BaseQuery
+from models.database.render_jobs_model import RenderJobTable
+
+
+class RenderJobQuery(BaseQuery):
+
+    def create_job(self, kind: str, file: str, output_path: str, payload: str, owner_id: str = None) -> str:
+        job = RenderJobTable(
+            kind=kind,
+            file=file,
+            output_path=output_path,
+            payload=payload,
+            owner_id=owner_id,
+            created_at=datetime.now(timezone.utc)
+        )
+        with self.get_session() as session:
+            session.add(job)
+            session.commit()
+            return job.job_id
+
+    def read_job(self, job_id: str):
+        with self.get_session() as session:
+            return session.get(RenderJobTable, job_id)
+
+    def read_latest_job_by_file(self, file: str):
+        with self.get_session() as session:
+            stmt = select(RenderJobTable).where(RenderJobTable.file == file).order_by(RenderJobTable.created_at.desc())
+            return session.exec(stmt).first()
+
+    def read_pending_jobs(self):
+        with self.get_session() as session:
+            stmt = select(RenderJobTable).where(RenderJobTable.status == "PENDING").order_by(RenderJobTable.created_at)
+            return session.exec(stmt).all()
+
+    def update_job_status(self, job_id: str, status: str, error: str = None):
+        with self.get_session() as session:
+            job = session.get(RenderJobTable, job_id)
+            if not job:
+                return None
+            job.status = status
+            job.error = error
+            job.finished_at = datetime.now(timezone.utc)
+            session.commit()
+            return job
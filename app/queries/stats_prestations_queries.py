@@ -1,51 +1,46 @@
-from sqlmodel import select, or_
-from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from sqlmodel import select, func
 from queries.base_queries import BaseQuery
 
-from models.database.contractors_model import ContractorTable
-from models.database.appointments_model import AppointmentTable
-from models.database.medical_appointments_model import MedicalAppointmentTable
+from models.database.stats_rollups_model import StatsServiceTable, StatsDailyServiceTable
 
 
+# Les agrégats sont lus dans les tables stats_*, tenues à jour par StatsRollupQuery.refresh.
 class StatsPrestationQuery(BaseQuery):
 
     def get_service_count_by_type(self):
         with self.get_session() as session:
-            stmt = select(ContractorTable.type)
+            stmt = select(StatsServiceTable.type, func.sum(StatsServiceTable.contractor_count)).group_by(StatsServiceTable.type)
             results = session.exec(stmt).all()
-            return Counter(results)
+            return {type_: int(count) for type_, count in results}
 
     def get_intervention_distribution(self):
         with self.get_session() as session:
-            stmt = select(ContractorTable.intervention)
+            stmt = (
+                select(StatsServiceTable.intervention, func.sum(StatsServiceTable.contractor_count))
+                .group_by(StatsServiceTable.intervention)
+            )
             results = session.exec(stmt).all()
-            return Counter(results)
+            return {intervention: int(count) for intervention, count in results}
 
     def get_service_price(self):
         with self.get_session() as session:
-            stmt = select(ContractorTable.service, ContractorTable.service_price)
+            stmt = select(StatsServiceTable.service, func.max(StatsServiceTable.service_price)).group_by(StatsServiceTable.service)
             results = session.exec(stmt).all()
             return {service: price for service, price in results}
 
-    def get_top_5_prestations(self):
+    def get_top_5_prestations(self, days: Optional[int] = None):
+        """Top 5 des prestations par nombre de rendez-vous, sur les `days` derniers jours si précisé."""
+        total = func.sum(StatsDailyServiceTable.appointments_count).label("total")
         with self.get_session() as session:
-    
-            stmt_appointments = select(AppointmentTable.contractor_id)
-            stmt_medical = select(MedicalAppointmentTable.contractor_id)
-
-            contractor_ids = session.exec(stmt_appointments).all()
-            contractor_ids += session.exec(stmt_medical).all()
-
-            stmt_services = select(ContractorTable.contractor_id, ContractorTable.service)
-            contractor_services = session.exec(stmt_services).all()
-
-            id_to_service = {cid: service for cid, service in contractor_services}
-
-            counted_services = Counter(
-                id_to_service[contractor_id]
-                for contractor_id in contractor_ids
-                if contractor_id in id_to_service
+            stmt = select(StatsDailyServiceTable.service, total)
+            if days:
+                stmt = stmt.where(StatsDailyServiceTable.day >= datetime.now(timezone.utc).date() - timedelta(days=days - 1))
+            stmt = (
+                stmt.group_by(StatsDailyServiceTable.service)
+                .order_by(total.desc())
+                .limit(5)
             )
-
-            top5 = counted_services.most_common(5)
-            return [{"service": name, "total": total} for name, total in top5]
\ No newline at end of file
+            results = session.exec(stmt).all()
+            return [{"service": name, "total": int(total)} for name, total in results]
@@ -2,13 +2,20 @@
 from .base_queries import BaseQuery
 from sqlmodel import select, func
 from models.database.companies_model import CompanyTable
-from models.database.company_subscriptions_model import CompanySubscription
-from models.database.estimates_model import Estimate
-from models.database.packs_model import Pack
-from collections import defaultdict, Counter
-from datetime import datetime
+from models.database.stats_rollups_model import StatsDailyPackTable, StatsDailyCompanyTable, StatsPackSubscriptionTable
+from datetime import date, datetime
 
 
+CLIENT_TYPES = ("Starter", "Basic", "Premium")
+
+
+def year_range(year: int):
+    # Bornes [1er janvier, 1er janvier suivant) : la comparaison directe sur la date
+    # reste utilisable par l'index, contrairement à EXTRACT(YEAR ...).
+    return date(year, 1, 1), date(year + 1, 1, 1)
+
+
+# Les agrégats sont lus dans les tables stats_*, tenues à jour par StatsRollupQuery.refresh.
 class StatsQuery(BaseQuery):
 
     def get_top_clients_by_revenue(self):
@@ -20,51 +27,34 @@ class StatsQuery(BaseQuery):
     def get_client_type_distribution(self):
         with self.get_session() as session:
             stmt = (
-                select(Pack.name)
-                .join(CompanySubscription, CompanySubscription.pack_id == Pack.pack_id)
+                select(StatsPackSubscriptionTable.pack_name, func.sum(StatsPackSubscriptionTable.subscriptions_count))
+                .where(StatsPackSubscriptionTable.pack_name.in_(CLIENT_TYPES))
+                .group_by(StatsPackSubscriptionTable.pack_name)
             )
-            results = session.exec(stmt).all()
-            count = Counter(results)
-            return {
-                "Starter": count.get("Starter", 0),
-                "Basic": count.get("Basic", 0),
-                "Premium": count.get("Premium", 0)
-            }
+            count = dict(session.exec(stmt).all())
+            return {name: int(count.get(name) or 0) for name in CLIENT_TYPES}
 
     def get_tariff_by_type(self):
-        current_year = datetime.now().year
+        start, end = year_range(datetime.now().year)
         with self.get_session() as session:
             stmt = (
-                select(Pack.name, Estimate.amount)
-                .join(CompanySubscription, CompanySubscription.pack_id == Pack.pack_id)
-                .join(Estimate, Estimate.company_subscription_id == CompanySubscription.company_subscription_id)
-                .where(func.extract("year", Estimate.creation_date) == current_year)
+                select(StatsDailyPackTable.pack_name, func.sum(StatsDailyPackTable.estimates_amount))
+                .where(StatsDailyPackTable.day >= start, StatsDailyPackTable.day < end)
+                .group_by(StatsDailyPackTable.pack_name)
             )
             results = session.exec(stmt).all()
-
-            data = defaultdict(list)
-            for pack_name, amount in results:
-                data[pack_name].append(amount)
-
-            return {
-                k: round(sum(v), 2) if v else 0
-                for k, v in data.items()
-            }
+            return {name: round(total, 2) if total else 0 for name, total in results}
 
     def get_top_clients_pie(self):
-        current_year = datetime.now().year
+        start, end = year_range(datetime.now().year)
+        total = func.sum(StatsDailyCompanyTable.estimates_amount).label("total")
         with self.get_session() as session:
             stmt = (
-                select(CompanyTable.name, Estimate.amount)
-                .join(CompanySubscription, CompanySubscription.company_id == CompanyTable.company_id)
-                .join(Estimate, Estimate.company_subscription_id == CompanySubscription.company_subscription_id)
-                .where(func.extract("year", Estimate.creation_date) == current_year)
+                select(StatsDailyCompanyTable.company_name, total)
+                .where(StatsDailyCompanyTable.day >= start, StatsDailyCompanyTable.day < end)
+                .group_by(StatsDailyCompanyTable.company_id, StatsDailyCompanyTable.company_name)
+                .order_by(total.desc())
+                .limit(5)
             )
             results = session.exec(stmt).all()
-
-            total_by_client = defaultdict(float)
-            for name, amount in results:
-                total_by_client[name] += amount
-
-            top_5 = sorted(total_by_client.items(), key=lambda x: x[1], reverse=True)[:5]
-            return [{"name": name, "total": total} for name, total in top_5]
\ No newline at end of file
+            return [{"name": name, "total": float(total)} for name, total in results]
@@ -0,0 +1,158 @@
+# stats_rollup_queries.py
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import and_, delete, insert, union_all
+from sqlmodel import select, func
+from .base_queries import BaseQuery
+from models.database.companies_model import CompanyTable
+from models.database.company_subscriptions_model import CompanySubscription
+from models.database.estimates_model import Estimate
+from models.database.packs_model import Pack
+from models.database.contractors_model import ContractorTable
+from models.database.appointments_model import AppointmentTable
+from models.database.medical_appointments_model import MedicalAppointmentTable
+from models.database.stats_rollups_model import (
+    StatsDailyPackTable,
+    StatsDailyCompanyTable,
+    StatsDailyServiceTable,
+    StatsServiceTable,
+    StatsPackSubscriptionTable,
+    StatsWatermarkTable,
+)
+
+
+# Les lignes plus récentes que ce délai ne sont pas encore agrégées : une transaction
+# encore ouverte peut insérer une ligne datée de quelques secondes avant sa validation.
+REFRESH_LAG = timedelta(seconds=int(os.environ.get("STATS_REFRESH_LAG", 60)))
+
+_refresh_lock = threading.Lock()
+
+
+def _day_start(value: datetime) -> datetime:
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _window(column, start, end):
+    return [column >= start, column <= end] if start else [column <= end]
+
+
+class StatsRollupQuery(BaseQuery):
+    """Alimente les tables stats_* lues par les routes /stats_client et /stats_prestations."""
+
+    def refresh(self, full: bool = False):
+        """
+        Met à jour les tables d'agrégats.
+        En mode incrémental, seuls les jours contenant des lignes créées depuis le dernier
+        watermark sont recalculés ; `full` reconstruit tout (utile après des suppressions).
+        """
+        upper = datetime.now(timezone.utc) - REFRESH_LAG
+        with _refresh_lock, self.get_session() as session:
+            self._refresh_daily(session, "estimates", self._first_estimate_change, self._rebuild_estimate_days, upper, full)
+            self._refresh_daily(session, "appointments", self._first_appointment_change, self._rebuild_service_days, upper, full)
+            self._rebuild_catalogues(session)
+            session.commit()
+
+    def _refresh_daily(self, session, source, first_change, rebuild, upper, full):
+        mark = session.get(StatsWatermarkTable, source)
+        start = None
+        if mark is not None and not full:
+            first = first_change(session, mark.last_value, upper)
+            if first is None:
+                mark.last_value = upper
+                return
+            start = _day_start(first)
+
+        rebuild(session, start, upper)
+
+        if mark is None:
+            session.add(StatsWatermarkTable(source=source, last_value=upper))
+        else:
+            mark.last_value = upper
+
+    # --- Devis : jour x pack et jour x entreprise ---
+    def _first_estimate_change(self, session, since, upper):
+        stmt = select(func.min(Estimate.creation_date)).where(Estimate.creation_date > since, Estimate.creation_date <= upper)
+        return session.exec(stmt).one()
+
+    def _rebuild_estimate_days(self, session, start, upper):
+        day = func.date(Estimate.creation_date)
+        window = _window(Estimate.creation_date, start, upper)
+
+        for table in (StatsDailyPackTable, StatsDailyCompanyTable):
+            stmt = delete(table)
+            if start:
+                stmt = stmt.where(table.day >= start.date())
+            session.execute(stmt)
+
+        session.execute(insert(StatsDailyPackTable).from_select(
+            ["day", "pack_id", "pack_name", "estimates_count", "estimates_amount"],
+            select(day, Pack.pack_id, Pack.name, func.count(), func.sum(Estimate.amount))
+            .select_from(Estimate)
+            .join(CompanySubscription, and_(
+                CompanySubscription.company_id == Estimate.company_id,
+                CompanySubscription.company_subscription_id == Estimate.company_subscription_id
+            ))
+            .join(Pack, Pack.pack_id == CompanySubscription.pack_id)
+            .where(*window)
+            .group_by(day, Pack.pack_id, Pack.name)
+        ))
+
+        session.execute(insert(StatsDailyCompanyTable).from_select(
+            ["day", "company_id", "company_name", "estimates_count", "estimates_amount"],
+            select(day, CompanyTable.company_id, CompanyTable.name, func.count(), func.sum(Estimate.amount))
+            .select_from(Estimate)
+            .join(CompanyTable, CompanyTable.company_id == Estimate.company_id)
+            .where(*window)
+            .group_by(day, CompanyTable.company_id, CompanyTable.name)
+        ))
+
+    # --- Rendez-vous : jour x prestation ---
+    def _first_appointment_change(self, session, since, upper):
+        firsts = [
+            session.exec(select(func.min(column)).where(column > since, column <= upper)).one()
+            for column in (AppointmentTable.creation_date, MedicalAppointmentTable.creation_date)
+        ]
+        firsts = [first for first in firsts if first is not None]
+        return min(firsts) if firsts else None
+
+    def _rebuild_service_days(self, session, start, upper):
+        stmt = delete(StatsDailyServiceTable)
+        if start:
+            stmt = stmt.where(StatsDailyServiceTable.day >= start.date())
+        session.execute(stmt)
+
+        booked = union_all(
+            select(AppointmentTable.contractor_id, AppointmentTable.creation_date)
+            .where(*_window(AppointmentTable.creation_date, start, upper)),
+            select(MedicalAppointmentTable.contractor_id, MedicalAppointmentTable.creation_date)
+            .where(*_window(MedicalAppointmentTable.creation_date, start, upper)),
+        ).subquery()
+        day = func.date(booked.c.creation_date)
+
+        session.execute(insert(StatsDailyServiceTable).from_select(
+            ["day", "service", "appointments_count"],
+            select(day, ContractorTable.service, func.count())
+            .select_from(booked)
+            .join(ContractorTable, ContractorTable.contractor_id == booked.c.contractor_id)
+            .group_by(day, ContractorTable.service)
+        ))
+
+    # --- Catalogues sans date de modification, petits : reconstruits à chaque passage ---
+    def _rebuild_catalogues(self, session):
+        session.execute(delete(StatsServiceTable))
+        session.execute(insert(StatsServiceTable).from_select(
+            ["service", "type", "intervention", "contractor_count", "service_price"],
+            select(
+                ContractorTable.service, ContractorTable.type, ContractorTable.intervention,
+                func.count(), func.max(ContractorTable.service_price)
+            ).group_by(ContractorTable.service, ContractorTable.type, ContractorTable.intervention)
+        ))
+
+        session.execute(delete(StatsPackSubscriptionTable))
+        session.execute(insert(StatsPackSubscriptionTable).from_select(
+            ["pack_id", "pack_name", "subscriptions_count"],
+            select(Pack.pack_id, Pack.name, func.count())
+            .join(CompanySubscription, CompanySubscription.pack_id == Pack.pack_id)
+            .group_by(Pack.pack_id, Pack.name)
+        ))
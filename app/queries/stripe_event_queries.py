@@ -0,0 +1,102 @@
+from datetime import datetime, timezone
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select, func
+from .base_queries import BaseQuery
+from models.database.stripe_events_model import StripeEventTable
+
+
+class StripeEventQuery(BaseQuery):
+
+    def record_event(self, event_id: str, event_type: str, payload: str, status: str = "PENDING") -> bool:
+        """Enregistre un événement reçu ; False s'il l'a déjà été (Stripe renvoie parfois le même événement)."""
+        now = datetime.now(timezone.utc)
+        with self.get_session() as session:
+            session.add(StripeEventTable(
+                event_id=event_id,
+                type=event_type,
+                payload=payload,
+                status=status,
+                next_attempt_at=now,
+                received_at=now,
+                processed_at=now if status != "PENDING" else None
+            ))
+            try:
+                session.commit()
+            except IntegrityError:
+                session.rollback()
+                return False
+            return True
+
+    def claim_due(self, limit: int, retry_delay, event_id: str = None) -> list:
+        """
+        Réserve des événements à traiter, comme EmailOutboxQuery.claim_due : la reprise est planifiée d'avance.
+        event_id limite la réservation à cet événement (rejeu manuel).
+        """
+        now = datetime.now(timezone.utc)
+        with self.get_session() as session:
+            stmt = (
+                select(StripeEventTable)
+                .where(StripeEventTable.status == "PENDING", StripeEventTable.next_attempt_at <= now)
+                .order_by(StripeEventTable.received_at)
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+            )
+            if event_id:
+                stmt = stmt.where(StripeEventTable.event_id == event_id)
+            events = session.exec(stmt).all()
+            claimed = []
+            for event in events:
+                event.attempts += 1
+                event.next_attempt_at = now + retry_delay(event.attempts)
+                claimed.append(event.model_dump())
+            session.commit()
+            return claimed
+
+    def mark_processed(self, event_id: str):
+        with self.get_session() as session:
+            event = session.get(StripeEventTable, event_id)
+            if event:
+                event.status = "PROCESSED"
+                event.last_error = None
+                event.processed_at = datetime.now(timezone.utc)
+                session.commit()
+
+    def mark_error(self, event_id: str, error: str, failed: bool):
+        with self.get_session() as session:
+            event = session.get(StripeEventTable, event_id)
+            if event:
+                event.last_error = error
+                if failed:
+                    event.status = "FAILED"
+                    event.processed_at = datetime.now(timezone.utc)
+                session.commit()
+
+    def requeue(self, event_id: str):
+        """Remet un événement en file, quel que soit son statut (rejeu manuel)."""
+        with self.get_session() as session:
+            event = session.get(StripeEventTable, event_id)
+            if not event:
+                return None
+            event.status = "PENDING"
+            event.attempts = 0
+            event.next_attempt_at = datetime.now(timezone.utc)
+            event.processed_at = None
+            session.commit()
+            session.refresh(event)
+            return event
+
+    def read_event(self, event_id: str):
+        with self.get_session() as session:
+            return session.get(StripeEventTable, event_id)
+
+    def read_events(self, status: str = None, limit: int = 100):
+        with self.get_session() as session:
+            stmt = select(StripeEventTable).order_by(StripeEventTable.received_at.desc()).limit(limit)
+            if status:
+                stmt = stmt.where(StripeEventTable.status == status)
+            return session.exec(stmt).all()
+
+    def count_by_status(self) -> dict:
+        with self.get_session() as session:
+            stmt = select(StripeEventTable.status, func.count()).group_by(StripeEventTable.status)
+            return {status: count for status, count in session.exec(stmt).all()}
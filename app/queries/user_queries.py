@@ -1,6 +1,6 @@
 from datetime import datetime, timezone
 
-from sqlmodel import select, asc
+from sqlmodel import select, asc, update
 from pydantic import EmailStr
 from .base_queries import BaseQuery
 from models.database.users_model import UserTable
@@ -12,7 +12,9 @@ from models.database.sessions_model import SessionTable
 from models.local.user import UserSchema
 from models.local.session import SessionSchema
 from models.local.user import UserUpdateSchema
+from models.local.user import CollaboratorSchema, CompanySchema, ContractorSchema
 from service.logging import logging
+from service.cache import invalidate_session, invalidate_user_sessions
 from fastapi import HTTPException
 from models.database.verifications_model import VerificationTable
 
@@ -84,39 +86,58 @@ class UserQuery(BaseQuery):
             session.refresh(new_session)
             return new_session
 
-    def read_user_function(self, uuid: str):
+    def read_user_with_function(self, *where) -> tuple[UserSchema, str, object] | None:
+        # Une seule requête : l'utilisateur et sa ligne de rôle (LEFT JOIN sur les 4 tables de rôle)
         with self.get_session() as session:
+            stmt = (
+                select(UserTable, CollaboratorTable, CompanyTable, ContractorTable, AdministratorTable)
+                .outerjoin(CollaboratorTable, CollaboratorTable.collaborator_id == UserTable.user_id)
+                .outerjoin(CompanyTable, CompanyTable.company_id == UserTable.user_id)
+                .outerjoin(ContractorTable, ContractorTable.contractor_id == UserTable.user_id)
+                .outerjoin(AdministratorTable, AdministratorTable.admin_id == UserTable.user_id)
+                .where(*where)
+            )
+            result = session.execute(stmt).one_or_none()
 
-            stmt = select(CollaboratorTable).where(CollaboratorTable.collaborator_id == uuid)
-            collaborator = session.execute(stmt).scalar_one_or_none()
-            if collaborator:
-                return "collaborator"
+        if result is None:
+            return None
 
-            stmt = select(CompanyTable).where(CompanyTable.company_id == uuid)
-            company = session.execute(stmt).scalar_one_or_none()
-            if company:
-                return "company"
+        user, collaborator, company, contractor, admin = result
 
-            stmt = select(ContractorTable).where(ContractorTable.contractor_id == uuid)
-            contractor = session.execute(stmt).scalar_one_or_none()
-            if contractor:
-                return "contractor"
+        if collaborator:
+            function, data = "collaborator", CollaboratorSchema.from_orm({**user.__dict__, **collaborator.__dict__})
+        elif company:
+            function, data = "company", CompanySchema.from_orm({**user.__dict__, **company.__dict__})
+        elif contractor:
+            function, data = "contractor", ContractorSchema(**{**user.__dict__, **contractor.__dict__})
+        elif admin:
+            function, data = "administrator", None
+        else:
+            logger.warning("No function found for user with id : %s", user.user_id)
+            function, data = None, None
 
-            stmt = select(AdministratorTable).where(AdministratorTable.admin_id == uuid)
-            admin = session.execute(stmt).scalar_one_or_none()
-            if admin:
-                return "administrator"
+        return UserSchema.from_orm(user), function, data
 
+    def read_user_with_function_by_email(self, email: EmailStr):
+        return self.read_user_with_function(UserTable.email == email)
+
+    def read_user_function(self, uuid: str):
+        res = self.read_user_with_function(UserTable.user_id == uuid)
+        if res is None:
             logger.warning("No function found for user with id : %s", uuid)
+            return None
+        return res[1]
 
-    def update_expired_token(self):
+    def update_expired_token(self) -> int:
         with self.get_session() as session:
-            stmt = select(SessionTable).where(SessionTable.exp_date < datetime.now())
-            user_sessions = session.execute(stmt).scalars().all()
-            for user_session in user_sessions:
-                user_session.revoked = True
-                session.add(user_session)
-                session.commit()
+            stmt = (
+                update(SessionTable)
+                .where(SessionTable.exp_date < datetime.now(timezone.utc), SessionTable.revoked == False)
+                .values(revoked=True)
+            )
+            result = session.execute(stmt)
+            session.commit()
+            return result.rowcount
 
     def update_user_session_by_session_id(self, session_id: str) -> bool:
         with self.get_session() as session:
@@ -126,6 +147,8 @@ class UserQuery(BaseQuery):
                 res.revoked = True
                 session.add(res)
                 session.commit()
+                # Après le commit : une lecture concurrente ne peut plus remettre la session non révoquée en cache
+                invalidate_session(session_id)
                 return True
             return False
         
@@ -140,6 +163,7 @@ class UserQuery(BaseQuery):
               setattr(db_obj, field, value)
 
           session.commit()
+          invalidate_user_sessions(user_id)
           session.refresh(db_obj)
           return UserSchema.model_validate(db_obj)
           return False
@@ -184,6 +208,7 @@ class UserQuery(BaseQuery):
         with self.get_session() as session:
             session.add(user)
             session.commit()
+            invalidate_user_sessions(uuid)
             session.refresh(user)
 
         return True
@@ -204,6 +229,7 @@ class UserQuery(BaseQuery):
                 session.commit()
                 session.refresh(se)
 
+        invalidate_user_sessions(uuid)
         return True
 
     def update_verified_by_user_id(self, uuid: str) -> bool:
@@ -217,6 +243,7 @@ class UserQuery(BaseQuery):
 
             user.verified = True
             session.commit()
+        invalidate_user_sessions(uuid)
         return True
 
     def read_user_vrification_by_user_id(self, uuid: str):
@@ -269,4 +296,5 @@ class UserQuery(BaseQuery):
                     logging.info('invalid param key')
 
             session.commit()
+        invalidate_user_sessions(uuid)
         return True
@@ -1,6 +1,6 @@
 # routes/admin_routes.py
-from fastapi import APIRouter, Header , Body ,Depends, HTTPException
-from typing import List
+from fastapi import APIRouter, Header , Body ,Depends, HTTPException, Query, Response
+from typing import List, Optional
 from models.api.company_api import CompanyResponse
 from queries.admin_queries import AdminQuery
 from service.admin import AdminCompanyService
@@ -43,13 +43,26 @@ from models.local.event import EventCreate, EventResponse
 from service.admin import AdminEventService
 from queries.admin_queries import AdminQuery
 from service.admin import Admin
+from queries.stripe_event_queries import StripeEventQuery
+from service.stripe_events import replay_event
+from models.api.filter import (
+    AdminCompanyFilter, AdminCollaboratorFilter, AdminEstimateFilter, AdminBillFilter,
+    AdminTicketFilter, AdminContractorFilter, AdminNgoFilter,
+)
+
+
+def _page(response: Response, page):
+    # Listes paginées par curseur (queries/keyset.py) : page suivante via ?after=<X-Next-Cursor>
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return page.rows
 
 
 router = APIRouter()
 
 @router.get("/companies", response_model=List[CompanyAdminResponse])
-def get_all_companies(service: AdminCompanyService = Depends()):
-    return service.get_all_companies()
+def get_all_companies(response: Response, filter: AdminCompanyFilter = Depends(), service: AdminCompanyService = Depends()):
+    return _page(response, service.get_all_companies(filter))
 
 @router.put("/companies/{company_id}", response_model=CompanyAdminResponse)
 def update_company(company_id: str, company: CompanyUpdate, service: AdminCompanyService = Depends()):
@@ -62,10 +75,10 @@ def delete_company(company_id: str, service: AdminCompanyService = Depends()):
 
 
 @router.get("/collaborators", response_model=List[CollaboratorWithCompanyResponse])
-def get_all_collaborators(token: str = Header(...)):
+def get_all_collaborators(response: Response, filter: AdminCollaboratorFilter = Depends(), token: str = Header(...)):
     query = AdminQuery()
     service = AdminCollaboratorService(query, token)
-    return service()
+    return _page(response, service(filter))
 
 
 @router.put("/collaborators/{collaborator_id}", response_model=CollaboratorWithCompanyResponse)
@@ -88,10 +101,10 @@ def delete_collaborator(collaborator_id: str, token: str = Header(...)):
 
 
 @router.get("/estimates", response_model=List[EstimateAdminResponse])
-def get_all_estimates(token: str = Header("token")):
+def get_all_estimates(response: Response, filter: AdminEstimateFilter = Depends(), token: str = Header("token")):
     query = AdminQuery()
     service = AdminEstimateService(query, token)
-    return service()
+    return _page(response, service(filter))
 
 
 @router.get("/contracts", response_model=List[ContractAdminResponse])
@@ -103,10 +116,10 @@ def get_all_contracts(token: str = Header("token")):
 
 
 @router.get("/bills", response_model=List[BillAdminResponse])
-def get_all_bills(token: str = Header("token")):
+def get_all_bills(response: Response, filter: AdminBillFilter = Depends(), token: str = Header("token")):
     query = AdminQuery()
     service = AdminBillService(query, token)
-    return service()
+    return _page(response, service(filter))
 
 
 @router.get("/forum/categories", response_model=List[CategorySchema])
@@ -199,10 +212,10 @@ def delete_contract(company_id: str, subscription_id: str, token: str = Header(.
 
 
 @router.get("/tickets", response_model=List[TicketAdminResponse])
-def get_all_tickets(token: str = Header(...)):
+def get_all_tickets(response: Response, filter: AdminTicketFilter = Depends(), token: str = Header(...)):
     admin = Admin(AdminQuery(), token)
     service = AdminTicketService(AdminQuery())
-    return service.get_all_tickets()
+    return _page(response, service.get_all_tickets(filter))
 
 
 @router.delete("/tickets/{ticket_id}")
@@ -240,17 +253,16 @@ def reply_to_ticket(ticket_id: str, data: dict = Body(...), token: str = Header(
 
 
 @router.get("/contractors", response_model=List[ContractorAdminResponse])
-def get_all_contractors(token: str = Header(...)):
+def get_all_contractors(response: Response, filter: AdminContractorFilter = Depends(), token: str = Header(...)):
     admin = Admin(AdminQuery(), token)
     service = AdminContractorService(AdminQuery())
-    return service.get_all_contractors()
+    return _page(response, service.get_all_contractors(filter))
 
 @router.get("/ngos", response_model=list[NgoAdminResponse])
-def get_all_ngos(token: str = Header(...)):
+def get_all_ngos(response: Response, filter: AdminNgoFilter = Depends(), token: str = Header(...)):
     admin = Admin(AdminQuery(), token) 
     service = AdminNgoService(AdminQuery())
-    ngos = service.get_all_ngos()
-    return ngos
+    return _page(response, service.get_all_ngos(filter))
 
 
 @router.post("/ngos")
@@ -331,4 +343,23 @@ def close_ticket(ticket_id: str):
     except HTTPException as e:
         raise e
     except Exception:
-        raise HTTPException(status_code=500, detail="Erreur serveur")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Erreur serveur")
+
+# --- Événements Stripe (voir service/stripe_events.py) ---
+def _stripe_event_summary(event):
+    return event.model_dump(exclude={"payload"})
+
+
+@router.get("/stripe-events")
+def get_stripe_events(status: Optional[str] = None, limit: int = Query(100, ge=1, le=1000), token: str = Header(...)):
+    Admin(AdminQuery(), token)
+    return [_stripe_event_summary(event) for event in StripeEventQuery().read_events(status, limit)]
+
+
+@router.post("/stripe-events/{event_id}/replay")
+def replay_stripe_event(event_id: str, token: str = Header(...)):
+    Admin(AdminQuery(), token)
+    event = replay_event(event_id)
+    if event is None:
+        raise HTTPException(status_code=404, detail="Événement introuvable")
+    return _stripe_event_summary(event)
@@ -1,49 +1,136 @@
 # routes/chatbot.py
+import json
 import os
-import httpx
 from fastapi import APIRouter, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from dotenv import load_dotenv
 from queries.ChatbotUsageQuery import ChatbotQuery
+from service.http_client import get_http_client
+from service.chatbot_cache import chatbot_response_cache
 
 load_dotenv()
 router = APIRouter()
 
+OPENROUTER_URL = os.getenv("OPENROUTER_URL", "https://openrouter.ai/api/v1/chat/completions")
+CHATBOT_MODEL = "openai/gpt-3.5-turbo"
+
+
 class ChatRequest(BaseModel):
     message: str
     collaborator_id: str
+    stream: bool = False
+
+
+def _upstream_request(message: str, stream: bool = False) -> dict:
+    payload = {
+        "model": CHATBOT_MODEL,
+        "messages": [{"role": "user", "content": message}]
+    }
+    if stream:
+        payload["stream"] = True
+    return {
+        "headers": {
+            "Authorization": f"Bearer {os.getenv('OPENROUTER_API_KEY')}",
+            "Content-Type": "application/json",
+            "HTTP-Referer": "https://care-connect.ovh",
+            "X-Title": "BusinessCareBot"
+        },
+        "json": payload
+    }
+
+
+def _sse(data: str) -> str:
+    return f"data: {data}\n\n"
+
+
+async def _replay_cached(response: str):
+    yield _sse(json.dumps({"token": response}))
+    yield _sse("[DONE]")
+
+
+async def _relay_tokens(upstream, message: str):
+    """Relaie en SSE les morceaux de réponse au fur et à mesure qu'ils arrivent d'OpenRouter."""
+    tokens = []
+    done = False
+    try:
+        # Le flux est lu jusqu'à la fin même après [DONE] : une réponse lue en entier laisse la
+        # connexion keep-alive au pool du client partagé, sinon elle est fermée.
+        async for line in upstream.aiter_lines():
+            if done or not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                done = True
+                continue
+            try:
+                chunk = json.loads(data)
+            except ValueError:
+                continue
+            choices = chunk.get("choices") or [{}]
+            token = (choices[0].get("delta") or {}).get("content")
+            if token:
+                tokens.append(token)
+                yield _sse(json.dumps({"token": token}))
+        if not done:
+            # Flux terminé sans [DONE] : réponse possiblement tronquée, pas mise en cache
+            tokens = None
+        if tokens:
+            chatbot_response_cache.set(message, "".join(tokens))
+        yield _sse("[DONE]")
+    finally:
+        await upstream.aclose()
+
 
 @router.post("/chat")
 async def chat(req: ChatRequest):
     query = ChatbotQuery()
 
-    limit = query.get_message_limit(req.collaborator_id)
+    # Les requêtes SQL sont synchrones : on les exécute hors de la boucle d'événements.
+    limit = await run_in_threadpool(query.get_message_limit, req.collaborator_id)
     if limit is None:
         raise HTTPException(status_code=400, detail="Abonnement introuvable.")
 
-    used = query.get_usage_count_this_month(req.collaborator_id)
+    used = await run_in_threadpool(query.get_usage_count_this_month, req.collaborator_id)
     if used >= limit:
         raise HTTPException(status_code=403, detail="Quota mensuel atteint.")
 
-    query.log_question(req.collaborator_id, req.message)
-
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            "https://openrouter.ai/api/v1/chat/completions",
-            headers={
-                "Authorization": f"Bearer {os.getenv('OPENROUTER_API_KEY')}",
-                "Content-Type": "application/json",
-                "HTTP-Referer": "https://care-connect.ovh",
-                "X-Title": "BusinessCareBot"
-            },
-            json={
-                "model": "openai/gpt-3.5-turbo",
-                "messages": [{"role": "user", "content": req.message}]
-            }
+    # Une réponse servie depuis le cache compte quand même dans le quota.
+    await run_in_threadpool(query.log_question, req.collaborator_id, req.message)
+
+    cached = chatbot_response_cache.get(req.message)
+    if cached is not None:
+        if req.stream:
+            return StreamingResponse(
+                _replay_cached(cached),
+                media_type="text/event-stream",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+            )
+        return {"response": cached}
+
+    client = get_http_client()
+
+    if req.stream:
+        upstream = await client.send(
+            client.build_request("POST", OPENROUTER_URL, **_upstream_request(req.message, stream=True)),
+            stream=True
         )
+        if upstream.status_code != 200:
+            await upstream.aclose()
+            raise HTTPException(status_code=500, detail="Erreur API OpenRouter")
+        return StreamingResponse(
+            _relay_tokens(upstream, req.message),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
+    response = await client.post(OPENROUTER_URL, **_upstream_request(req.message))
 
     if response.status_code != 200:
         raise HTTPException(status_code=500, detail="Erreur API OpenRouter")
 
     data = response.json()
-    return {"response": data["choices"][0]["message"]["content"]}
\ No newline at end of file
+    content = data["choices"][0]["message"]["content"]
+    chatbot_response_cache.set(req.message, content)
+    return {"response": content}
@@ -1,5 +1,5 @@
 import os
-from fastapi import APIRouter, HTTPException, Header, Depends, Query
+from fastapi import APIRouter, HTTPException, Header, Depends, Query, Request
 from sqlalchemy.orm import Session
 from service.collaborator import Collaborator
 from queries.collaborator_queries import CollaboratorQuery
@@ -9,6 +9,7 @@ from typing import Optional
 from datetime import datetime
 from pydantic import constr
 from starlette.responses import FileResponse
+from service.documents import document_response
 from models.api.user import CollaboratorResponse, UpdatePasswordRequest
 from models.api.ngo import NgoResponse
 from models.api.events import EventResponse
@@ -100,27 +101,16 @@ def book_medical_appointment(appointment_id: constr(min_length=36, max_length=36
 
 
 @router.get("/medical/bill/{medical_appointment_id}", response_class=FileResponse)
-def download_invoice(medical_appointment_id: constr(min_length=36, max_length=36), token: str = Header(...)):
+def download_invoice(medical_appointment_id: constr(min_length=36, max_length=36), request: Request, token: str = Header(...)):
     collaborator_queries = CollaboratorQuery()
     collaborator = Collaborator(collaborator_queries, token)
     medical_appointment = collaborator.query.read_medical_appointment_by_appointment_id(medical_appointment_id)
 
-    if medical_appointment is None:
+    if medical_appointment is None or medical_appointment.collaborator_id != collaborator.user_id:
         raise HTTPException(status_code=404, detail="Bill not found")
 
     file_name = medical_appointment.bill_file
-
-
-    file_path = f"/app/uploads/medical_bill/{file_name}"
-
-    if not os.path.exists(file_path):
-        raise HTTPException(status_code=404, detail="Invoice not found")
-
-    return FileResponse(
-        path=file_path,
-        media_type="application/pdf",
-        filename=f"{file_name}"
-    )
+    return document_response(request, collaborator, f"medical_bill/{file_name}", filename=file_name)
 
 
 @router.patch("/medical-appointment/note/{appointment_id}")
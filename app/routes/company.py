@@ -1,6 +1,6 @@
 from dataclasses import Field
 
-from fastapi import APIRouter, HTTPException, Header, Depends , File, UploadFile
+from fastapi import APIRouter, HTTPException, Header, Depends , File, UploadFile, Response
 from service.company import Company
 from models.api.user import CompanyResponse
 from models.local.user import CollaboratorSchema
@@ -270,9 +270,12 @@ def delete_estimate(company_id: str, subscription_id: str, token: str = Header(.
 
 
 @router.post("/estimates", response_model=EstimateCompanyResponse)
-def create_estimate(estimate_data: EstimateRequestSchema, token: str = Header(...)):
+def create_estimate(estimate_data: EstimateRequestSchema, response: Response, token: str = Header(...)):
     company = Company(CompanyQuery(), token)
-    return company.process_estimate_creation(estimate_data)
+    estimate, render_jobs = company.process_estimate_creation(estimate_data)
+    # Devis et contrat sont rendus en arrière-plan : suivi via /documents/jobs/{job_id}
+    response.headers["X-Render-Jobs"] = ",".join(render_jobs)
+    return estimate
 
 
 
@@ -340,12 +343,13 @@ def sign_contract_company(payload: dict, token: str = Header(...)):
     signature_base64 = payload.get("signature")
 
     company_service = Company(CompanyQuery(), token)
-    contrat_path = company_service.sign_by_company(company_id, subscription_id, signature_base64)
+    result = company_service.sign_by_company(company_id, subscription_id, signature_base64)
 
-    if not contrat_path:
+    if not result:
         raise HTTPException(404, "Contrat introuvable")
 
-    return {"message": "Contrat signé avec succès", "path": contrat_path}
+    contrat_path, render_job = result
+    return {"message": "Contrat signé avec succès", "path": contrat_path, "render_job": render_job}
 
 
 @router.post("/resiliate-contract")
@@ -6,16 +6,17 @@ from queries.contractor_queries import ContractorQueries
 from models.api.sign_in import ContractorSignInRequest
 from service.contractor import Contractor
 from service.collaborator import Collaborator
+from service import availability
 from queries.collaborator_queries import CollaboratorQuery
 from models.api.user import ContractorResponse, UpdatePasswordRequest
-from models.api.filter import MedicalContractorFilter
+from models.api.filter import MedicalContractorFilter, FreeSlotFilter
 from models.local.periode import PeriodeSchema
 from service.user import User
 from queries.user_queries import UserQuery
 from typing import Optional, List
 from datetime import datetime
 from pydantic import constr
-from models.api.appointment import BookMedicalAppointmentRequest
+from models.api.appointment import BookMedicalAppointmentRequest, FreeSlotResponse
 from models.api.login import LoginRequest
 import stripe
 from pydantic import constr
@@ -105,6 +106,12 @@ def get_medical_contractor(token: str = Header("token"), filter: MedicalContract
     return results
 
 
+@router.get("/medical/free-slots", response_model=list[FreeSlotResponse])
+def get_medical_free_slots(token: str = Header("token"), filter: FreeSlotFilter = Depends()):
+    Collaborator(CollaboratorQuery(), token)
+    return availability.earliest_free_slots(filter.start, filter.end, filter.service, filter.intervention, filter.limit)
+
+
 @router.get("/calendar/{contractor_id}", response_model=list[PeriodeSchema])
 def get_contractor_planning_by_id(
     contractor_id: str,
@@ -125,6 +132,16 @@ def get_contractor_planning_by_id(
         return results
 
 
+@router.get("/availability/{contractor_id}", response_model=list[PeriodeSchema])
+def get_contractor_free_slots(
+    contractor_id: str,
+    weekStart: str = Query(..., description="Date de début de la semaine au format YYYY-MM-DD."),
+    token: str = Header("token")
+):
+    User(UserQuery(), token)
+    return availability.free_slots(contractor_id, weekStart)
+
+
 @router.post("/book/medical-appointment")
 def book_medical_appointment(payload: BookMedicalAppointmentRequest, token: str = Header("token")):
     collaborator_queries = CollaboratorQuery()
@@ -0,0 +1,65 @@
+import asyncio
+import time
+from typing import Optional
+from fastapi import APIRouter, Header, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from queries.render_job_queries import RenderJobQuery
+from queries.user_queries import UserQuery
+from service.render_queue import wait_for_render
+from service.documents import document_response
+from service.user import User
+
+router = APIRouter()
+# Fichiers du dossier uploads, monté sur /uploads : remplace l'ancien StaticFiles non authentifié
+files_router = APIRouter()
+
+
+def _job_response(job):
+    return {
+        "job_id": job.job_id,
+        "kind": job.kind,
+        "file": job.file,
+        "status": job.status,
+        "error": job.error,
+        "created_at": job.created_at,
+        "finished_at": job.finished_at,
+    }
+
+
+@router.get("/jobs")
+async def get_render_job_by_file(file: str = Query(...), token: str = Header(...)):
+    user = await run_in_threadpool(User, UserQuery(), token)
+    job = await run_in_threadpool(RenderJobQuery().read_latest_job_by_file, file)
+    if not job or (job.owner_id != user.user_id and user.function != "administrator"):
+        raise HTTPException(status_code=404, detail="Rendu introuvable")
+    return _job_response(job)
+
+
+@router.get("/jobs/{job_id}")
+async def get_render_job(
+    job_id: str,
+    wait: Optional[float] = Query(0, ge=0, le=30, description="Attente maximale (s) de la fin du rendu"),
+    token: str = Header(...)
+):
+    user = await run_in_threadpool(User, UserQuery(), token)
+    query = RenderJobQuery()
+
+    job = await run_in_threadpool(query.read_job, job_id)
+    if not job or (job.owner_id != user.user_id and user.function != "administrator"):
+        raise HTTPException(status_code=404, detail="Rendu introuvable")
+
+    # Long-polling : la réponse part dès que le fichier est prêt (ou à l'expiration de `wait`)
+    deadline = time.monotonic() + wait
+    while job.status == "PENDING" and time.monotonic() < deadline:
+        remaining = deadline - time.monotonic()
+        if not await asyncio.to_thread(wait_for_render, job_id, remaining):
+            await asyncio.sleep(min(0.5, max(remaining, 0)))
+        job = await run_in_threadpool(query.read_job, job_id)
+
+    return _job_response(job)
+
+
+@files_router.api_route("/{path:path}", methods=["GET", "HEAD"])
+async def get_document(path: str, request: Request, token: str = Header(...)):
+    user = await run_in_threadpool(User, UserQuery(), token)
+    return await run_in_threadpool(document_response, request, user, path)
@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Header, HTTPException
+from datetime import datetime, timezone
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from sqlmodel import Session
 from queries import forum_queries
-from queries.base_queries import BaseQuery
+from queries.base_queries import get_db
 from queries.user_queries import UserQuery
 from service.user import User 
-from models.database.users_model import UserTable
 from models.local.forum import SubjectCreateSchema, SubjectSchema
 
 router = APIRouter(tags=["Forum"])
@@ -17,20 +19,17 @@ def get_user_from_token_header(token: str):
 
 # --- Categories ---
 @router.post("/categories")
-def create_category(title: str, token: str = Header(...)):
-    db = BaseQuery().get_session()
+def create_category(title: str, token: str = Header(...), db: Session = Depends(get_db)):
     user = get_user_from_token_header(token)
     return forum_queries.create_category(db, title)
 
 @router.get("/categories")
-def get_all_categories(token: str = Header(...)):
-    db = BaseQuery().get_session()
+def get_all_categories(token: str = Header(...), db: Session = Depends(get_db)):
     user = get_user_from_token_header(token)
     return forum_queries.get_categories(db)
 
 @router.get("/categories/{cat_id}")
-def get_category(cat_id: str, token: str = Header(...)):
-    db = BaseQuery().get_session()
+def get_category(cat_id: str, token: str = Header(...), db: Session = Depends(get_db)):
     user = get_user_from_token_header(token)
     category = forum_queries.get_category(db, cat_id)
     if not category:
@@ -38,8 +37,7 @@ def get_category(cat_id: str, token: str = Header(...)):
     return category
 
 @router.delete("/categories/{cat_id}")
-def delete_category(cat_id: str, token: str = Header(...)):
-    db = BaseQuery().get_session()
+def delete_category(cat_id: str, token: str = Header(...), db: Session = Depends(get_db)):
     user = get_user_from_token_header(token)
     if not forum_queries.delete_category(db, cat_id):
         raise HTTPException(status_code=404, detail="Category not found")
@@ -48,22 +46,19 @@ def delete_category(cat_id: str, token: str = Header(...)):
 
 # --- Subjects ---
 @router.post("/subjects", response_model=SubjectSchema)
-def create_subject(data: SubjectCreateSchema, token: str = Header(...)):
-    db = BaseQuery().get_session()
+def create_subject(data: SubjectCreateSchema, token: str = Header(...), db: Session = Depends(get_db)):
     user = get_user_from_token_header(token)
     data_dict = data.dict()
     data_dict['collaborator_id'] = user.user_id
     return forum_queries.create_subject(db, data_dict)
 
 @router.get("/categories/{cat_id}/subjects")
-def get_subjects_by_category(cat_id: str, token: str = Header(...)):
-    db = BaseQuery().get_session()
+def get_subjects_by_category(cat_id: str, token: str = Header(...), db: Session = Depends(get_db)):
     user = get_user_from_token_header(token)
     return forum_queries.get_subjects_by_category(db, cat_id)
 
 @router.get("/subjects/{subj_id}")
-def get_subject(subj_id: str, token: str = Header(...)):
-    db = BaseQuery().get_session()
+def get_subject(subj_id: str, token: str = Header(...), db: Session = Depends(get_db)):
     user = get_user_from_token_header(token)
     subject = forum_queries.get_subject(db, subj_id)
     if not subject:
@@ -71,8 +66,7 @@ def get_subject(subj_id: str, token: str = Header(...)):
     return subject
 
 @router.delete("/subjects/{subj_id}")
-def delete_subject(subj_id: str, token: str = Header(...)):
-    db = BaseQuery().get_session()
+def delete_subject(subj_id: str, token: str = Header(...), db: Session = Depends(get_db)):
     user = get_user_from_token_header(token)
     if not forum_queries.delete_subject(db, subj_id):
         raise HTTPException(status_code=404, detail="Subject not found")
@@ -81,36 +75,55 @@ def delete_subject(subj_id: str, token: str = Header(...)):
 
 # --- Posts ---
 @router.post("/posts")
-def create_post(data: dict, token: str = Header(...)):
-    db = BaseQuery().get_session()
+def create_post(data: dict, token: str = Header(...), db: Session = Depends(get_db)):
     user = get_user_from_token_header(token)
     data['collaborator_id'] = user.user_id  
     return forum_queries.create_post(db, data)
 
 @router.get("/subjects/{subj_id}/posts")
-def get_posts(subj_id: str, token: str = Header(...)):
-    db = BaseQuery().get_session()
+def get_posts(
+    subj_id: str,
+    response: Response,
+    after: Optional[str] = Query(None, description="Curseur <creation_date>,<post_id> du dernier post de la page précédente"),
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    token: str = Header(...),
+    db: Session = Depends(get_db)
+):
     user = get_user_from_token_header(token)
-    posts = forum_queries.get_posts_by_subject(db, subj_id)
+
+    cursor = None
+    if after:
+        try:
+            after_date, after_id = after.rsplit(",", 1)
+            after_date = datetime.fromisoformat(after_date)
+            if after_date.tzinfo is None:
+                after_date = after_date.replace(tzinfo=timezone.utc)
+            cursor = (after_date, after_id)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor, expected <creation_date>,<post_id>")
+
+    rows = forum_queries.get_posts_with_author_by_subject(db, subj_id, after=cursor, limit=limit)
 
     results = []
-    for post in posts:
-        collaborator = db.query(UserTable).filter(UserTable.user_id == post.collaborator_id).first()
+    for post, firstname, lastname in rows:
         results.append({
             "post_id": post.post_id,
             "text": post.text,
             "creation_date": post.creation_date,
             "subject_id": post.subject_id,
             "collaborator_id": post.collaborator_id,
-            "firstname": collaborator.firstname if collaborator else "",
-            "lastname": collaborator.lastname if collaborator else "",
+            "firstname": firstname or "",
+            "lastname": lastname or "",
         })
 
+    if limit and len(results) == limit:
+        last = results[-1]
+        response.headers["X-Next-Cursor"] = f"{last['creation_date'].isoformat()},{last['post_id']}"
+
     return results
 
 @router.delete("/posts/{post_id}")
-def delete_post(post_id: str, token: str = Header(...)):
-    db = BaseQuery().get_session()
+def delete_post(post_id: str, token: str = Header(...), db: Session = Depends(get_db)):
     user = get_user_from_token_header(token)
     if not forum_queries.delete_post(db, post_id):
         raise HTTPException(status_code=404, detail="Post not found")
@@ -119,21 +132,18 @@ def delete_post(post_id: str, token: str = Header(...)):
 
 # --- Reports ---
 @router.post("/reports")
-def create_report(data: dict, token: str = Header(...)):
-    db = BaseQuery().get_session()
+def create_report(data: dict, token: str = Header(...), db: Session = Depends(get_db)):
     user = get_user_from_token_header(token)
     data['collaborator_id'] = user.user_id
     return forum_queries.create_report(db, data)
 
 @router.get("/reports")
-def get_reports(token: str = Header(...)):
-    db = BaseQuery().get_session()
+def get_reports(token: str = Header(...), db: Session = Depends(get_db)):
     user = get_user_from_token_header(token)
     return forum_queries.get_reports(db)
 
 @router.delete("/reports/{report_id}")
-def delete_report(report_id: str, token: str = Header(...)):
-    db = BaseQuery().get_session()
+def delete_report(report_id: str, token: str = Header(...), db: Session = Depends(get_db)):
     user = get_user_from_token_header(token)
     if not forum_queries.delete_report(db, report_id):
         raise HTTPException(status_code=404, detail="Report not found")
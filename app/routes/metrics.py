@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Depends, Header
+from queries.admin_queries import AdminQuery
+from service.admin import Admin
+from queries.base_queries import get_pool_metrics, get_session_metrics
+from service.chatbot_cache import chatbot_response_cache
+from queries.email_outbox_queries import EmailOutboxQuery
+from queries.stripe_event_queries import StripeEventQuery
+
+
+def require_admin(token: str = Header(...)):
+    # Les métriques exposent l'état interne de l'API (pool, files d'attente, paiements) : administrateurs uniquement
+    Admin(AdminQuery(), token)
+
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+@router.get("/db-pool")
+def db_pool_metrics():
+    return get_pool_metrics()
+
+
+@router.get("/db-sessions")
+def db_session_metrics():
+    return get_session_metrics()
+
+
+@router.get("/chatbot-cache")
+def chatbot_cache_metrics():
+    return chatbot_response_cache.stats()
+
+
+@router.get("/email-outbox")
+def email_outbox_metrics():
+    return EmailOutboxQuery().count_by_status()
+
+
+@router.get("/stripe-events")
+def stripe_event_metrics():
+    return StripeEventQuery().count_by_status()
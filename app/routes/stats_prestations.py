@@ -1,5 +1,6 @@
 
-from fastapi import APIRouter
+from typing import Optional
+from fastapi import APIRouter, Query
 from queries.stats_prestations_queries import StatsPrestationQuery
 
 router = APIRouter()
@@ -20,6 +21,6 @@ def service_price():
     return query.get_service_price()
 
 @router.get("/top5-prestations")
-def top5_prestations():
+def top5_prestations(days: Optional[int] = Query(None, ge=1, le=3650, description="Fenêtre glissante en jours, aujourd'hui inclus")):
     query = StatsPrestationQuery()
-    return query.get_top_5_prestations() 
\ No newline at end of file
+    return query.get_top_5_prestations(days=days) 
\ No newline at end of file
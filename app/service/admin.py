@@ -5,6 +5,11 @@ from models.api.estimate import EstimateAdminResponse
 from models.api.contract import ContractAdminResponse
 from queries.admin_queries import AdminQuery
 from models.api.bill import BillAdminResponse
+from models.api.filter import (
+    AdminCompanyFilter, AdminCollaboratorFilter, AdminEstimateFilter, AdminBillFilter,
+    AdminTicketFilter, AdminContractorFilter, AdminNgoFilter,
+)
+from queries.keyset import Page
 from typing import List
 from models.local.forum import CategorySchema
 from models.local.forum import SubjectAdminResponse, SubjectCreateSchema
@@ -12,6 +17,7 @@ from models.database.subjects_model import Subject
 from models.api.company_api import  CompanyUpdate, CompanyAdminResponse
 from models.api.user import CollaboratorWithCompanyResponse
 from service.pdf_generator import PDFGenerator
+from service.signature_store import InvalidSignature, signature_ref, store_signature
 from datetime import datetime
 from queries.company_queries import CompanyQuery 
 from service.user import User
@@ -37,8 +43,8 @@ class AdminCompanyService:
     def __init__(self):
         self.query = AdminQuery()
 
-    def get_all_companies(self) -> List[CompanyAdminResponse]:
-        return self.query.get_all_companies()
+    def get_all_companies(self, filter: AdminCompanyFilter) -> Page:
+        return self.query.get_all_companies(filter)
 
     def update_company(self, company_id: str, data: CompanyUpdate) -> CompanyAdminResponse:
         return self.query.update_company(company_id, data)
@@ -54,8 +60,8 @@ class AdminCollaboratorService:
         self.query = query
         self.token = token
 
-    def __call__(self) -> List[CollaboratorWithCompanyResponse]:
-        return self.query.get_all()
+    def __call__(self, filter: AdminCollaboratorFilter) -> Page:
+        return self.query.get_all(filter)
     
     def update(self, collaborator_id: str, data: dict) -> CollaboratorWithCompanyResponse:
         return self.query.update_collaborator(collaborator_id, data)
@@ -68,8 +74,8 @@ class AdminEstimateService:
         self.query = query
         self.token = token
 
-    def __call__(self) -> List[EstimateAdminResponse]:
-        return self.query.get_all_estimates_with_company_name(self.token)
+    def __call__(self, filter: AdminEstimateFilter) -> Page:
+        return self.query.get_all_estimates_with_company_name(self.token, filter)
     
     def delete_estimate(self, subscription_id: str) -> bool:
         estimate = self.query.read_estimate_by_subscription_id(subscription_id)
@@ -83,8 +89,8 @@ class AdminBillService:
         self.query = query
         self.token = token
 
-    def __call__(self) -> List[BillAdminResponse]:
-        return self.query.get_all_bills_with_company_name(self.token)
+    def __call__(self, filter: AdminBillFilter) -> Page:
+        return self.query.get_all_bills_with_company_name(self.token, filter)
     @staticmethod
     def generate_bill_for_company(query, company_id, subscription_id):
      estimate = query.read_estimate(company_id, subscription_id)
@@ -97,16 +103,7 @@ class AdminBillService:
      if not company:
         raise HTTPException(404, "Entreprise introuvable")
 
-     facture_path = query.generate_facture_pdf(
-      company_name=company.name,
-      subscription_id=subscription_id,
-      pack=pack,  
-      total_ht=round(estimate.amount / 1.2, 2),
-      tva=round(estimate.amount - estimate.amount / 1.2, 2),
-      total_ttc=estimate.amount,
-      date_facture=datetime.utcnow()
-)
-
+     facture_path = PDFGenerator.document_path("bills", "facture", company.name, subscription_id)
 
      query.create_bill(BillSchema(
         company_id=company_id,
@@ -115,6 +112,18 @@ class AdminBillService:
         file=facture_path,
         payed=False
     ))
+
+     return query.schedule_facture_pdf(
+      company_name=company.name,
+      subscription_id=subscription_id,
+      pack=pack,  
+      total_ht=round(estimate.amount / 1.2, 2),
+      tva=round(estimate.amount - estimate.amount / 1.2, 2),
+      total_ttc=estimate.amount,
+      date_facture=datetime.utcnow(),
+      filepath=facture_path,
+      owner_id=company_id
+)
  
 
     def delete_bill(self, subscription_id: str) -> bool:
@@ -143,34 +152,36 @@ class AdminContractService:
      pack = self.query.get_pack_by_id(subscription.pack_id)
      company = self.query.read_company_by_id(company_id)
 
-     contrat_path = PDFGenerator.generate_contrat(
-            company_name=company.name,
-            subscription_id=subscription_id,
-            plan=pack.name,
-            employees=estimate.employees,
-            price_per_employee=pack.annual_collaborator_price,
-            consultation_nb=pack.default_consultation_number,
-            chatbot_msgs=pack.chatbot_messages_number or 0,
-            signature_date=datetime.utcnow(),
-            company_signature_base64=contract.company_signature,
-            admin_signature_base64=signature_base64
-        )
+     try:
+        admin_signature = store_signature(signature_base64) if signature_base64 else None
+        company_signature = signature_ref(contract.company_signature)
+     except InvalidSignature as e:
+        raise HTTPException(400, str(e))
+
+     contrat_path = PDFGenerator.document_path("contracts", "contrat", company.name, subscription_id)
 
       
      update_data = {
             "admin_signed": True,
-            "admin_signature": signature_base64,
+            "admin_signature": admin_signature,
+            "company_signature": company_signature,
             "file": contrat_path,
             "signature_date": datetime.utcnow()
         }
      self.query.update_contract(company_id, subscription_id, update_data)
 
+     contract_job = self.query.schedule_contract_pdf(
+            company.name, subscription_id, estimate.employees, pack, datetime.utcnow(), contrat_path,
+            owner_id=company_id,
+            company_signature=company_signature,
+            admin_signature=admin_signature
+        )
 
 
-     AdminBillService.generate_bill_for_company(self.query, company_id, subscription_id)
+     bill_job = AdminBillService.generate_bill_for_company(self.query, company_id, subscription_id)
 
 
-     return {"message": "Contrat signé par l'admin"}
+     return {"message": "Contrat signé par l'admin", "render_jobs": [contract_job, bill_job]}
 
     def delete_contract(self, company_id: str, subscription_id: str) -> bool:
      return AdminQuery().delete_contract(company_id, subscription_id)
@@ -218,8 +229,8 @@ class AdminTicketService:
     def __init__(self, query):
         self.query = query
 
-    def get_all_tickets(self):
-        return self.query.get_all_tickets()
+    def get_all_tickets(self, filter: AdminTicketFilter) -> Page:
+        return self.query.get_all_tickets(filter)
 
     def delete_ticket(self, ticket_id: str):
         return self.query.delete_ticket(ticket_id)
@@ -238,16 +249,16 @@ class AdminContractorService:
     def __init__(self, query):
         self.query = query
 
-    def get_all_contractors(self):
-        return self.query.get_all_contractors()
+    def get_all_contractors(self, filter: AdminContractorFilter) -> Page:
+        return self.query.get_all_contractors(filter)
     
 
 class AdminNgoService:
     def __init__(self, query):
         self.query = query
 
-    def get_all_ngos(self):
-        return self.query.get_all_ngos()
+    def get_all_ngos(self, filter: AdminNgoFilter) -> Page:
+        return self.query.get_all_ngos(filter)
 
     def create_ngo(self, ngo_data):
         return self.query.insert_ngo(ngo_data)
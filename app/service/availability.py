@@ -0,0 +1,200 @@
+import heapq
+import os
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+from fastapi import HTTPException
+from queries.availability_queries import AvailabilityQuery, APPOINTMENT_DURATION
+from service.cache import availability_cache
+from models.local.periode import PeriodeSchema
+
+# Disponibilités des prestataires. Les périodes occupées d'un prestataire (rendez-vous et
+# indisponibilités) sont chargées une fois sur une fenêtre glissante puis gardées en cache,
+# invalidé à chaque écriture (voir invalidate_contractor_availability).
+AVAILABILITY_HORIZON_DAYS = int(os.environ.get("AVAILABILITY_HORIZON_DAYS", 90))
+# Grille de réservation affichée par le front : créneaux de 30 min de 10 h à 19 h, heure de Paris
+AVAILABILITY_TIMEZONE = ZoneInfo(os.environ.get("AVAILABILITY_TIMEZONE", "Europe/Paris"))
+AVAILABILITY_DAY_START = int(os.environ.get("AVAILABILITY_DAY_START", 10))
+AVAILABILITY_DAY_END = int(os.environ.get("AVAILABILITY_DAY_END", 19))
+# Recherche groupée de créneaux : fenêtre par défaut et fenêtre maximale, en jours
+FREE_SLOTS_DEFAULT_DAYS = int(os.environ.get("FREE_SLOTS_DEFAULT_DAYS", 7))
+FREE_SLOTS_MAX_DAYS = int(os.environ.get("FREE_SLOTS_MAX_DAYS", 31))
+
+
+class IntervalIndex:
+    """
+    Intervalles [début, fin) triés. Les intervalles sont fusionnés en une suite disjointe, ce qui
+    ramène le test de chevauchement à une recherche dichotomique : O(log n).
+    Les périodes d'origine restent disponibles pour l'affichage du planning.
+    """
+
+    def __init__(self, periods):
+        self.periods = sorted(periods)
+        self._begins = [begin for begin, _ in self.periods]
+        self._longest = max((end - begin for begin, end in self.periods), default=timedelta(0))
+
+        starts, ends = [], []
+        for begin, end in self.periods:
+            if ends and begin <= ends[-1]:
+                ends[-1] = max(ends[-1], end)
+            else:
+                starts.append(begin)
+                ends.append(end)
+        self._starts = starts
+        self._ends = ends
+
+    def overlaps(self, begin: datetime, end: datetime) -> bool:
+        # Premier bloc qui se termine après `begin` : il chevauche [begin, end) s'il commence avant `end`
+        i = bisect_right(self._ends, begin)
+        return i < len(self._starts) and self._starts[i] < end
+
+    def periods_between(self, start: datetime, end: datetime) -> list:
+        lo = bisect_left(self._begins, start - self._longest)
+        hi = bisect_left(self._begins, end)
+        return [(b, e) for b, e in self.periods[lo:hi] if e > start]
+
+    def free_slots(self, grid: list, duration: timedelta = APPOINTMENT_DURATION):
+        """Parcours simultané de la grille (triée) et des blocs occupés : créneaux libres, dans l'ordre."""
+        i = bisect_right(self._ends, grid[0]) if grid else 0
+        for slot in grid:
+            while i < len(self._ends) and self._ends[i] <= slot:
+                i += 1
+            if i < len(self._starts) and self._starts[i] < slot + duration:
+                continue
+            yield slot
+
+
+class ContractorAvailability:
+    def __init__(self, window_start: datetime, window_end: datetime, index: IntervalIndex):
+        self.window_start = window_start
+        self.window_end = window_end
+        self.index = index
+
+    def covers(self, start: datetime, end: datetime) -> bool:
+        return self.window_start <= start and end <= self.window_end
+
+
+def _utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def get_index(contractor_id: str, start: datetime, end: datetime) -> IntervalIndex:
+    """Index des périodes occupées couvrant [start, end) ; fenêtre courante mise en cache."""
+    cached = availability_cache.get(contractor_id)
+    if cached is not None and cached.covers(start, end):
+        return cached.index
+
+    now = datetime.now(timezone.utc)
+    window_start = now.replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=7)
+    window_end = window_start + timedelta(days=AVAILABILITY_HORIZON_DAYS + 7)
+    if window_start <= start and end <= window_end:
+        generation = availability_cache.generation()
+        index = IntervalIndex(AvailabilityQuery().read_busy_periods(contractor_id, window_start, window_end))
+        availability_cache.set(contractor_id, ContractorAvailability(window_start, window_end, index), generation=generation)
+        return index
+
+    # Hors de la fenêtre courante (semaines passées ou lointaines) : lecture ponctuelle, non mise en cache
+    return IntervalIndex(AvailabilityQuery().read_busy_periods(contractor_id, start, end))
+
+
+def is_free(contractor_id: str, begin: datetime, end: datetime = None) -> bool:
+    begin = _utc(begin)
+    end = _utc(end) if end else begin + APPOINTMENT_DURATION
+    return not get_index(contractor_id, begin, end).overlaps(begin, end)
+
+
+def parse_week_start(week_start: str) -> datetime:
+    try:
+        return datetime.strptime(week_start, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid weekStart format, expected YYYY-MM-DD")
+
+
+def planning(contractor_id: str, week_start: str = None) -> list:
+    """Périodes occupées de la semaine demandée, ou toutes les périodes à venir sans semaine."""
+    if week_start:
+        start = parse_week_start(week_start)
+        end = start + timedelta(days=7)
+        periods = get_index(contractor_id, start, end).periods_between(start, end)
+    else:
+        now = datetime.now(timezone.utc)
+        periods = [(b, e) for b, e in sorted(AvailabilityQuery().read_busy_periods(contractor_id, now)) if b >= now]
+    return [PeriodeSchema(beginning=begin, end=end) for begin, end in periods]
+
+
+def slot_grid(start: datetime, end: datetime):
+    """Créneaux de réservation (heure locale AVAILABILITY_TIMEZONE) compris dans [start, end), en UTC."""
+    day = start.astimezone(AVAILABILITY_TIMEZONE).date()
+    last_day = end.astimezone(AVAILABILITY_TIMEZONE).date()
+    while day <= last_day:
+        slot = datetime(day.year, day.month, day.day, AVAILABILITY_DAY_START, tzinfo=AVAILABILITY_TIMEZONE)
+        closing = slot.replace(hour=AVAILABILITY_DAY_END)
+        while slot + APPOINTMENT_DURATION <= closing:
+            slot_utc = slot.astimezone(timezone.utc)
+            if start <= slot_utc and slot_utc + APPOINTMENT_DURATION <= end:
+                yield slot_utc
+            slot += APPOINTMENT_DURATION
+        day += timedelta(days=1)
+
+
+def free_slots(contractor_id: str, week_start: str) -> list:
+    """Créneaux libres de la semaine : un test O(log n) par créneau de la grille."""
+    start = parse_week_start(week_start)
+    end = start + timedelta(days=7)
+    now = datetime.now(timezone.utc)
+    index = get_index(contractor_id, start, end)
+    return [
+        PeriodeSchema(beginning=slot, end=slot + APPOINTMENT_DURATION)
+        for slot in slot_grid(max(start, now), end)
+        if not index.overlaps(slot, slot + APPOINTMENT_DURATION)
+    ]
+
+
+def earliest_free_slots(start: datetime = None, end: datetime = None, service: str = None, intervention: str = None, limit: int = 20) -> list:
+    """
+    Premiers créneaux libres de [start, end) parmi tous les prestataires médicaux correspondant aux
+    filtres. Deux lectures groupées (rendez-vous, indisponibilités), puis fusion k-voies par tas des
+    créneaux libres de chaque prestataire : on s'arrête dès `limit` créneaux trouvés.
+    """
+    now = datetime.now(timezone.utc)
+    start = max(_utc(start), now) if start else now
+    end = _utc(end) if end else start + timedelta(days=FREE_SLOTS_DEFAULT_DAYS)
+    if end <= start or end - start > timedelta(days=FREE_SLOTS_MAX_DAYS):
+        raise HTTPException(status_code=400, detail=f"Invalid window: end must be after start and within {FREE_SLOTS_MAX_DAYS} days")
+
+    query = AvailabilityQuery()
+    contractors = query.read_medical_contractors(service, intervention)
+    if not contractors:
+        return []
+
+    busy = query.read_busy_periods_by_contractor([contractor.contractor_id for contractor in contractors], start, end)
+    grid = list(slot_grid(start, end))
+
+    heap = []
+    streams = []
+    for position, contractor in enumerate(contractors):
+        stream = IntervalIndex(busy.get(contractor.contractor_id, [])).free_slots(grid)
+        streams.append(stream)
+        slot = next(stream, None)
+        if slot is not None:
+            heap.append((slot, position))
+    heapq.heapify(heap)
+
+    results = []
+    while heap and len(results) < limit:
+        slot, position = heapq.heappop(heap)
+        contractor = contractors[position]
+        results.append({
+            "contractor_id": contractor.contractor_id,
+            "firstname": contractor.firstname,
+            "lastname": contractor.lastname,
+            "service": contractor.service,
+            "service_price": contractor.service_price,
+            "intervention": contractor.intervention,
+            "beginning": slot,
+            "end": slot + APPOINTMENT_DURATION,
+        })
+        following = next(streams[position], None)
+        if following is not None:
+            heapq.heappush(heap, (following, position))
+    return results
@@ -0,0 +1,149 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    Cache LRU borné en taille, dont les entrées expirent après `ttl` secondes.
+
+    Les invalidations se font après le commit de l'écriture. Une lecture de la base commencée avant
+    ce commit peut encore rapporter l'ancienne valeur : l'appelant relève generation() avant de lire
+    et la passe à set(), qui ignore la valeur si une invalidation a eu lieu entre-temps.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def generation(self) -> int:
+        with self._lock:
+            return self._generation
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl: float = None, generation: int = None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return False
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+            return True
+
+    def set_field(self, key, name, value, generation: int = None):
+        """Ajoute `name` à l'entrée (dictionnaire) `key` sans modifier celle que d'autres threads lisent."""
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return False
+            item = self._data.get(key)
+            if item is None or item[0] < time.monotonic():
+                return False
+            expires_at, entry = item
+            self._data[key] = (expires_at, {**entry, name: value})
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            self._generation += 1
+            self._data.pop(key, None)
+
+    def delete_where(self, predicate):
+        with self._lock:
+            self._generation += 1
+            for key in [k for k, (_, v) in self._data.items() if predicate(k, v)]:
+                del self._data[key]
+
+    def values(self) -> list:
+        now = time.monotonic()
+        with self._lock:
+            return [value for expires_at, value in self._data.values() if expires_at >= now]
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+# session_id -> {"user_id", "session", "user", puis les données propres au rôle}
+session_cache = TTLCache(
+    maxsize=int(os.environ.get("SESSION_CACHE_SIZE", 10000)),
+    ttl=float(os.environ.get("SESSION_CACHE_TTL", 60)),
+)
+
+
+def invalidate_session(session_id: str):
+    session_cache.delete(session_id)
+
+
+def invalidate_user_sessions(user_id: str):
+    session_cache.delete_where(lambda _, entry: entry["user_id"] == user_id)
+
+
+# collaborator_id -> {"company_id", "company_subscription_id", "limit"} (quota chatbot du pack actif)
+message_limit_cache = TTLCache(
+    maxsize=int(os.environ.get("MESSAGE_LIMIT_CACHE_SIZE", 10000)),
+    ttl=float(os.environ.get("MESSAGE_LIMIT_CACHE_TTL", 300)),
+)
+
+
+def invalidate_company_message_limits(company_id: str):
+    message_limit_cache.delete_where(lambda _, entry: entry["company_id"] == company_id)
+
+
+# contractor_id -> ContractorAvailability (intervalles occupés, voir service/availability.py)
+availability_cache = TTLCache(
+    maxsize=int(os.environ.get("AVAILABILITY_CACHE_SIZE", 5000)),
+    ttl=float(os.environ.get("AVAILABILITY_CACHE_TTL", 300)),
+)
+
+
+def invalidate_contractor_availability(contractor_id: str):
+    availability_cache.delete(contractor_id)
+
+
+# company_id -> {"company_id", "payed_date", "active", "quota"} (dernière facture payée, abonnement et pack)
+consultation_quota_cache = TTLCache(
+    maxsize=int(os.environ.get("CONSULTATION_QUOTA_CACHE_SIZE", 5000)),
+    ttl=float(os.environ.get("CONSULTATION_QUOTA_CACHE_TTL", 300)),
+)
+
+# collaborator_id -> {"company_id", "period_start", "remaining"} (consultations offertes restantes)
+free_consultation_cache = TTLCache(
+    maxsize=int(os.environ.get("CONSULTATION_QUOTA_CACHE_SIZE", 5000)),
+    ttl=float(os.environ.get("CONSULTATION_QUOTA_CACHE_TTL", 300)),
+)
+
+
+def invalidate_company_consultation_quota(company_id: str):
+    consultation_quota_cache.delete(company_id)
+    free_consultation_cache.delete_where(lambda _, entry: entry["company_id"] == company_id)
+
+
+def invalidate_free_consultations(collaborator_id: str):
+    free_consultation_cache.delete(collaborator_id)
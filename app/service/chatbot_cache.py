@@ -0,0 +1,85 @@
+import os
+import re
+import threading
+import unicodedata
+from service.cache import TTLCache
+
+_WORD = re.compile(r"\w+")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Forme canonique d'une question : casse, accents composés, ponctuation et espaces ignorés."""
+    text = unicodedata.normalize("NFKC", prompt).casefold()
+    return " ".join(_WORD.findall(text))
+
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class ChatbotResponseCache:
+    """
+    Réponses du chatbot indexées par question normalisée.
+    Si `similarity` est > 0, une question absente du cache peut aussi réutiliser la réponse
+    d'une question proche (similarité de Jaccard entre ensembles de mots >= `similarity`).
+    """
+
+    def __init__(self, maxsize: int = 1000, ttl: float = 86400, similarity: float = 0):
+        self.similarity = similarity
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+
+    def get(self, prompt: str):
+        key = normalize_prompt(prompt)
+        entry = self._cache.get(key)
+        if entry is None and self.similarity > 0:
+            entry = self._closest(frozenset(key.split()))
+            if entry is not None:
+                self._count("similar_hits")
+                return entry["response"]
+        if entry is None:
+            self._count("misses")
+            return None
+        self._count("hits")
+        return entry["response"]
+
+    def set(self, prompt: str, response: str):
+        key = normalize_prompt(prompt)
+        if key:
+            self._cache.set(key, {"tokens": frozenset(key.split()), "response": response})
+
+    def _closest(self, tokens: frozenset):
+        best, best_score = None, self.similarity
+        for entry in self._cache.values():
+            score = jaccard(tokens, entry["tokens"])
+            if score >= best_score:
+                best, best_score = entry, score
+        return best
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def stats(self) -> dict:
+        size = self._cache.stats()["size"]
+        with self._lock:
+            return {
+                "size": size,
+                "maxsize": self._cache.maxsize,
+                "similarity": self.similarity,
+                "hits": self.hits,
+                "similar_hits": self.similar_hits,
+                "misses": self.misses,
+            }
+
+
+chatbot_response_cache = ChatbotResponseCache(
+    maxsize=int(os.environ.get("CHATBOT_CACHE_SIZE", 1000)),
+    ttl=float(os.environ.get("CHATBOT_CACHE_TTL", 86400)),
+    similarity=float(os.environ.get("CHATBOT_CACHE_SIMILARITY", 0)),
+)
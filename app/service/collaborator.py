@@ -2,7 +2,7 @@ from calendar import monthrange
 
 from fastapi import HTTPException
 from .user import User
-from queries.collaborator_queries import CollaboratorQuery
+from queries.collaborator_queries import CollaboratorQuery, NoFreeConsultationLeft
 from service.logging import logging
 from models.local.periode import PeriodeSchema
 from datetime import timedelta, datetime, timezone, date, time
@@ -10,11 +10,12 @@ from typing import Optional
 from models.database.donations_model import Donation
 from models.api.donation import DonationRequest
 from .pdf_generator import PDFGenerator
+from .render_queue import submit_render
+from service import availability
+from service.cache import consultation_quota_cache, free_consultation_cache
 import uuid
 import os
 import stripe
-from fpdf import FPDF
-from fpdf.errors import FPDFUnicodeEncodingException
 from models.database.medical_appointments_model import MedicalAppointmentTable
 
 logger = logging.getLogger(__name__)
@@ -33,12 +34,31 @@ class Collaborator(User):
 
         self.query = collaborator_query
 
-        req = self.query.read_collaborator_by_id(self.user_id)
+        req = self.load_cached("collaborator", lambda: self.query.read_collaborator_by_id(self.user_id))
 
         if req is None:
             logger.warning("An invalid token has been forged : %s", self.user_id)
             raise HTTPException(status_code=401, detail="Token is invalid")
 
+        self._set_profile(req)
+
+    @classmethod
+    def from_id(cls, collaborator_query: CollaboratorQuery, collaborator_id: str):
+        """
+        Salarié chargé par son identifiant, sans token : pour les traitements hors requête (webhooks
+        Stripe), où le token de la session d'origine peut avoir expiré ou été révoqué. None s'il n'existe plus.
+        """
+        req = collaborator_query.read_collaborator_by_id(collaborator_id)
+        if req is None:
+            return None
+        collaborator = cls.__new__(cls)
+        User.__init__(collaborator, collaborator_query)
+        collaborator.user_id = req.collaborator_id
+        collaborator.function = "collaborator"
+        collaborator._set_profile(req)
+        return collaborator
+
+    def _set_profile(self, req):
         self.firstname = req.firstname
         self.lastname = req.lastname
         self.dob = req.dob
@@ -68,60 +88,7 @@ class Collaborator(User):
         if not test:
             raise HTTPException(status_code=404, detail="Contractor not found")
 
-        results1 = self.query.read_contractor_appointment_by_contractor_id(contractor_id)
-        results2 = self.query.read_contractor_calendar_by_contractor_id(contractor_id)
-
-        calendar = []
-        now = datetime.now(timezone.utc)
-
-        if week_start:
-            try:
-                week_start_dt = datetime.strptime(week_start, "%Y-%m-%d")
-                week_start_dt = week_start_dt.replace(tzinfo=timezone.utc)
-            except Exception:
-                raise HTTPException(status_code=400, detail="Invalid weekStart format, expected YYYY-MM-DD")
-            week_end_dt = week_start_dt + timedelta(days=7)
-
-        for result in results1:
-            appointment_date = result.medical_appointment_date
-            if appointment_date.tzinfo is None:
-                appointment_date = appointment_date.replace(tzinfo=timezone.utc)
-
-            appointment_end = appointment_date + timedelta(minutes=30)
-            if week_start:
-                if appointment_date >= week_end_dt or appointment_end <= week_start_dt:
-                    continue
-            else:
-                if appointment_date < now:
-                    continue
-            periode = PeriodeSchema(
-                beginning=appointment_date,
-                end=appointment_end
-            )
-            calendar.append(periode)
-
-        for result in results2:
-            unvailable_begin = result.unvailable_begin_date
-            unvailable_end = result.unvailable_end_date
-
-            if unvailable_begin.tzinfo is None:
-                unvailable_begin = unvailable_begin.replace(tzinfo=timezone.utc)
-            if unvailable_end.tzinfo is None:
-                unvailable_end = unvailable_end.replace(tzinfo=timezone.utc)
-            if week_start:
-
-                if unvailable_end <= week_start_dt or unvailable_begin >= week_end_dt:
-                    continue
-            else:
-                if unvailable_begin < now:
-                    continue
-            periode = PeriodeSchema(
-                beginning=unvailable_begin,
-                end=unvailable_end
-            )
-            calendar.append(periode)
-
-        return calendar
+        return availability.planning(contractor_id, week_start)
 
 
     def checkout_medical_appointment(self, appointment_dt: datetime, contractor_id: str, appointment_type: str):
@@ -137,54 +104,56 @@ class Collaborator(User):
         appointment_end = appointment_dt + timedelta(minutes=30)
 
 
-        week_start_dt = appointment_dt - timedelta(days=appointment_dt.weekday())
-        week_start_str = week_start_dt.strftime("%Y-%m-%d")
-
-        planning = self.find_contractor_planning_by_id(contractor_id, week_start=week_start_str)
-
-        for periode in planning:
-            if periode.beginning <= appointment_dt < periode.end or \
-                    periode.beginning < appointment_end <= periode.end:
-                raise HTTPException(status_code=400, detail="The requested appointment time overlaps with an unavailable period")
-
-        number = self.get_available_free_medical_appointment()
-
-        if number > 0:
+        if not availability.is_free(contractor_id, appointment_dt, appointment_end):
+            raise HTTPException(status_code=400, detail="The requested appointment time overlaps with an unavailable period")
+
+        # Le compteur en cache ne sert qu'à éviter une réservation vouée à l'échec : le quota est vérifié
+        # dans la transaction de réservation, le paiement prend le relais s'il est atteint entre-temps.
+        period = self.entitlement_period(appointment_dt)
+        if period is not None and self.get_available_free_medical_appointment() > 0:
+            # Le créneau est réservé d'abord (transaction courte, voir reserve_medical_appointment) ;
+            # la facture n'est rendue qu'une fois la réservation acquise, hors de la section critique.
+            nom_fichier_pdf = self.medical_bill_file_name(contractor.firstname, contractor.lastname)
+            appointment_id = str(uuid.uuid4())
+            appointment = MedicalAppointmentTable(
+                medical_appointment_id=appointment_id,
+                contractor_id=contractor_id,
+                collaborator_id=self.user_id,
+                medical_appointment_date=appointment_dt,
+                appointment_type=appointment_type,
+                creation_date=datetime.now(timezone.utc),
+                status='PAYED',
+                price=contractor.service_price,
+                bill_file=nom_fichier_pdf,
+                place=appointment_type
+            )
             try:
-                contractor = self.query.read_contractor_by_id(contractor_id)
-                address = f"{contractor.street} - {contractor.city} - {contractor.country}"
-                file = self.create_medical_appointment_bill(
-                    contractor.firstname,
-                    contractor.lastname,
-                    address,
-                    datetime.now(timezone.utc),
-                    contractor.registration_number,
-                    contractor.service_price
-                )
-                appointment_id = str(uuid.uuid4())
-                appointment = MedicalAppointmentTable(
-                    medical_appointment_id=appointment_id,
-                    contractor_id=contractor_id,
-                    collaborator_id=self.user_id,
-                    medical_appointment_date=appointment_dt,
-                    appointment_type=appointment_type,
-                    creation_date=datetime.now(timezone.utc),
-                    status='PAYED',
-                    price=contractor.service_price,
-                    bill_file=file,
-                    place=appointment_type
+                reserved = self.query.reserve_medical_appointment(
+                    appointment, period, free_quota=self.consultation_quota()["quota"]
                 )
-                res = self.query.create_medical_appointment(appointment)
-                if not res:
-                    raise HTTPException(status_code=500, detail="Failed to create medical appointment")
-                print(f"Successfully created medical appointment: {appointment_id}")
+            except NoFreeConsultationLeft:
+                logger.info("No free consultation left for %s, falling back to payment", self.user_id)
+            else:
+                if reserved is None:
+                    raise HTTPException(status_code=409, detail="The requested appointment time is no longer available")
+                logger.info("Successfully created medical appointment: %s", appointment_id)
+
+                try:
+                    address = f"{contractor.street} - {contractor.city} - {contractor.country}"
+                    self.create_medical_appointment_bill(
+                        contractor.firstname,
+                        contractor.lastname,
+                        address,
+                        datetime.now(timezone.utc),
+                        contractor.registration_number,
+                        contractor.service_price,
+                        nom_fichier_pdf=nom_fichier_pdf
+                    )
+                except Exception as e:
+                    logging.error(f"Error rendering medical appointment bill {nom_fichier_pdf}: {e}")
 
                 return {"message": "appointment successfully booked"}
 
-            except Exception as e:
-                logging.error(f"Error creating medical appointment: {e}")
-
-
         stripe.api_key = os.environ.get("STRIPE_SECRET_KEY")
         try:
             checkout_session = stripe.checkout.Session.create(
@@ -215,7 +184,6 @@ class Collaborator(User):
                     "collaborator_id": self.user_id,
                     "appointment_datetime_utc": appointment_dt.isoformat(),
                     "appointment_type": appointment_type,
-                    "token": self.token
                 }
             )
         except stripe.error.StripeError as e:
@@ -284,83 +252,25 @@ class Collaborator(User):
         return {"message": "Merci pour votre don !", "donation": created}
 
 
-    def create_medical_appointment_bill(self, nom, prenom, adresse, date_facture_obj, kbis, prix_total, dossier_sortie="/app/uploads/medical_bill"):
-
-        class PDFInvoice(FPDF):
-            def header(self):
-                # Pas d'en-tête par défaut pour cet exemple simple de facture,
-                # mais vous pourriez mettre un logo ici.
-                # self.image('logo.png', 10, 8, 33)
-                # self.set_font('Arial', 'B', 15)
-                # self.cell(80)
-                # self.cell(30, 10, 'Titre', 1, 0, 'C')
-                # self.ln(20)
-                pass
-
-            def footer(self):
-                # Position à 1.5 cm du bas
-                self.set_y(-15)
-                self.set_font('Arial', 'I', 8)
-                # Numéro de page
-                self.cell(0, 10, f'Page {self.page_no()}', 0, 0, 'C')
-
-        try:
-            # Utilisez FPDF directement ou votre classe PDFInvoice si elle est définie
-            pdf = PDFInvoice('P', 'mm', 'A4')  # Ou pdf = FPDF(...) si pas de classe perso
-            pdf.alias_nb_pages()  # Important pour le {nb} dans le footer
-
-            # --- PAS BESOIN DE add_font ---
-            # pdf.add_font(...) # <--- Supprimez ces lignes
-
-            pdf.add_page()
-            # --- UTILISEZ UNE POLICE DE BASE ---
-            pdf.set_font('Helvetica', '', 10)  # Ou 'Arial', 'Times', 'Courier'
-
-            # --- FORMAT DU TEXTE SANS CARACTERES SPECIAUX (€) ---
-            pdf.set_font('Helvetica', 'B', 12)
-            pdf.cell(0, 7, "Details de la facture", ln=1,
-                     align='L')  # Attention aux accents si vous utilisez strictement latin-1
-            pdf.set_font('Helvetica', '', 10)
-            client_info = f"Client: {prenom} {nom}"
-            adresse_info = f"Adresse: {adresse}"  # Vérifiez les accents dans l'adresse aussi!
-            date_info = f"Date: {date_facture_obj.strftime('%d/%m/%Y')}"
-            kbis_info = f"KBIS: {kbis}"
-            # Remplacez '€'
-            total_info = f"Montant Total (EUR): {prix_total:.2f}"  # Ou "Montant Total: ..."
-
-            pdf.cell(0, 7, client_info, ln=1, align='L')
-            # Utilisez encode('latin-1', 'replace') pour être sûr si l'adresse peut contenir des choses bizarres
-            # pdf.multi_cell(0, 7, adresse_info.encode('latin-1', 'replace').decode('latin-1'), ln=1, align='L')
-            # Ou plus simplement, assurez-vous que l'adresse n'a pas de caractères problématiques
-            pdf.multi_cell(0, 7, adresse_info, border=0, ln=1,
-                           align='L')  # Utilisez multi_cell pour les adresses sur plusieurs lignes
-            pdf.cell(0, 7, date_info, ln=1, align='L')
-            pdf.cell(0, 7, kbis_info, ln=1, align='L')
-            pdf.cell(0, 7, total_info, ln=1, align='L')
-            # ... (fin de la logique de création de PDF) ...
-
-            os.makedirs(dossier_sortie, exist_ok=True)
-            nom_fichier_pdf = f"facture_{nom}_{prenom}_{uuid.uuid4()}.pdf"
-            chemin_fichier_complet = os.path.join(dossier_sortie, nom_fichier_pdf)
-
-            # --- ENCODAGE explicite à la sortie (bonne pratique avec polices de base) ---
-            # FPDF devrait gérer cela mais préciser peut aider dans certains cas
-            # Bien que .output() gère souvent cela, soyez conscient des encodages
-            pdf.output(chemin_fichier_complet, 'F')
-            print(f"Facture PDF générée : {chemin_fichier_complet}")
-            return nom_fichier_pdf
-
-            # Gardez ce bloc au cas où un autre caractère inattendu poserait problème
-        except FPDFUnicodeEncodingException as e:
-            print(f"Erreur d'encodage FPDF (caractère non supporté par la police de base?): {e}.")
-            import traceback
-            traceback.print_exc()
-            return None
-        except Exception as e:
-            import traceback
-            print(f"Une erreur générale est survenue lors de la création de la facture PDF : {e}")
-            traceback.print_exc()
-            return None
+    @staticmethod
+    def medical_bill_file_name(nom, prenom):
+        return f"facture_{nom}_{prenom}_{uuid.uuid4()}.pdf"
+
+    def create_medical_appointment_bill(self, nom, prenom, adresse, date_facture_obj, kbis, prix_total, dossier_sortie="/app/uploads/medical_bill", nom_fichier_pdf=None):
+        # Le nom du fichier est fixé ici ; le PDF est rendu en arrière-plan (voir service/render_queue.py)
+        nom_fichier_pdf = nom_fichier_pdf or self.medical_bill_file_name(nom, prenom)
+        submit_render(
+            "medical_bill", nom_fichier_pdf,
+            owner_id=self.user_id,
+            output_path=os.path.join(dossier_sortie, nom_fichier_pdf),
+            nom=nom,
+            prenom=prenom,
+            adresse=adresse,
+            date_facture_obj=date_facture_obj,
+            kbis=kbis,
+            prix_total=prix_total
+        )
+        return nom_fichier_pdf
 
     def find_medical_appointment(self, uuid, fromDate=None):
         filter_date = None
@@ -417,7 +327,9 @@ class Collaborator(User):
         if appointment.medical_appointment_date.replace(tzinfo=timezone.utc) < datetime.now(timezone.utc):
             raise HTTPException(status_code=400, detail="Cannot cancel past appointments")
 
-        appointment = self.query.update_medical_appointment_by_appointment_id(appointment_id, {"status": "CANCELED"})
+        appointment = self.query.update_medical_appointment_by_appointment_id(
+            appointment_id, {"status": "CANCELED"}, self.entitlement_period(appointment.medical_appointment_date)
+        )
 
         if appointment is None:
             raise HTTPException(status_code=500, detail="Internal server error")
@@ -453,13 +365,16 @@ class Collaborator(User):
     from datetime import datetime
     from calendar import monthrange
 
-    def get_period_boundaries(self, bill_date: datetime) -> (datetime, datetime):
+    def get_period_boundaries(self, bill_date: datetime, at: datetime = None) -> (datetime, datetime):
         """
-        Calcule la période mensuelle de validité à partir de bill_date.
-        La période s'étend du jour bill_date.day jusqu'au même jour du mois suivant.
+        Calcule la période mensuelle de validité à partir de bill_date, contenant `at` (maintenant par défaut).
+        La période s'étend du jour bill_date.day (à minuit) jusqu'au même jour du mois suivant.
         Si ce jour n'existe pas dans le mois suivant, on prend le dernier jour du mois.
         """
-        now = datetime.now(tz=bill_date.tzinfo)
+        now = at or datetime.now(timezone.utc)
+        if now.tzinfo is not None:
+            now = now.astimezone(timezone.utc)
+        now = now.replace(tzinfo=bill_date.tzinfo, hour=0, minute=0, second=0, microsecond=0)
         day = bill_date.day
 
         # Détermine le début de la période
@@ -489,45 +404,58 @@ class Collaborator(User):
 
         return period_start, period_end
 
-    def get_available_free_medical_appointment(self):
-
-        company_bill = self.query.read_company_bill_by_company_id_and_subscription_id(self.company_id)
-        if not company_bill or not getattr(company_bill, "payed_date", None):
-            return 0
-
-        company_subscription = self.query.read_company_subscription_by_id(company_bill.company_subscription_id)
-        if company_subscription.status != "ACTIVE":
-            return 0
+    def consultation_quota(self) -> dict:
+        """Dernière facture payée de l'entreprise, état de l'abonnement et quota du pack ; en cache par entreprise."""
+        quota = consultation_quota_cache.get(self.company_id)
+        if quota is None:
+            generation = consultation_quota_cache.generation()
+            row = self.query.read_consultation_quota(self.company_id)
+            quota = {
+                "company_id": self.company_id,
+                "payed_date": row.payed_date if row else None,
+                "active": bool(row) and row.status == "ACTIVE",
+                "quota": (row.default_consultation_number or 0) if row else 0,
+            }
+            consultation_quota_cache.set(self.company_id, quota, generation=generation)
+        return quota
+
+    def entitlement_period(self, at: datetime = None):
+        """Période mensuelle de l'abonnement contenant `at` ; None sans facture payée."""
+        payed_date = self.consultation_quota()["payed_date"]
+        if payed_date is None:
+            return None
+        return self.get_period_boundaries(payed_date, at)
 
-        packs = self.query.read_packs_by_id(company_subscription.pack_id)
-        if not packs or not getattr(packs, "default_consultation_number", None):
+    def get_available_free_medical_appointment(self):
+        quota = self.consultation_quota()
+        if not quota["active"] or not quota["quota"]:
             return 0
 
         # Vérifier que la date actuelle est dans la période d'un an à partir de la date de paiement.
-        now = datetime.now(tz=company_bill.payed_date.tzinfo)
+        payed_date = quota["payed_date"]
+        now = datetime.now(tz=payed_date.tzinfo)
         try:
-            subscription_end = company_bill.payed_date.replace(year=company_bill.payed_date.year + 1)
+            subscription_end = payed_date.replace(year=payed_date.year + 1)
         except ValueError:
             # Gestion du cas particulier (par exemple 29 février)
-            last_day = monthrange(company_bill.payed_date.year + 1, company_bill.payed_date.month)[1]
-            subscription_end = company_bill.payed_date.replace(year=company_bill.payed_date.year + 1, day=last_day)
+            last_day = monthrange(payed_date.year + 1, payed_date.month)[1]
+            subscription_end = payed_date.replace(year=payed_date.year + 1, day=last_day)
         if now > subscription_end:
             return 0
 
-        period_start, period_end = self.get_period_boundaries(company_bill.payed_date)
-
-        appointments = self.query.read_medical_appointment(self.user_id, filter_date=company_bill.payed_date)
-        if not appointments:
-            appointments = []
-
-        monthly_appointments = [
-            appointment for appointment in appointments
-            if period_start <= appointment.medical_appointment_date < period_end
-        ]
-        count_appointments = len(monthly_appointments)
-
-        free_consultations = packs.default_consultation_number
-
-        remaining_free_appointments = free_consultations - count_appointments
-        return remaining_free_appointments if remaining_free_appointments >= 0 else 0
+        period = self.get_period_boundaries(payed_date)
+        cached = free_consultation_cache.get(self.user_id)
+        if cached is not None and cached["period_start"] == period[0]:
+            return cached["remaining"]
+
+        # Compteur tenu à jour à chaque réservation / annulation (table consultation_entitlements)
+        generation = free_consultation_cache.generation()
+        used = self.query.read_free_consultations_used(self.user_id, period)
+        remaining = max(quota["quota"] - used, 0)
+        free_consultation_cache.set(
+            self.user_id,
+            {"company_id": self.company_id, "period_start": period[0], "remaining": remaining},
+            generation=generation,
+        )
+        return remaining
 
@@ -24,6 +24,7 @@ from datetime import datetime
 from models.api.estimate import EstimateRequestSchema
 import hashlib
 from service.pdf_generator import PDFGenerator
+from service.signature_store import InvalidSignature, signature_ref, store_signature
 import stripe
 
 logger = logging.getLogger(__name__)
@@ -37,7 +38,7 @@ class Company(User):
             self.company_id = company_id_override
         if self.function == "company":
             try:
-                req = self.query.read_company_by_id(self.user_id)
+                req = self.load_cached("company", lambda: self.query.read_company_by_id(self.user_id))
             except Exception as e:
                 logger.warning("Erreur lors de la lecture de l'entreprise : %s", e)
                 raise HTTPException(status_code=500, detail="Erreur interne lors de la récupération de l'entreprise")
@@ -252,8 +253,9 @@ class Company(User):
      sub_id = new_sub.company_subscription_id
 
   
-     devis_path = self.query.generate_estimate_pdf(self.name,  sub_id, estimate_data.employees, pack, estimate_data.signature_date)
-     contrat_path = self.query.generate_contract_pdf(self.name,  sub_id, estimate_data.employees, pack, estimate_data.signature_date)
+     # Les lignes sont créées avec le chemin final des PDF, rendus ensuite en arrière-plan
+     devis_path = PDFGenerator.document_path("estimates", "devis", self.name, sub_id)
+     contrat_path = PDFGenerator.document_path("contracts", "contrat", self.name, sub_id)
 
   
      estimate = self.query.create_estimate_record(
@@ -272,7 +274,12 @@ class Company(User):
         signed=False
      )
 
-     return estimate
+     render_jobs = [
+        self.query.schedule_estimate_pdf(self.name, sub_id, estimate_data.employees, pack, estimate_data.signature_date, devis_path, owner_id=self.company_id),
+        self.query.schedule_contract_pdf(self.name, sub_id, estimate_data.employees, pack, estimate_data.signature_date, contrat_path, owner_id=self.company_id),
+     ]
+
+     return estimate, render_jobs
 
     def select_pack_by_employees(self, employees: int):
      return self.query.select_pack_by_employees(employees)
@@ -289,28 +296,30 @@ class Company(User):
 
      pack = self.get_pack_by_id(self.get_company_subscription_by_id(subscription_id).pack_id)
 
-     print("SIGNATURE INPUT =", signature_base64[:50])
-
-     contrat_path = PDFGenerator.generate_contrat(
-        company_name=self.name,
-        subscription_id=subscription_id,
-        plan=pack.name,
-        employees=estimate.employees,
-        price_per_employee=pack.annual_collaborator_price,
-        consultation_nb=pack.default_consultation_number,
-        chatbot_msgs=pack.chatbot_messages_number or 0,
-        signature_date=datetime.utcnow(),
-        company_signature_base64=signature_base64,
-        admin_signature_base64=contract.admin_signature 
-    )
+     # La signature est décodée et stockée une seule fois ; le contrat ne garde que son empreinte.
+     try:
+        company_signature = store_signature(signature_base64) if signature_base64 else None
+        admin_signature = signature_ref(contract.admin_signature)
+     except InvalidSignature as e:
+        raise HTTPException(400, str(e))
+
+     contrat_path = PDFGenerator.document_path("contracts", "contrat", self.name, subscription_id)
 
      self.query.update_contract(company_id, subscription_id, {
         "company_signed": True,
-        "company_signature": signature_base64,
+        "company_signature": company_signature,
+        "admin_signature": admin_signature,
         "file": contrat_path
     })
 
-     return contrat_path
+     render_job = self.query.schedule_contract_pdf(
+        self.name, subscription_id, estimate.employees, pack, datetime.utcnow(), contrat_path,
+        owner_id=company_id,
+        company_signature=company_signature,
+        admin_signature=admin_signature
+    )
+
+     return contrat_path, render_job
 
 
     def subscription_payement(self, company_subscription_id: str):
@@ -340,8 +349,8 @@ class Company(User):
                 payment_intent_data={},
                 metadata={
                     "origin": "company-subscription",
+                    "company_id": self.company_id,
                     "company_subscription_id": company_subscription_id,
-                    "token": self.token
                 }
             )
         except stripe.error.StripeError as e:
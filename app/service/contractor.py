@@ -1,5 +1,4 @@
 # service/contractor.py
-import base64
 from queries.user_queries import UserQuery
 from service.user import User
 from queries.contractor_queries import ContractorQueries
@@ -12,11 +11,15 @@ import random, string
 from models.local.user import ContractorSchema
 import uuid
 from models.database.calendars_model import CalendarTable
+from service import availability
 from models.local.periode import PeriodeSchema
 import os
 from reportlab.pdfgen import canvas
-from PIL import Image
-import io
+from service import document_store
+from service.signature_store import InvalidSignature, signature_path, store_signature
+from service.logging import logging
+
+logger = logging.getLogger(__name__)
 
 
 class Contractor(User):
@@ -35,7 +38,7 @@ class Contractor(User):
             self.type = None
             self.admin_id = None
         else:
-            result = self.contractor_query.read_contractor_by_id(self.user_id)
+            result = self.load_cached("contractor", lambda: self.contractor_query.read_contractor_by_id(self.user_id))
             if result is None:
                 raise HTTPException(status_code=401, detail="Token is invalid")
 
@@ -135,57 +138,7 @@ class Contractor(User):
         if not test:
             raise HTTPException(status_code=404, detail="Contractor not found")
 
-        results1 = self.contractor_query.read_contractor_appointment_by_contractor_id(self.contractor_id)
-        results2 = self.contractor_query.read_contractor_calendar_by_contractor_id(self.contractor_id)
-
-        calendar = []
-        now = datetime.now(timezone.utc)
-
-        if week_start:
-            try:
-                week_start_dt = datetime.strptime(week_start, "%Y-%m-%d")
-                week_start_dt = week_start_dt.replace(tzinfo=timezone.utc)
-            except Exception:
-                raise HTTPException(status_code=400, detail="Invalid weekStart format, expected YYYY-MM-DD")
-            week_end_dt = week_start_dt + timedelta(days=7)
-
-        for result in results1:
-            appointment_date = result.medical_appointment_date
-            if appointment_date.tzinfo is None:
-                appointment_date = appointment_date.replace(tzinfo=timezone.utc)
-            appointment_end = appointment_date + timedelta(minutes=30)
-            if week_start:
-                if appointment_date >= week_end_dt or appointment_end <= week_start_dt:
-                    continue
-            else:
-                if appointment_date < now:
-                    continue
-            periode = PeriodeSchema(
-                beginning=appointment_date,
-                end=appointment_end
-            )
-            calendar.append(periode)
-
-        for result in results2:
-            unvailable_begin = result.unvailable_begin_date
-            unvailable_end = result.unvailable_end_date
-            if unvailable_begin.tzinfo is None:
-                unvailable_begin = unvailable_begin.replace(tzinfo=timezone.utc)
-            if unvailable_end.tzinfo is None:
-                unvailable_end = unvailable_end.replace(tzinfo=timezone.utc)
-            if week_start:
-                if unvailable_end <= week_start_dt or unvailable_begin >= week_end_dt:
-                    continue
-            else:
-                if unvailable_begin < now:
-                    continue
-            periode = PeriodeSchema(
-                beginning=unvailable_begin,
-                end=unvailable_end
-            )
-            calendar.append(periode)
-
-        return calendar
+        return availability.planning(self.contractor_id, week_start)
 
     def get_collaborator_by_appointment_date(self, appointment_date: datetime):
         if appointment_date.tzinfo is None:
@@ -220,40 +173,21 @@ class Contractor(User):
                 detail=f"Erreur lors de la création du répertoire : {str(e)}"
             )
 
-        # Définition des chemins pour l'image et le contrat
-        nom_fichier_signature = os.path.join(abs_path, f"{self.contractor_id}_signature.png")
         nom_fichier_contrat = os.path.join(abs_path, f"{self.contractor_id}_contrat_prestataire.pdf")
 
-        # Traitement de la signature et retraitement de l'image
-        if signature.startswith("data:image"):
-            try:
-                # Extraction et décodage de l'image
-                signature_data = signature.split(",", 1)[1]
-                img_data = base64.b64decode(signature_data)
-
-                # Utilisation de Pillow pour ouvrir et retraiter l'image
-                image = Image.open(io.BytesIO(img_data))
-
-                # Si l'image possède un canal alpha, on le remplace par un fond blanc
-                if image.mode in ("RGBA", "LA"):
-                    background = Image.new("RGB", image.size, (255, 255, 255))
-                    background.paste(image, mask=image.split()[3])
-                    image = background
-                else:
-                    image = image.convert("RGB")
-
-                # Sauvegarde de l'image retraitée
-                image.save(nom_fichier_signature)
-            except Exception as e:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Erreur lors de l'enregistrement de la signature : {str(e)}"
-                )
-        else:
+        # Signature rangée par empreinte (service/signature_store.py), comme celles des contrats entreprise
+        if not signature.startswith("data:image"):
             raise HTTPException(
                 status_code=400,
                 detail="Format de signature non supporté. Veuillez envoyer une signature au format data:image."
             )
+        try:
+            nom_fichier_signature = signature_path(store_signature(signature))
+        except InvalidSignature as e:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Erreur lors de l'enregistrement de la signature : {str(e)}"
+            )
 
         # Création du PDF avec ReportLab et insertion de l'image de signature
         try:
@@ -288,5 +222,10 @@ class Contractor(User):
                 detail=f"Erreur lors de la mise à jour du contrat dans la base de données : {str(e)}"
             )
 
+        try:
+            document_store.ingest(nom_fichier_contrat)
+        except Exception as e:
+            logger.error("Contrat prestataire %s non rangé dans le stockage : %s", self.contractor_id, e)
+
         return {"message": "Contract signed successfully"}
 
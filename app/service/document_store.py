@@ -0,0 +1,142 @@
+"""
+Stockage des documents générés par empreinte de contenu.
+
+Un document reste désigné par son chemin logique sous uploads (« estimates/devis_….pdf »,
+« medical_bill/facture_….pdf »…), celui enregistré dans les tables et servi sur /uploads. Une fois
+écrit, son contenu est rangé sous uploads/store/ab/cd/<sha256>.pdf : un contenu identique n'est
+stocké qu'une fois et les répertoires restent petits. document_refs relie chemin logique et contenu,
+document_blobs compte les références.
+
+collect_garbage (tâche périodique) libère les chemins qui ne sont plus utilisés par les devis,
+contrats, factures, rendez-vous ou contrats prestataires, puis supprime les contenus restés sans
+référence plus de DOCUMENT_GC_GRACE_HOURS heures.
+"""
+import hashlib
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from queries.document_store_queries import DocumentStoreQuery
+from service.logging import logging
+
+logger = logging.getLogger(__name__)
+
+DOCUMENTS_ROOT = os.path.abspath(os.environ.get("DOCUMENTS_ROOT", "uploads"))
+STORE_FOLDER = "store"
+DOCUMENT_GC_GRACE_HOURS = float(os.environ.get("DOCUMENT_GC_GRACE_HOURS", 24))
+
+
+def blob_path(sha256: str, extension: str) -> str:
+    """Chemin du contenu, relatif à DOCUMENTS_ROOT."""
+    return f"{STORE_FOLDER}/{sha256[:2]}/{sha256[2:4]}/{sha256}{extension}"
+
+
+def _absolute(relative: str) -> str:
+    return os.path.join(DOCUMENTS_ROOT, *relative.split("/"))
+
+
+def logical_name(path: str):
+    """Chemin logique d'un fichier écrit sous DOCUMENTS_ROOT, None ailleurs."""
+    relative = os.path.relpath(os.path.abspath(path), DOCUMENTS_ROOT).replace(os.sep, "/")
+    if relative.startswith("../") or relative == ".." or relative.startswith(f"{STORE_FOLDER}/"):
+        return None
+    return relative
+
+
+def _hash_file(path: str) -> tuple:
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def ingest(path: str):
+    """
+    Range dans le stockage un fichier qui vient d'être écrit sous son nom logique ; renvoie l'empreinte,
+    ou None si le fichier est hors de DOCUMENTS_ROOT (il reste alors où il est).
+    La référence est enregistrée avant le déplacement : jusque-là le document reste lisible à son ancien chemin.
+    """
+    file = logical_name(path)
+    if file is None:
+        return None
+
+    sha256, size = _hash_file(path)
+    extension = os.path.splitext(path)[1].lower()[:10]
+    DocumentStoreQuery().add_reference(file, sha256, extension, size)
+
+    target = _absolute(blob_path(sha256, extension))
+    if os.path.exists(target):
+        os.remove(path)
+    else:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(path, target)
+    return sha256
+
+
+def locate(file: str):
+    """Chemin (relatif à DOCUMENTS_ROOT) du contenu d'un document stocké, None sinon."""
+    stored = DocumentStoreQuery().read_reference(file)
+    if stored is None:
+        return None
+    relative = blob_path(*stored)
+    return relative if os.path.isfile(_absolute(relative)) else None
+
+
+def resolve_path(path: str) -> str:
+    """Fichier à lire pour un chemin de document : le chemin lui-même s'il existe encore, sinon son contenu stocké."""
+    if os.path.exists(path):
+        return path
+    file = logical_name(path)
+    stored = locate(file) if file else None
+    return _absolute(stored) if stored else path
+
+
+def _remove_strays(query: DocumentStoreQuery, before: float) -> int:
+    # Contenus présents sur disque sans ligne document_blobs (suppression interrompue par exemple)
+    removed = 0
+    for directory, _, names in os.walk(_absolute(STORE_FOLDER)):
+        candidates = {}
+        for name in names:
+            path = os.path.join(directory, name)
+            if os.path.getmtime(path) < before:
+                candidates[os.path.splitext(name)[0]] = path
+        if not candidates:
+            continue
+        existing = query.read_existing_blobs(list(candidates))
+        for sha256, path in candidates.items():
+            if sha256 not in existing:
+                os.remove(path)
+                removed += 1
+    return removed
+
+
+def _remove_blob(sha256: str, extension: str):
+    try:
+        os.remove(_absolute(blob_path(sha256, extension)))
+    except FileNotFoundError:
+        pass
+
+
+def collect_garbage() -> dict:
+    query = DocumentStoreQuery()
+    before = datetime.now(timezone.utc) - timedelta(hours=DOCUMENT_GC_GRACE_HOURS)
+
+    # Les références récentes sont épargnées : la ligne du devis / de la facture peut être créée après le rendu
+    live = query.read_live_files()
+    dangling = [file for file in query.read_references_before(before) if file not in live]
+    if dangling:
+        query.release_references(dangling)
+
+    deleted = 0
+    while True:
+        blobs = query.delete_unreferenced_blobs(before, _remove_blob)
+        deleted += len(blobs)
+        if not blobs:
+            break
+
+    strays = _remove_strays(query, time.time() - DOCUMENT_GC_GRACE_HOURS * 3600)
+    if dangling or deleted or strays:
+        logger.info("Document GC: %s références libérées, %s contenus supprimés, %s fichiers orphelins", len(dangling), deleted, strays)
+    return {"released": len(dangling), "deleted": deleted, "strays": strays}
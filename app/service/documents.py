@@ -0,0 +1,102 @@
+import mimetypes
+import os
+import posixpath
+from email.utils import formatdate, parsedate_to_datetime
+from urllib.parse import quote
+from fastapi import HTTPException
+from starlette.responses import FileResponse, Response
+from queries.document_queries import DocumentQuery
+from service import document_store
+from service.document_store import DOCUMENTS_ROOT
+
+# Documents générés (devis, contrats, factures) servis après contrôle d'accès. Derrière nginx
+# (DOCUMENTS_ACCEL_PREFIX renseigné), l'API ne fait que l'autorisation et les 304 : les octets,
+# plages comprises, sont envoyés par nginx via X-Accel-Redirect vers une location `internal`.
+# Le contenu est lu dans le stockage par empreinte (service/document_store.py) quand il y a été rangé.
+DOCUMENTS_ACCEL_PREFIX = os.environ.get("DOCUMENTS_ACCEL_PREFIX", "")
+# Jamais servis directement, même aux administrateurs : images de signature, contenus du stockage
+PRIVATE_FOLDERS = ("signatures", document_store.STORE_FOLDER)
+
+
+def _not_found():
+    return HTTPException(status_code=404, detail="Document introuvable")
+
+
+def resolve(path: str) -> str:
+    """Chemin logique normalisé d'un document ; 404 hors du dossier des documents."""
+    relative = posixpath.normpath(path.replace("\\", "/").lstrip("/"))
+    if relative in (".", "") or relative.startswith("../") or relative == "..":
+        raise _not_found()
+    if relative.split("/", 1)[0] in PRIVATE_FOLDERS or relative.endswith("_signature.png"):
+        raise _not_found()
+    return relative
+
+
+def authorize(user, relative: str):
+    # 404 plutôt que 403 : on ne révèle pas l'existence des documents des autres
+    if user.function == "administrator":
+        return
+    if user.user_id not in DocumentQuery().read_document_owners(relative):
+        raise _not_found()
+
+
+def etag(stat_result: os.stat_result) -> str:
+    # Même format que nginx (mtime-taille en hexadécimal) : l'ETag reste identique quel que soit le mode d'envoi
+    return f'"{int(stat_result.st_mtime):x}-{stat_result.st_size:x}"'
+
+
+def is_not_modified(headers, tag: str, stat_result: os.stat_result) -> bool:
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        candidates = [value.strip().removeprefix("W/") for value in if_none_match.split(",")]
+        return "*" in candidates or tag in candidates
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(stat_result.st_mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def document_response(request, user, path: str, filename: str = None) -> Response:
+    relative = resolve(path)
+    authorize(user, relative)
+
+    # Contenu rangé par empreinte, sinon fichier encore à son chemin d'origine
+    source = document_store.locate(relative) or relative
+    absolute = os.path.join(DOCUMENTS_ROOT, *source.split("/"))
+
+    try:
+        stat_result = os.stat(absolute)
+    except OSError:
+        raise _not_found()
+    if not os.path.isfile(absolute):
+        raise _not_found()
+
+    tag = etag(stat_result)
+    headers = {
+        "ETag": tag,
+        "Last-Modified": formatdate(stat_result.st_mtime, usegmt=True),
+        "Cache-Control": "private, no-cache",
+    }
+    if is_not_modified(request.headers, tag, stat_result):
+        return Response(status_code=304, headers=headers)
+
+    media_type = mimetypes.guess_type(relative)[0] or "application/octet-stream"
+    filename = filename or posixpath.basename(relative)
+
+    if DOCUMENTS_ACCEL_PREFIX:
+        headers["X-Accel-Redirect"] = DOCUMENTS_ACCEL_PREFIX.rstrip("/") + "/" + quote(source)
+        headers["Content-Disposition"] = f"inline; filename*=utf-8''{quote(filename)}"
+        return Response(headers=headers, media_type=media_type)
+
+    # Sans nginx (développement) : FileResponse gère Range / If-Range et utilise sendfile si le serveur le permet
+    return FileResponse(
+        absolute,
+        media_type=media_type,
+        filename=filename,
+        content_disposition_type="inline",
+        headers=headers,
+        stat_result=stat_result,
+    )
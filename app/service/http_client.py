@@ -0,0 +1,38 @@
+import importlib.util
+import os
+import httpx
+
+# Client HTTP partagé par toute l'API : les connexions keep-alive (et HTTP/2 si h2 est installé)
+# vers les services externes sont réutilisées d'une requête à l'autre. Ouvert/fermé dans le lifespan.
+_client = None
+
+
+def _http2_enabled() -> bool:
+    wanted = os.environ.get("HTTP_CLIENT_HTTP2", "true").strip().lower() in ("1", "true", "yes", "on")
+    return wanted and importlib.util.find_spec("h2") is not None
+
+
+def start_http_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            http2=_http2_enabled(),
+            timeout=httpx.Timeout(float(os.environ.get("HTTP_CLIENT_TIMEOUT", 60)), connect=10),
+            limits=httpx.Limits(
+                max_connections=int(os.environ.get("HTTP_CLIENT_MAX_CONNECTIONS", 100)),
+                max_keepalive_connections=int(os.environ.get("HTTP_CLIENT_MAX_KEEPALIVE", 20)),
+                keepalive_expiry=60,
+            ),
+        )
+    return _client
+
+
+async def close_http_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    return start_http_client()
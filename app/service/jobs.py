@@ -0,0 +1,33 @@
+import asyncio
+from service.logging import logging
+
+logger = logging.getLogger(__name__)
+
+# Tâches périodiques lancées au démarrage de l'API (voir lifespan dans main.py).
+_jobs = {}
+_tasks = []
+
+
+def register_job(name: str, interval: float, func, *args, **kwargs):
+    _jobs[name] = (interval, func, args, kwargs)
+
+
+async def _run_periodically(name: str, interval: float, func, args, kwargs):
+    while True:
+        try:
+            await asyncio.to_thread(func, *args, **kwargs)
+        except Exception as e:
+            logger.error("Job %s failed: %s", name, e)
+        await asyncio.sleep(interval)
+
+
+def start_jobs():
+    for name, (interval, func, args, kwargs) in _jobs.items():
+        _tasks.append(asyncio.create_task(_run_periodically(name, interval, func, args, kwargs), name=name))
+
+
+async def stop_jobs():
+    for task in _tasks:
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
@@ -0,0 +1,176 @@
+import os
+import smtplib
+import threading
+import time
+from datetime import timedelta
+from email import encoders
+from email.mime.base import MIMEBase
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from queries.email_outbox_queries import EmailOutboxQuery
+from service import document_store
+from service.logging import logging
+
+logger = logging.getLogger(__name__)
+
+# Les e-mails sont écrits dans la table email_outbox puis envoyés par un thread dédié, qui garde
+# sa connexion SMTP ouverte d'un lot à l'autre. Les requêtes ne font qu'un INSERT.
+SMTP_HOST = os.environ.get("SMTP_HOST", "postfix")
+SMTP_PORT = int(os.environ.get("SMTP_PORT", 25))
+SMTP_STARTTLS = os.environ.get("SMTP_STARTTLS", "true").lower() in ("1", "true", "yes")
+SMTP_TIMEOUT = float(os.environ.get("SMTP_TIMEOUT", 30))
+SMTP_IDLE_TIMEOUT = float(os.environ.get("SMTP_IDLE_TIMEOUT", 60))
+EMAIL_OUTBOX_INTERVAL = float(os.environ.get("EMAIL_OUTBOX_INTERVAL", 10))
+EMAIL_OUTBOX_BATCH = int(os.environ.get("EMAIL_OUTBOX_BATCH", 50))
+EMAIL_MAX_ATTEMPTS = int(os.environ.get("EMAIL_MAX_ATTEMPTS", 8))
+EMAIL_RETRY_BASE = float(os.environ.get("EMAIL_RETRY_BASE", 30))
+EMAIL_RETRY_MAX = float(os.environ.get("EMAIL_RETRY_MAX", 3600))
+
+_wake = threading.Event()
+_stop = threading.Event()
+_thread = None
+_smtp = None
+_smtp_last_used = 0.0
+
+
+def sender_address() -> str:
+    return f'noreply@{os.getenv("DOMAIN")}'
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Backoff exponentiel : 30 s, 1 min, 2 min… plafonné à EMAIL_RETRY_MAX."""
+    return timedelta(seconds=min(EMAIL_RETRY_BASE * 2 ** (attempts - 1), EMAIL_RETRY_MAX))
+
+
+def enqueue_email(recipient: str, subject: str, html: str, attachment_path: str = None) -> str:
+    """Enregistre un e-mail dans l'outbox et réveille le thread d'envoi ; renvoie son identifiant."""
+    email_id = EmailOutboxQuery().enqueue(sender_address(), recipient, subject, html, attachment_path)
+    logger.info("E-mail %s mis en file pour %s", email_id, recipient)
+    _wake.set()
+    return email_id
+
+
+def _build_message(email: dict) -> MIMEMultipart:
+    msg = MIMEMultipart('alternative')
+    msg['Subject'] = email["subject"]
+    msg['From'] = email["sender"]
+    msg['To'] = email["recipient"]
+    msg.attach(MIMEText(email["html"], 'html', 'utf-8'))
+
+    # Lue au moment de l'envoi : une facture rendue en arrière-plan peut ne pas encore exister,
+    # l'envoi est alors simplement réessayé plus tard.
+    attachment_path = email["attachment_path"]
+    if attachment_path is not None:
+        with open(document_store.resolve_path(attachment_path), "rb") as file:
+            part = MIMEBase("application", "octet-stream")
+            part.set_payload(file.read())
+        encoders.encode_base64(part)
+        part.add_header("Content-Disposition", f"attachment; filename={os.path.basename(attachment_path)}")
+        msg.attach(part)
+    return msg
+
+
+def _connect() -> smtplib.SMTP:
+    global _smtp
+    if _smtp is None:
+        logger.debug("Connexion au serveur SMTP %s:%s", SMTP_HOST, SMTP_PORT)
+        server = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT)
+        if SMTP_STARTTLS:
+            server.starttls()
+        _smtp = server
+    return _smtp
+
+
+def _disconnect():
+    global _smtp
+    if _smtp is not None:
+        try:
+            _smtp.quit()
+        except smtplib.SMTPException:
+            _smtp.close()
+        except OSError:
+            pass
+        _smtp = None
+
+
+def _send(msg: MIMEMultipart):
+    global _smtp_last_used
+    try:
+        _connect().send_message(msg)
+    except smtplib.SMTPServerDisconnected:
+        # Connexion fermée par le serveur pendant l'inactivité : une seule reconnexion
+        _disconnect()
+        _connect().send_message(msg)
+    _smtp_last_used = time.monotonic()
+
+
+def deliver_pending() -> int:
+    """Envoie les e-mails dus par lots, sur une même connexion SMTP ; renvoie le nombre d'envois réussis."""
+    query = EmailOutboxQuery()
+    sent = 0
+    while not _stop.is_set():
+        batch = query.claim_due(EMAIL_OUTBOX_BATCH, retry_delay)
+        for email in batch:
+            try:
+                msg = _build_message(email)
+            except OSError as e:
+                _fail(query, email, f"Pièce jointe indisponible : {e}", permanent=False)
+                continue
+            try:
+                _send(msg)
+            except smtplib.SMTPResponseException as e:
+                # Code 5xx : refus définitif du serveur, inutile de réessayer
+                permanent = e.smtp_code >= 500
+                _fail(query, email, f"{e.smtp_code} {e.smtp_error!r}", permanent)
+                if not permanent:
+                    _disconnect()
+            except smtplib.SMTPRecipientsRefused as e:
+                _fail(query, email, str(e.recipients), permanent=True)
+            except (smtplib.SMTPException, OSError) as e:
+                _fail(query, email, str(e), permanent=False)
+                _disconnect()
+            else:
+                query.mark_sent(email["email_id"])
+                logger.info("E-mail %s envoyé à %s", email["email_id"], email["recipient"])
+                sent += 1
+        if len(batch) < EMAIL_OUTBOX_BATCH:
+            return sent
+    return sent
+
+
+def _fail(query: EmailOutboxQuery, email: dict, error: str, permanent: bool):
+    failed = permanent or email["attempts"] >= EMAIL_MAX_ATTEMPTS
+    logger.error("Échec de l'envoi de l'e-mail %s à %s (tentative %s) : %s",
+                 email["email_id"], email["recipient"], email["attempts"], error)
+    query.mark_error(email["email_id"], error, failed)
+
+
+def _run():
+    while not _stop.is_set():
+        _wake.clear()
+        try:
+            deliver_pending()
+        except Exception as e:
+            logger.error("Email outbox worker failed: %s", e)
+            _disconnect()
+        if _smtp is not None and time.monotonic() - _smtp_last_used > SMTP_IDLE_TIMEOUT:
+            _disconnect()
+        _wake.wait(EMAIL_OUTBOX_INTERVAL)
+    _disconnect()
+
+
+def start_mail_worker():
+    global _thread
+    if _thread is None:
+        _stop.clear()
+        _thread = threading.Thread(target=_run, name="email-outbox", daemon=True)
+        _thread.start()
+
+
+def stop_mail_worker():
+    global _thread
+    if _thread is not None:
+        _stop.set()
+        _wake.set()
+        _thread.join(timeout=SMTP_TIMEOUT)
+        _thread = None
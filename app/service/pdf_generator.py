@@ -1,5 +1,6 @@
 from fpdf import FPDF
 from datetime import datetime
+import json
 import os
 from base64 import b64decode
 from io import BytesIO
@@ -8,12 +9,54 @@ from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
 from datetime import datetime
 import uuid
+from service import pdf_templates
+from service.signature_store import signature_path
+
+# Les devis et contrats sont produits à partir de gabarits précompilés (service/pdf_templates.py) ;
+# PDF_TEMPLATES=false repasse par le rendu FPDF complet.
+USE_TEMPLATES = os.environ.get("PDF_TEMPLATES", "true").lower() in ("1", "true", "yes")
+
+class PDFInvoice(FPDF):
+    def footer(self):
+        # Position à 1.5 cm du bas
+        self.set_y(-15)
+        self.set_font('Arial', 'I', 8)
+        # Numéro de page
+        self.cell(0, 10, f'Page {self.page_no()}', 0, 0, 'C')
 
 
 class PDFGenerator:
 
     @staticmethod
-    def generate_devis(company_name, subscription_id , plan, employees, price_per_employee, consultation_nb, chatbot_msgs, staff_size, signature_date):
+    def document_path(folder, prefix, company_name, subscription_id):
+        # Chemin choisi avant le rendu : la ligne en base peut être créée sans attendre le PDF.
+        filename = f"{prefix}_{company_name}_{subscription_id}_{datetime.now().strftime('%Y%m%d%H%M%S')}.pdf"
+        return os.path.join("uploads", folder, filename)
+
+    @staticmethod
+    def generate_devis(company_name, subscription_id , plan, employees, price_per_employee, consultation_nb, chatbot_msgs, staff_size, signature_date, filepath=None):
+        if not USE_TEMPLATES:
+            return PDFGenerator.generate_devis_fpdf(company_name, subscription_id, plan, employees, price_per_employee, consultation_nb, chatbot_msgs, staff_size, signature_date, filepath)
+
+        total_ht = price_per_employee * employees
+        data = pdf_templates.render(pdf_templates.devis_template(), {
+            "company_name": company_name,
+            "plan": plan,
+            "employees": employees,
+            "date": signature_date.strftime('%d/%m/%Y'),
+            "total_ht": total_ht,
+            "tva": total_ht * 0.2,
+            "total_ttc": total_ht * 1.2,
+            "price_per_employee": price_per_employee,
+            "consultation_nb": consultation_nb,
+            "chatbot_msgs": chatbot_msgs,
+            "staff_size": staff_size,
+        })
+        filepath = filepath or PDFGenerator.document_path("estimates", "devis", company_name, subscription_id)
+        return pdf_templates.write_pdf(filepath, data)
+
+    @staticmethod
+    def generate_devis_fpdf(company_name, subscription_id , plan, employees, price_per_employee, consultation_nb, chatbot_msgs, staff_size, signature_date, filepath=None):
         pdf = FPDF()
         pdf.add_page()
         pdf.set_font("Arial", size=12)
@@ -43,10 +86,9 @@ class PDFGenerator:
         pdf.cell(200, 10, txt=f"Messages chatbot : {chatbot_msgs}", ln=True)
         pdf.cell(200, 10, txt=f"Taille max. d'equipe : {staff_size}", ln=True)
 
-        filename = f"devis_{company_name}_{subscription_id}_{datetime.now().strftime('%Y%m%d%H%M%S')}.pdf"
-        filepath = os.path.join("uploads/estimates", filename)
+        filepath = filepath or PDFGenerator.document_path("estimates", "devis", company_name, subscription_id)
         os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        pdf.output(filepath, 'F')
+        pdf.output(filepath)
         return filepath
 
 
@@ -62,7 +104,58 @@ class PDFGenerator:
         chatbot_msgs,
         signature_date,
         company_signature_base64=None,
-        admin_signature_base64=None
+        admin_signature_base64=None,
+        filepath=None,
+        company_signature=None,
+        admin_signature=None
+    ):
+        if not USE_TEMPLATES:
+            return PDFGenerator.generate_contrat_fpdf(
+                company_name, subscription_id, plan, employees, price_per_employee, consultation_nb, chatbot_msgs,
+                signature_date, company_signature_base64, admin_signature_base64, filepath,
+                company_signature, admin_signature
+            )
+
+        # Les signatures sont des empreintes (service/signature_store.py) ; le base64 reste accepté
+        # pour les rendus planifiés avant leur introduction. Une signature illisible fait échouer
+        # le rendu (job FAILED) plutôt que de produire un contrat non signé.
+        images = {}
+        for name, signature_hash, base64_str in (
+            ("admin_signature", admin_signature, admin_signature_base64),
+            ("company_signature", company_signature, company_signature_base64),
+        ):
+            if signature_hash:
+                images[name] = pdf_templates.signature_image(signature_hash)
+            else:
+                images[name] = pdf_templates.image_from_base64(base64_str)
+
+        data = pdf_templates.render(pdf_templates.contrat_template(), {
+            "date": signature_date.strftime('%d/%m/%Y'),
+            "company_name": company_name,
+            "plan": plan,
+            "employees": employees,
+            "total_ht": price_per_employee * employees,
+            "consultation_nb": consultation_nb,
+            "chatbot_msgs": chatbot_msgs,
+        }, images)
+        filepath = filepath or PDFGenerator.document_path("contracts", "contrat", company_name, subscription_id)
+        return pdf_templates.write_pdf(filepath, data)
+
+    @staticmethod
+    def generate_contrat_fpdf(
+        company_name,
+        subscription_id,
+        plan,
+        employees,
+        price_per_employee,
+        consultation_nb,
+        chatbot_msgs,
+        signature_date,
+        company_signature_base64=None,
+        admin_signature_base64=None,
+        filepath=None,
+        company_signature=None,
+        admin_signature=None
     ):
         pdf = FPDF()
         pdf.add_page()
@@ -92,9 +185,11 @@ class PDFGenerator:
 
         y_position = pdf.get_y()
 
-        def insert_signature(base64_str, x):
-          if base64_str:
-           try:
+        # Une signature illisible fait échouer le rendu plutôt que de produire un contrat non signé.
+        def insert_signature(signature_hash, base64_str, x):
+          if signature_hash:
+            pdf.image(signature_path(signature_hash), x=x, y=pdf.get_y(), w=60)
+          elif base64_str:
             if "," in base64_str:
                 base64_str = base64_str.split(",")[1]
 
@@ -105,18 +200,15 @@ class PDFGenerator:
             image_path = f"/tmp/signature_{subscription_id}_{x}.png"
             background.save(image_path, "PNG")
             pdf.image(image_path, x=x, y=pdf.get_y(), w=60)
-           except Exception as e:
-            print(f"Erreur lors du traitement de la signature : {e}")
 
 
 
-        insert_signature(admin_signature_base64, x=10)
-        insert_signature(company_signature_base64, x=110)
+        insert_signature(admin_signature, admin_signature_base64, x=10)
+        insert_signature(company_signature, company_signature_base64, x=110)
 
-        filename = f"contrat_{company_name}_{subscription_id}_{datetime.now().strftime('%Y%m%d%H%M%S')}.pdf"
-        filepath = os.path.join("uploads/contracts", filename)
+        filepath = filepath or PDFGenerator.document_path("contracts", "contrat", company_name, subscription_id)
         os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        pdf.output(filepath, 'F')
+        pdf.output(filepath)
 
         return filepath
 
@@ -126,7 +218,7 @@ class PDFGenerator:
 
 
     @staticmethod
-    def generate_facture(company_name, subscription_id , plan, total_ht, tva, total_ttc, date_facture):
+    def generate_facture(company_name, subscription_id , plan, total_ht, tva, total_ttc, date_facture, filepath=None):
         pdf = FPDF()
         pdf.add_page()
         pdf.set_font("Arial", size=16)
@@ -141,10 +233,9 @@ class PDFGenerator:
         pdf.cell(200, 10, txt=f"TVA : {tva:.2f} euros", ln=True)
         pdf.cell(200, 10, txt=f"TTC : {total_ttc:.2f} euros", ln=True)
 
-        filename = f"facture_{company_name}_{subscription_id}_{datetime.now().strftime('%Y%m%d%H%M%S')}.pdf"
-        filepath = os.path.join("uploads/bills", filename)
+        filepath = filepath or PDFGenerator.document_path("bills", "facture", company_name, subscription_id)
         os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        pdf.output(filepath, 'F')
+        pdf.output(filepath)
         return filepath
 
     @staticmethod
@@ -157,3 +248,44 @@ class PDFGenerator:
      pdf.cell(200, 10, txt=f"Adresse: {data.get('billing_address')}", ln=1)
      pdf.cell(200, 10, txt=f"Montant: {data.get('amount')} €", ln=1)
      pdf.output(filepath)
+
+    @staticmethod
+    def generate_medical_bill(nom, prenom, adresse, date_facture_obj, kbis, prix_total, filepath):
+        pdf = PDFInvoice('P', 'mm', 'A4')
+        pdf.alias_nb_pages()
+        pdf.add_page()
+
+        pdf.set_font('Helvetica', 'B', 12)
+        pdf.cell(0, 7, "Details de la facture", ln=1, align='L')
+        pdf.set_font('Helvetica', '', 10)
+        pdf.cell(0, 7, f"Client: {prenom} {nom}", ln=1, align='L')
+        pdf.multi_cell(0, 7, f"Adresse: {adresse}", border=0, ln=1, align='L')
+        pdf.cell(0, 7, f"Date: {date_facture_obj.strftime('%d/%m/%Y')}", ln=1, align='L')
+        pdf.cell(0, 7, f"KBIS: {kbis}", ln=1, align='L')
+        pdf.cell(0, 7, f"Montant Total (EUR): {prix_total:.2f}", ln=1, align='L')
+
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        pdf.output(filepath)
+        return filepath
+
+
+# Types de documents rendus par le pool de processus (voir service/render_queue.py)
+RENDERERS = {
+    "estimate": PDFGenerator.generate_devis,
+    "contract": PDFGenerator.generate_contrat,
+    "bill": PDFGenerator.generate_facture,
+    "medical_bill": PDFGenerator.generate_medical_bill,
+}
+
+
+def _decode_value(obj):
+    if "__datetime__" in obj:
+        return datetime.fromisoformat(obj["__datetime__"])
+    return obj
+
+
+def render_document(kind: str, filepath: str, payload: str) -> str:
+    """Point d'entrée exécuté dans un processus du pool : rend un document à partir de ses paramètres JSON."""
+    kwargs = json.loads(payload, object_hook=_decode_value)
+    return RENDERERS[kind](filepath=filepath, **kwargs)
+
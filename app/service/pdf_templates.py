@@ -0,0 +1,209 @@
+"""
+Gabarits PDF précompilés pour les devis et les contrats, rendus avec reportlab.
+
+La couche statique de chaque gabarit (titre, libellés, mentions fixes) est mise en page puis
+convertie une seule fois par processus en opérateurs PDF. Un document ne fait plus que recopier
+cette couche sur un canevas reportlab et y ajouter ses champs variables et ses images.
+La mise en page reproduit celle de PDFGenerator (cellules FPDF de 10 mm, marges de 10 mm,
+police Helvetica standard, non intégrée au fichier).
+"""
+import os
+import re
+from base64 import b64decode
+from dataclasses import dataclass, field
+from functools import lru_cache
+from io import BytesIO
+from PIL import Image
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas
+from service.signature_store import load_signature
+
+K = 72 / 25.4                      # points par millimètre
+PAGE_W, PAGE_H = 210.0, 297.0      # A4, en mm
+MARGIN = 10.0
+CELL_MARGIN = 1.0
+LINE_H = 10.0
+FONT = "Helvetica"
+
+_FIELD = re.compile(r"\{[^}]*\}")
+
+
+@dataclass
+class _Text:
+    x: float
+    baseline: float
+    size: float
+    text: str   # texte fixe, ou gabarit str.format pour un champ variable
+
+
+@dataclass
+class CompiledTemplate:
+    static: str = ""                                 # couche statique, en opérateurs PDF
+    stamps: list = field(default_factory=list)       # champs variables
+    image_slots: dict = field(default_factory=dict)  # nom -> (x, y, largeur) en mm
+
+
+class _Layout:
+    """Calcule une mise en page à la manière de FPDF, en séparant texte fixe et champs."""
+
+    def __init__(self):
+        self.y = MARGIN
+        self.size = 12
+        self.texts = []
+        self.template = CompiledTemplate()
+
+    def set_font(self, size: float):
+        self.size = size
+
+    def ln(self, h: float = LINE_H):
+        self.y += h
+
+    def cell(self, w: float, text: str, ln: bool = True, align: str = "L", x: float = MARGIN):
+        baseline = self.y + LINE_H / 2 + 0.3 * self.size / K
+        match = _FIELD.search(text)
+        head = text[:match.start()] if match else text
+        head_w = stringWidth(head, FONT, self.size) / K
+        if align == "C":
+            if match:
+                raise ValueError("Un champ variable ne peut pas être centré")
+            text_x = x + (w - head_w) / 2
+        else:
+            text_x = x + CELL_MARGIN
+        if head:
+            self.texts.append(_Text(text_x, baseline, self.size, head))
+        if match:
+            self.template.stamps.append(_Text(text_x + head_w, baseline, self.size, text[match.start():]))
+        if ln:
+            self.y += LINE_H
+
+    def multi_cell(self, text: str):
+        width = PAGE_W - 2 * MARGIN - 2 * CELL_MARGIN
+        line = ""
+        for word in text.split(" "):
+            candidate = f"{line} {word}" if line else word
+            if line and stringWidth(candidate, FONT, self.size) / K > width:
+                self.cell(0, line)
+                line = word
+            else:
+                line = candidate
+        if line:
+            self.cell(0, line)
+
+    def image_slot(self, name: str, x: float, w: float):
+        self.template.image_slots[name] = (x, self.y, w)
+
+    def compile(self) -> CompiledTemplate:
+        # Opérateurs produits sur un canevas jetable : Helvetica, seule police utilisée, y porte
+        # le même nom interne (/F1) que sur le canevas de chaque document.
+        text_object = canvas.Canvas(BytesIO()).beginText()
+        _write(text_object, self.texts)
+        self.template.static = text_object.getCode()
+        return self.template
+
+
+def _write(text_object, texts, fields: dict = None):
+    for text in texts:
+        text_object.setFont(FONT, text.size)
+        text_object.setTextOrigin(text.x * K, (PAGE_H - text.baseline) * K)
+        text_object.textOut(text.text.format(**fields) if fields is not None else text.text)
+
+
+def render(template: CompiledTemplate, fields: dict, images: dict = None) -> bytes:
+    """Assemble un document : couche statique + champs variables + images (ImageReader, flux ou image PIL)."""
+    buffer = BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=(PAGE_W * K, PAGE_H * K), pageCompression=1)
+    pdf.setFont(FONT, 12)
+    pdf.addLiteral(template.static)
+    text_object = pdf.beginText()
+    _write(text_object, template.stamps, fields)
+    pdf.drawText(text_object)
+    for name, image in (images or {}).items():
+        if image and name in template.image_slots:
+            x, y, w = template.image_slots[name]
+            reader = image if isinstance(image, ImageReader) else ImageReader(image)
+            image_w, image_h = reader.getSize()
+            h = w * image_h / image_w
+            pdf.drawImage(reader, x * K, (PAGE_H - y - h) * K, w * K, h * K)
+    pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+@lru_cache(maxsize=64)
+def signature_image(signature_hash: str) -> ImageReader:
+    """
+    Signature stockée, décodée une fois par processus : les contrats suivants réutilisent les pixels
+    déjà extraits. 64 entrées, soit quelques dizaines de Mo au plus pour des signatures de 600 px.
+    """
+    reader = ImageReader(BytesIO(load_signature(signature_hash)))
+    reader.getRGBData()
+    return reader
+
+
+def image_from_base64(base64_str: str):
+    """Décode une signature base64 (PNG/JPEG, transparence aplatie sur fond blanc)."""
+    if not base64_str:
+        return None
+    if "," in base64_str:
+        base64_str = base64_str.split(",")[1]
+    image = Image.open(BytesIO(b64decode(base64_str))).convert("RGBA")
+    background = Image.new("RGB", image.size, (255, 255, 255))
+    background.paste(image, mask=image.split()[3])
+    return background
+
+
+# --- Gabarits ---
+@lru_cache(maxsize=None)
+def devis_template() -> CompiledTemplate:
+    layout = _Layout()
+    layout.set_font(16)
+    layout.cell(200, "Devis Entreprise", align="C")
+    layout.ln()
+    layout.set_font(12)
+    layout.cell(200, "Entreprise : {company_name}")
+    layout.cell(200, "Offre choisie : {plan}")
+    layout.cell(200, "Nombre de salaries : {employees}")
+    layout.cell(200, "Date de signature : {date}")
+    layout.ln()
+    layout.cell(200, "Prix HT : {total_ht:.2f} euros")
+    layout.cell(200, "TVA : {tva:.2f} euros")
+    layout.cell(200, "Total TTC : {total_ttc:.2f} euros")
+    layout.ln()
+    layout.cell(200, "Prix annuel / collaborateur : {price_per_employee} euros")
+    layout.cell(200, "Consultations incluses : {consultation_nb}")
+    layout.cell(200, "Messages chatbot : {chatbot_msgs}")
+    layout.cell(200, "Taille max. d'equipe : {staff_size}")
+    return layout.compile()
+
+
+@lru_cache(maxsize=None)
+def contrat_template() -> CompiledTemplate:
+    layout = _Layout()
+    layout.set_font(16)
+    layout.cell(200, "Contrat de Service", align="C")
+    layout.ln()
+    layout.set_font(12)
+    layout.cell(200, "Date : {date}")
+    layout.cell(200, "Entreprise : {company_name}")
+    layout.cell(200, "Durée : 12 mois")
+    layout.cell(200, "Pack : {plan}")
+    layout.cell(200, "Salaries : {employees}")
+    layout.cell(200, "Total HT : {total_ht:.2f} euros")
+    layout.cell(200, "Consultations : {consultation_nb}")
+    layout.cell(200, "Chatbot : {chatbot_msgs}")
+    layout.ln()
+    layout.multi_cell("Business Care s'engage à fournir l'accès à la plateforme selon les termes du pack sélectionné.")
+    layout.ln()
+    layout.cell(95, "Signature Business Care :", ln=False)
+    layout.cell(95, "Signature Client :", x=MARGIN + 95)
+    layout.image_slot("admin_signature", x=10, w=60)
+    layout.image_slot("company_signature", x=110, w=60)
+    return layout.compile()
+
+
+def write_pdf(filepath: str, data: bytes) -> str:
+    os.makedirs(os.path.dirname(filepath) or ".", exist_ok=True)
+    with open(filepath, "wb") as f:
+        f.write(data)
+    return filepath
@@ -0,0 +1,98 @@
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from queries.render_job_queries import RenderJobQuery
+from service.pdf_generator import render_document
+from service import document_store
+from service.logging import logging
+
+logger = logging.getLogger(__name__)
+
+# Les PDF sont rendus dans un pool de processus : la mise en page (CPU) n'occupe ni la boucle
+# d'événements ni les threads de requête. L'état de chaque rendu est suivi dans render_jobs.
+_executor = None
+_executor_lock = threading.Lock()
+_ready = {}
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    raise TypeError(f"Type non sérialisable : {type(value).__name__}")
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=int(os.environ.get("PDF_RENDER_WORKERS", 2)),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+def submit_render(kind: str, file: str, owner_id: str = None, output_path: str = None, **kwargs) -> str:
+    """
+    Enregistre un job de rendu puis le confie au pool ; renvoie l'identifiant du job.
+    `file` est la référence stockée avec le document (suivi du statut), `output_path` le
+    chemin écrit sur disque s'il diffère.
+    """
+    output_path = output_path or file
+    payload = json.dumps(kwargs, default=_encode_value)
+    job_id = RenderJobQuery().create_job(kind, file, output_path, payload, owner_id)
+    _dispatch(job_id, kind, output_path, payload)
+    return job_id
+
+
+def _dispatch(job_id: str, kind: str, output_path: str, payload: str):
+    _ready[job_id] = threading.Event()
+    future = _get_executor().submit(render_document, kind, output_path, payload)
+    future.add_done_callback(lambda f: _finish(job_id, output_path, f))
+
+
+def _finish(job_id: str, output_path: str, future):
+    if future.cancelled():
+        # Arrêt de l'API : le job reste PENDING et sera relancé au prochain démarrage
+        _ready.pop(job_id, None)
+        return
+    error = future.exception()
+    try:
+        if error is None:
+            # Rangé dans le stockage par empreinte avant d'être annoncé comme prêt
+            try:
+                document_store.ingest(output_path)
+            except Exception as e:
+                logger.error("Render job %s: document not stored by content hash: %s", job_id, e)
+            RenderJobQuery().update_job_status(job_id, "DONE")
+        else:
+            logger.error("Render job %s failed: %s", job_id, error)
+            RenderJobQuery().update_job_status(job_id, "FAILED", str(error))
+    finally:
+        event = _ready.pop(job_id, None)
+        if event:
+            event.set()
+
+
+def wait_for_render(job_id: str, timeout: float) -> bool:
+    """Bloque jusqu'à la fin d'un rendu lancé par ce processus ; False si le job n'est pas suivi ici."""
+    event = _ready.get(job_id)
+    return event.wait(timeout) if event else False
+
+
+def resume_pending_renders():
+    for job in RenderJobQuery().read_pending_jobs():
+        if job.job_id in _ready:
+            continue
+        _dispatch(job.job_id, job.kind, job.output_path, job.payload)
+
+
+def shutdown_render_pool():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
@@ -0,0 +1,84 @@
+"""
+Stockage des signatures par empreinte de contenu.
+
+Une signature base64 est décodée une seule fois : aplatie sur fond blanc, réduite puis enregistrée
+en PNG sous uploads/signatures/<sha256>.png. Les contrats ne conservent que cette empreinte, et chaque
+processus de rendu décode ce PNG une seule fois : ni décodage ni redimensionnement à chaque rendu.
+"""
+import hashlib
+import os
+import re
+from base64 import b64decode
+from binascii import Error as Base64Error
+from io import BytesIO
+from PIL import Image, UnidentifiedImageError
+
+SIGNATURE_DIR = os.environ.get("SIGNATURE_DIR", os.path.join("uploads", "signatures"))
+# Largeur maximale en pixels : la signature est imprimée sur 60 mm, soit ~600 px à 250 dpi.
+SIGNATURE_MAX_WIDTH = int(os.environ.get("SIGNATURE_MAX_WIDTH", 600))
+
+_HASH = re.compile(r"^[0-9a-f]{64}$")
+
+
+class InvalidSignature(ValueError):
+    pass
+
+
+def is_signature_hash(value) -> bool:
+    return isinstance(value, str) and bool(_HASH.match(value))
+
+
+def signature_path(signature_hash: str) -> str:
+    return os.path.join(SIGNATURE_DIR, f"{signature_hash}.png")
+
+
+def store_signature(base64_str: str) -> str:
+    """Enregistre une signature base64 (data URL acceptée) et renvoie son empreinte."""
+    if "," in base64_str:
+        base64_str = base64_str.split(",", 1)[1]
+    try:
+        raw = b64decode(base64_str, validate=True)
+    except (Base64Error, ValueError) as e:
+        raise InvalidSignature(f"Signature base64 invalide : {e}")
+
+    # L'empreinte porte sur l'image reçue : un envoi identique ne relance aucun traitement.
+    signature_hash = hashlib.sha256(raw).hexdigest()
+    path = signature_path(signature_hash)
+    if os.path.exists(path):
+        return signature_hash
+
+    try:
+        image = Image.open(BytesIO(raw)).convert("RGBA")
+    except (UnidentifiedImageError, OSError) as e:
+        raise InvalidSignature(f"Image de signature illisible : {e}")
+
+    background = Image.new("RGB", image.size, (255, 255, 255))
+    background.paste(image, mask=image.split()[3])
+    if background.width > SIGNATURE_MAX_WIDTH:
+        height = max(1, round(background.height * SIGNATURE_MAX_WIDTH / background.width))
+        background = background.resize((SIGNATURE_MAX_WIDTH, height), Image.LANCZOS)
+
+    os.makedirs(SIGNATURE_DIR, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    background.save(tmp_path, "PNG", optimize=True)
+    os.replace(tmp_path, path)
+    return signature_hash
+
+
+def signature_ref(value):
+    """Normalise une signature en base (empreinte, ou base64 des contrats plus anciens) en empreinte."""
+    if not value:
+        return None
+    if is_signature_hash(value):
+        return value
+    return store_signature(value)
+
+
+def load_signature(signature_hash: str) -> bytes:
+    """Lit le PNG stocké (le rendu par gabarits garde l'image décodée, voir pdf_templates.signature_image)."""
+    with open(signature_path(signature_hash), "rb") as f:
+        data = f.read()
+
+    if data[:8] != b"\x89PNG\r\n\x1a\n":
+        raise InvalidSignature(f"Fichier de signature invalide : {signature_hash}")
+    return data
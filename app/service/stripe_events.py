@@ -0,0 +1,217 @@
+import json
+import os
+import stripe
+from datetime import datetime, timedelta, timezone
+from fastapi import HTTPException
+from queries.stripe_event_queries import StripeEventQuery
+from queries.company_queries import CompanyQuery
+from queries.collaborator_queries import CollaboratorQuery
+from queries.admin_queries import AdminQuery
+from models.database.medical_appointments_model import MedicalAppointmentTable
+from service.collaborator import Collaborator
+from service.mailer import enqueue_email
+from service.logging import logging
+
+logger = logging.getLogger(__name__)
+
+# Le webhook ne fait que vérifier la signature et enregistrer l'événement (table stripe_events) ;
+# le traitement est fait ici, hors requête. Chaque traitement est idempotent : un événement
+# rejoué, ou renvoyé par Stripe sous un autre identifiant, ne repaie ni ne recrée rien.
+STRIPE_EVENTS_BATCH = int(os.environ.get("STRIPE_EVENTS_BATCH", 20))
+STRIPE_EVENTS_MAX_ATTEMPTS = int(os.environ.get("STRIPE_EVENTS_MAX_ATTEMPTS", 5))
+STRIPE_EVENTS_RETRY_BASE = float(os.environ.get("STRIPE_EVENTS_RETRY_BASE", 60))
+
+
+class PermanentEventError(Exception):
+    """Événement inexploitable : inutile de réessayer."""
+
+
+def retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=STRIPE_EVENTS_RETRY_BASE * 2 ** (attempts - 1))
+
+
+# --- checkout.session.completed ---
+# Les traitements retrouvent l'entreprise ou le salarié par les identifiants des métadonnées, jamais
+# par le token de la session d'origine : déconnecté ou expiré, il ferait échouer un paiement encaissé.
+def _company_subscription_paid(metadata: dict, checkout_session: dict):
+    company_subscription_id = metadata.get("company_subscription_id")
+    if not company_subscription_id:
+        raise PermanentEventError("Missing company_subscription_id in metadata")
+
+    query = CompanyQuery()
+    bill = query.read_bill_by_subscription_id(company_subscription_id)
+    if bill is None:
+        raise PermanentEventError(f"No bill for company subscription ID: {company_subscription_id}")
+    company_id = bill.company_id
+    if metadata.get("company_id") not in (None, company_id):
+        raise PermanentEventError(f"Company subscription {company_subscription_id} does not belong to {metadata['company_id']}")
+    already_payed = bill.payed
+
+    if not already_payed:
+        bill = query.update_bill2(company_id, company_subscription_id, {"payed": True, "payed_date": datetime.now(timezone.utc)})
+    query.update_company_subscription_status(company_id, company_subscription_id, "ACTIVE")
+
+    # La facture n'est envoyée qu'au passage à « payée »
+    if not already_payed:
+        company = query.read_company_by_id(company_id)
+        subject = f"Votre facture : {company_subscription_id}"
+        html = f"Voici votre facture pour l abbonement {company_subscription_id}"
+        enqueue_email(company.email, subject, html, bill.file)
+
+
+def _medical_appointment_paid(metadata: dict, checkout_session: dict):
+    appointment_id = metadata.get("appointment_id")
+    contractor_id = metadata.get("contractor_id")
+    collaborator_id = metadata.get("collaborator_id")
+    appointment_dt_str = metadata.get("appointment_datetime_utc")
+    appointment_type = metadata.get("appointment_type")
+
+    if not all([appointment_id, contractor_id, collaborator_id, appointment_dt_str, appointment_type]):
+        raise PermanentEventError("Missing one or more metadata fields in Stripe event")
+
+    try:
+        appointment_dt = datetime.fromisoformat(appointment_dt_str)
+    except ValueError:
+        raise PermanentEventError(f"Invalid date format for appointment_dt: {appointment_dt_str}")
+
+    collaborator = Collaborator.from_id(CollaboratorQuery(), collaborator_id)
+    if collaborator is None:
+        raise PermanentEventError(f"No collaborator {collaborator_id}")
+    if collaborator.query.read_medical_appointment_by_appointment_id(appointment_id):
+        logging.info(f"Medical appointment {appointment_id} already created")
+        return
+
+    contractor = collaborator.query.read_contractor_by_id(contractor_id)
+    if not contractor:
+        raise PermanentEventError(f"No contractor {contractor_id}")
+    file = collaborator.medical_bill_file_name(contractor.firstname, contractor.lastname)
+    appointment = MedicalAppointmentTable(
+        medical_appointment_id=appointment_id,
+        contractor_id=contractor_id,
+        collaborator_id=collaborator_id,
+        medical_appointment_date=appointment_dt,
+        appointment_type=appointment_type,
+        creation_date=datetime.now(timezone.utc),
+        status='PAYED',
+        price=contractor.service_price,
+        bill_file=file,
+        place=appointment_type
+    )
+    if collaborator.query.reserve_medical_appointment(appointment, collaborator.entitlement_period(appointment_dt)) is None:
+        if collaborator.query.read_medical_appointment_by_appointment_id(appointment_id):
+            return
+        # Créneau pris entre la création de la session Checkout et le paiement : pas de double
+        # rendez-vous, le paiement est remboursé et le salarié comme les administrateurs sont prévenus.
+        _refund_taken_slot(checkout_session, appointment_id, collaborator, contractor, appointment_dt)
+        return
+
+    address = f"{contractor.street} - {contractor.city} - {contractor.country}"
+    collaborator.create_medical_appointment_bill(
+        contractor.firstname,
+        contractor.lastname,
+        address,
+        datetime.now(timezone.utc),
+        contractor.registration_number,
+        contractor.service_price,
+        nom_fichier_pdf=file
+    )
+    logging.info(f"Successfully created medical appointment: {appointment_id}")
+
+
+def _refund_taken_slot(checkout_session: dict, appointment_id: str, collaborator: Collaborator, contractor, appointment_dt: datetime):
+    payment_intent = checkout_session.get("payment_intent")
+    if not payment_intent:
+        raise PermanentEventError(f"Slot taken for appointment {appointment_id} and no payment_intent to refund")
+
+    # Remboursement unique même si l'événement est rejoué ; le virement au prestataire est annulé avec lui
+    if not stripe.Refund.list(payment_intent=payment_intent, limit=1).data:
+        stripe.Refund.create(
+            payment_intent=payment_intent,
+            reverse_transfer=True,
+            metadata={"appointment_id": appointment_id, "reason": "slot-taken"},
+            idempotency_key=f"slot-taken-{appointment_id}",
+        )
+    logger.warning("Slot taken for paid appointment %s, payment %s refunded", appointment_id, payment_intent)
+
+    when = appointment_dt.strftime("%d/%m/%Y %H:%M")
+    enqueue_email(
+        collaborator.email,
+        "Votre rendez-vous n'a pas pu être réservé",
+        f"Le créneau du {when} avec {contractor.firstname} {contractor.lastname} a été réservé par une autre "
+        f"personne pendant votre paiement. Vous avez été intégralement remboursé, merci de choisir un autre créneau.",
+    )
+    for email in AdminQuery().read_admin_emails():
+        enqueue_email(
+            email,
+            f"Rendez-vous remboursé : {appointment_id}",
+            f"Le créneau du {when} chez {contractor.firstname} {contractor.lastname} était déjà pris au paiement "
+            f"de {collaborator.firstname} {collaborator.lastname} ({collaborator.email}). "
+            f"Le paiement {payment_intent} a été remboursé.",
+        )
+
+
+_CHECKOUT_ORIGINS = {
+    "company-subscription": _company_subscription_paid,
+    "book-medical-appointment": _medical_appointment_paid,
+}
+
+
+def _checkout_session_completed(event: dict):
+    checkout_session = event["data"]["object"]
+    metadata = checkout_session.get("metadata") or {}
+    origin = metadata.get("origin")
+    handler = _CHECKOUT_ORIGINS.get(origin)
+    if handler is None:
+        raise PermanentEventError(f"Unknown origin in metadata: {origin}")
+    handler(metadata, checkout_session)
+
+
+HANDLERS = {
+    "checkout.session.completed": _checkout_session_completed,
+}
+
+
+def is_handled(event_type: str) -> bool:
+    return event_type in HANDLERS
+
+
+# --- Traitement ---
+def _process(query: StripeEventQuery, event: dict) -> bool:
+    try:
+        handler = HANDLERS.get(event["type"])
+        if handler is None:
+            raise PermanentEventError(f"Unhandled event type: {event['type']}")
+        handler(json.loads(event["payload"]))
+    except Exception as e:
+        permanent = isinstance(e, PermanentEventError) or (
+            isinstance(e, HTTPException) and e.status_code < 500
+        )
+        failed = permanent or event["attempts"] >= STRIPE_EVENTS_MAX_ATTEMPTS
+        error = e.detail if isinstance(e, HTTPException) else str(e)
+        logger.error("Stripe event %s (attempt %s) failed: %s", event["event_id"], event["attempts"], error)
+        query.mark_error(event["event_id"], str(error), failed)
+        return False
+    query.mark_processed(event["event_id"])
+    return True
+
+
+def process_pending_events() -> int:
+    """Traite les événements en attente ; renvoie le nombre d'événements traités avec succès."""
+    query = StripeEventQuery()
+    processed = 0
+    while True:
+        batch = query.claim_due(STRIPE_EVENTS_BATCH, retry_delay)
+        processed += sum(_process(query, event) for event in batch)
+        if len(batch) < STRIPE_EVENTS_BATCH:
+            return processed
+
+
+def replay_event(event_id: str):
+    """Remet un événement en file puis traite celui-ci seulement ; renvoie son état final."""
+    query = StripeEventQuery()
+    if query.requeue(event_id) is None:
+        return None
+    # Réservé comme par le job : s'il le traite au même moment, l'événement n'est pas traité deux fois
+    for event in query.claim_due(1, retry_delay, event_id=event_id):
+        _process(query, event)
+    return query.read_event(event_id)
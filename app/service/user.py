@@ -16,15 +16,10 @@ from models.api.login import LoginRequest
 from models.api.sign_in import SignInRequest
 from models.local.token import TokenData
 from models.local.user import UserSchema
+from models.local.session import SessionSchema
 from service.logging import logging
-
-
-
-from email.mime.base import MIMEBase
-from email import encoders
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-import smtplib
+from service.cache import session_cache
+from service.mailer import enqueue_email
 
 
 logger = logging.getLogger(__name__)
@@ -37,8 +32,6 @@ class User:
             if token and len(token.split('.')) == 3:
                 self.query = query
 
-                self.query.update_expired_token()
-
                 self.token = token
                 self.decrypt_token()
 
@@ -47,7 +40,7 @@ class User:
                 if self.token_exp < datetime.now(timezone.utc):
                     raise HTTPException(status_code=401, detail="Token is expired")
 
-                res = self.query.read_user_by_id(self.user_id)
+                res = self.load_cached("user", lambda: self.query.read_user_by_id(self.user_id))
                 if res is None:
                     raise HTTPException(status_code=401, detail="Token is invalid")
 
@@ -80,21 +73,17 @@ class User:
             self.token = None
 
     def login(self, login_data: LoginRequest):
-        self.query.update_expired_token()
-
-        req = self.query.read_user_by_email(login_data.email)
+        req = self.query.read_user_with_function_by_email(login_data.email)
 
         if not req:
             raise HTTPException(status_code=401, detail="Wrong password or email")
 
+        user, self.function, function_data = req
 
-        self.user_id = req.user_id
-        self.password = req.password
-        self.email = req.email
-        self.verified = req.verified
-
-        self.function = self.query.read_user_function(self.user_id)
-
+        self.user_id = user.user_id
+        self.password = user.password
+        self.email = user.email
+        self.verified = user.verified
 
         if self.function is None:
             raise HTTPException(status_code=401, detail="Wrong password or email")
@@ -127,6 +116,13 @@ class User:
         if res is None:
             raise HTTPException(status_code=500, detail="Server error")
 
+        # Le rôle est dans le token et la ligne de rôle vient d'être lue : on pré-remplit le cache
+        # pour que le premier appel avec ce token ne refasse pas ces lectures.
+        entry = {"user_id": self.user_id, "session": SessionSchema.from_orm(res), "user": user}
+        if function_data is not None:
+            entry[self.function] = function_data
+        session_cache.set(self.session_id, entry)
+
         self.create_access_token()
         if not self.token:
             raise HTTPException(status_code=500, detail="Server error")
@@ -172,17 +168,42 @@ class User:
         self.session_id = token_data.session_id
         self.verified = token_data.verified
 
-        res = self.query.read_user_session_by_session_id(self.session_id)
-        if not res or not hasattr(res, "user_id"):
-          raise HTTPException(status_code=401, detail="Token is invalid")
+        entry = session_cache.get(self.session_id)
+        if entry is not None and entry["user_id"] == self.user_id:
+            res = entry["session"]
+        else:
+            entry = None
+            generation = session_cache.generation()
+            res = self.query.read_user_session_by_session_id(self.session_id)
+            if not res or not hasattr(res, "user_id"):
+              raise HTTPException(status_code=401, detail="Token is invalid")
 
-        if res.user_id != self.user_id:
-            logger.warning("User id in token and in session don't match : %s %s", self.user_id, res.user_id)
-            raise HTTPException(status_code=401, detail="Token is invalid")
+            if res.user_id != self.user_id:
+                logger.warning("User id in token and in session don't match : %s %s", self.user_id, res.user_id)
+                raise HTTPException(status_code=401, detail="Token is invalid")
 
         if res.revoked is True:
             raise HTTPException(status_code=401, detail="Token is revoked requset new token")
 
+        exp_date = res.exp_date if res.exp_date.tzinfo else res.exp_date.replace(tzinfo=timezone.utc)
+        if exp_date < datetime.now(timezone.utc):
+            raise HTTPException(status_code=401, detail="Token is expired")
+
+        if entry is None:
+            session_cache.set(self.session_id, {"user_id": res.user_id, "session": res}, generation=generation)
+
+    def load_cached(self, name: str, loader):
+        """Renvoie la donnée `name` du cache de session, ou la charge via `loader` et la met en cache."""
+        entry = session_cache.get(self.session_id) if self.session_id else None
+        if entry is not None and name in entry:
+            return entry[name]
+
+        generation = session_cache.generation()
+        value = loader()
+        if entry is not None and value:
+            session_cache.set_field(self.session_id, name, value, generation=generation)
+        return value
+
     def sign_in(self, sign_in_data: SignInRequest):
 
         existing_user_by_email = self.query.read_user_by_email(sign_in_data.email)
@@ -286,48 +307,7 @@ class User:
             return code
 
     def send_email(self, subject: str, html: str, attachment_path: str = None):
-
-        sender_email = f'noreply@{os.getenv("DOMAIN")}'
-
-        recipient_email = self.email
-
-        logging.info(
-            f"Préparation de l'envoi d'e-mail via SMTP à {recipient_email} depuis {sender_email}")
-
-        msg = MIMEMultipart('alternative')
-        msg['Subject'] = subject
-        msg['From'] = sender_email
-        msg['To'] = recipient_email
-
-        part_html = MIMEText(html, 'html', 'utf-8')
-        msg.attach(part_html)
-
-        if attachment_path is not None:
-            try:
-                with open(attachment_path, "rb") as file:
-                    part = MIMEBase("application", "octet-stream")
-                    part.set_payload(file.read())
-                encoders.encode_base64(part)
-                part.add_header("Content-Disposition", f"attachment; filename={os.path.basename(attachment_path)}")
-                msg.attach(part)
-            except Exception as e:
-                logging.error(f"Erreur lors de l'attachement du fichier: {e}")
-                raise HTTPException(status_code=500, detail="Erreur lors de l'attachement du fichier.")
-
-        try:
-            logging.debug("Connexion au serveur SMTP")
-            with smtplib.SMTP('postfix', '25') as server:
-                logging.debug("Tentative de démarrage de STARTTLS...")
-                server.starttls()
-                logging.debug("STARTTLS réussi.")
-                logging.debug(f"Envoi de l'e-mail à {recipient_email}")
-                server.sendmail(sender_email, recipient_email, msg.as_string())
-                logging.info(f"E-mail envoyé avec succès à {recipient_email}")
-                return True
-        except smtplib.SMTPException as e:
-            logging.error(f"Erreur SMTP lors de l'envoi de l'e-mail à {recipient_email}: {e}")
-            raise HTTPException(status_code=500, detail="Server error")
-        except Exception as e:
-            logging.error(f"Erreur inattendue lors de l'envoi de l'e-mail : {e}")
-            raise HTTPException(status_code=500, detail="Server error")
+        # Mise en file dans l'outbox : l'envoi SMTP est fait par le thread de service/mailer.py
+        enqueue_email(self.email, subject, html, attachment_path)
+        return True
 
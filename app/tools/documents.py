@@ -0,0 +1,55 @@
+"""
+Outils d'exploitation du stockage des documents par empreinte (service/document_store.py).
+
+Usage, depuis app/ :
+    python -m tools.documents ingest [--dry-run]
+    python -m tools.documents gc
+
+`ingest` range dans le stockage les documents écrits avant sa mise en place : seuls les fichiers
+encore utilisés par un devis, contrat, facture, rendez-vous ou contrat prestataire sont déplacés,
+les autres restent en place. `gc` lance immédiatement le nettoyage fait par la tâche périodique.
+"""
+import argparse
+import os
+
+
+def _ingest(args):
+    from queries.document_store_queries import DocumentStoreQuery
+    from service import document_store
+
+    moved = missing = 0
+    for file in sorted(DocumentStoreQuery().read_live_files()):
+        path = os.path.join(document_store.DOCUMENTS_ROOT, *file.split("/"))
+        if not os.path.isfile(path):
+            # Déjà dans le stockage, ou fichier perdu
+            missing += document_store.locate(file) is None
+            continue
+        if not args.dry_run:
+            document_store.ingest(path)
+        moved += 1
+        print(file)
+    print(f"{moved} document(s) rangé(s), {missing} introuvable(s)")
+
+
+def _gc(args):
+    from service.document_store import collect_garbage
+    print(collect_garbage())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest_parser = commands.add_parser("ingest", help="range les documents existants dans le stockage")
+    ingest_parser.add_argument("--dry-run", action="store_true")
+    ingest_parser.set_defaults(func=_ingest)
+
+    gc_parser = commands.add_parser("gc", help="libère les références orphelines et supprime les contenus inutilisés")
+    gc_parser.set_defaults(func=_gc)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
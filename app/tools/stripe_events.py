@@ -0,0 +1,95 @@
+"""
+Outils d'exploitation des événements Stripe enregistrés par /checkout/webhook.
+
+Usage, depuis app/ :
+    python -m tools.stripe_events list [--status FAILED]
+    python -m tools.stripe_events replay <event_id>
+    python -m tools.stripe_events fixture --origin company-subscription \\
+        --metadata company_id=<id> company_subscription_id=<id> [--url http://localhost:8000/checkout/webhook]
+
+`fixture` construit un événement checkout.session.completed, le signe avec STRIPE_WEBHOOK_SECRET
+comme le ferait Stripe (en-tête Stripe-Signature) et l'envoie au webhook : de quoi tester la chaîne
+complète en local, rejouer le même identifiant (--event-id) ou vérifier le dédoublonnage.
+"""
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import time
+import uuid
+import httpx
+
+
+def sign_payload(payload: bytes, secret: str, timestamp: int = None) -> str:
+    timestamp = timestamp or int(time.time())
+    signed = f"{timestamp}.".encode() + payload
+    signature = hmac.new(secret.encode(), signed, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={signature}"
+
+
+def build_event(origin: str, metadata: dict, event_id: str = None) -> dict:
+    return {
+        "id": event_id or f"evt_local_{uuid.uuid4().hex}",
+        "object": "event",
+        "type": "checkout.session.completed",
+        "created": int(time.time()),
+        "data": {"object": {
+            "id": f"cs_local_{uuid.uuid4().hex}",
+            "object": "checkout.session",
+            "metadata": {"origin": origin, **metadata},
+        }},
+    }
+
+
+def _list(args):
+    from queries.stripe_event_queries import StripeEventQuery
+    for event in StripeEventQuery().read_events(args.status, args.limit):
+        print(f"{event.event_id}\t{event.type}\t{event.status}\t{event.attempts}\t{event.received_at}\t{event.last_error or ''}")
+
+
+def _replay(args):
+    from service.stripe_events import replay_event
+    event = replay_event(args.event_id)
+    if event is None:
+        raise SystemExit(f"Événement introuvable : {args.event_id}")
+    print(f"{event.event_id}\t{event.status}\t{event.last_error or ''}")
+
+
+def _fixture(args):
+    if not args.secret:
+        raise SystemExit("STRIPE_WEBHOOK_SECRET absent : impossible de signer l'événement")
+    metadata = dict(item.split("=", 1) for item in args.metadata)
+    payload = json.dumps(build_event(args.origin, metadata, args.event_id)).encode()
+    headers = {"Stripe-Signature": sign_payload(payload, args.secret), "Content-Type": "application/json"}
+    response = httpx.post(args.url, content=payload, headers=headers)
+    print(response.status_code, response.text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = commands.add_parser("list", help="derniers événements reçus")
+    list_parser.add_argument("--status")
+    list_parser.add_argument("--limit", type=int, default=50)
+    list_parser.set_defaults(func=_list)
+
+    replay_parser = commands.add_parser("replay", help="remet un événement en file et le traite")
+    replay_parser.add_argument("event_id")
+    replay_parser.set_defaults(func=_replay)
+
+    fixture_parser = commands.add_parser("fixture", help="envoie un événement signé localement au webhook")
+    fixture_parser.add_argument("--origin", required=True, choices=["company-subscription", "book-medical-appointment"])
+    fixture_parser.add_argument("--metadata", nargs="*", default=[], help="paires clé=valeur ajoutées aux métadonnées")
+    fixture_parser.add_argument("--event-id")
+    fixture_parser.add_argument("--url", default="http://localhost:8000/checkout/webhook")
+    fixture_parser.add_argument("--secret", default=os.environ.get("STRIPE_WEBHOOK_SECRET"))
+    fixture_parser.set_defaults(func=_fixture)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -14,6 +14,7 @@ import {
 } from "antd";
 import { motion } from "framer-motion";
 import { useRouter } from "next/router";
+import { fetchAdminPage } from "../utils/fetchAdminPage";
 import { EyeOutlined, DeleteOutlined, PlusOutlined } from "@ant-design/icons";
 import dayjs from "dayjs";
 
@@ -23,6 +24,8 @@ const { TextArea } = Input;
 const AdminAssociations = () => {
   const [ngos, setNgos] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [showForm, setShowForm] = useState(false);
   const [form] = Form.useForm();
   const router = useRouter();
@@ -114,23 +117,20 @@ const AdminAssociations = () => {
 
   const handleRetour = () => router.push("/admin/accueil");
 
-  const fetchNgos = async () => {
+  // Sans curseur : recharge la première page ; avec : ajoute la page suivante
+  const fetchNgos = async (after) => {
     const token = localStorage.getItem("token");
     if (!token) return;
+    setLoadingMore(Boolean(after));
     try {
-      const res = await fetch(`${process.env.NEXT_PUBLIC_API_URL}/admin/ngos`, {
-        headers: {
-          "Content-Type": "application/json",
-          token,
-        },
-      });
-      if (!res.ok) throw new Error("Erreur lors du chargement des associations");
-      const data = await res.json();
-      setNgos(data);
+      const page = await fetchAdminPage("/admin/ngos", token, { after });
+      setNgos((current) => (after ? [...current, ...page.rows] : page.rows));
+      setNextCursor(page.nextCursor);
     } catch (err) {
-      message.error(err.message);
+      message.error("Erreur lors du chargement des associations");
     } finally {
       setLoading(false);
+      setLoadingMore(false);
     }
   };
 
@@ -288,6 +288,13 @@ const AdminAssociations = () => {
               pagination={{ pageSize: 10 }}
               scroll={{ x: "max-content" }}
             />
+            {nextCursor && (
+              <div style={{ marginTop: "16px", textAlign: "center" }}>
+                <Button onClick={() => fetchNgos(nextCursor)} loading={loadingMore}>
+                  Charger plus
+                </Button>
+              </div>
+            )}
             <div style={{ marginTop: "30px", textAlign: "center" }}>
               <Button type="primary" onClick={() => setShowForm(!showForm)}>
                 {showForm ? "Annuler" : "Ajouter une association"}
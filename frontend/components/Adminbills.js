@@ -5,6 +5,8 @@ import { useRouter } from "next/router";
 import { motion } from "framer-motion";
 import { DeleteOutlined } from "@ant-design/icons";
 import { Dropdown, Menu } from "antd";
+import { openDocument } from "../utils/openDocument";
+import { useAdminList } from "../utils/fetchAdminPage";
 const { Title } = Typography;
 
 
@@ -15,10 +17,32 @@ return cookie ? cookie.split("=")[1] : null;
 };
 
 export default function AllBills() {
-  const [bills, setBills] = useState([]);
-  const [loading, setLoading] = useState(true);
   const [filterStatus, setFilterStatus] = useState("all");
   const router = useRouter();
+  const token =
+    typeof document !== "undefined" ? getCookie("access_token") : null;
+
+  // Filtre payée / non payée fait par l'API : le changer recharge la première page
+  const {
+    rows: bills,
+    setRows: setBills,
+    nextCursor,
+    loading,
+    loadingMore,
+    loadMore,
+  } = useAdminList(
+    "/admin/bills",
+    token,
+    { payed: filterStatus === "all" ? null : filterStatus === "payed" },
+    (error) => {
+      console.error("Erreur lors de la récupération des factures :", error);
+      message.error("Impossible de charger les factures");
+    }
+  );
+
+  useEffect(() => {
+    if (!token) message.warning("Aucun token trouvé. Connexion requise.");
+  }, []);
 
   const handleRetour = () => {
     router.push("/admin/accueil");
@@ -37,47 +61,6 @@ export default function AllBills() {
     />
   );
 
-  // Filtrer les données en fonction de l'état sélectionné
-  const filteredBills = bills.filter((bill) => {
-    if (filterStatus === "payed") return bill.payed === true;
-    if (filterStatus === "not_payed") return bill.payed === false;
-    return true; // "all"
-  });
-  useEffect(() => {
-    const fetchBills = async () => {
-      const token = getCookie("access_token");
-      if (!token) {
-        message.warning("Aucun token trouvé. Connexion requise.");
-        setLoading(false);
-        return;
-      }
-
-      try {
-        const res = await fetch(
-          `${process.env.NEXT_PUBLIC_API_URL}/admin/bills`,
-          {
-            headers: {
-              token,
-              accept: "application/json",
-            },
-          }
-        );
-
-        if (!res.ok) throw new Error("Erreur réseau");
-
-        const data = await res.json();
-        setBills(data);
-      } catch (error) {
-        console.error("Erreur lors de la récupération des factures :", error);
-        message.error("Impossible de charger les factures");
-      } finally {
-        setLoading(false);
-      }
-    };
-
-    fetchBills();
-  }, []);
-
   const columns = [
     { title: "Entreprise", dataIndex: "company_name", key: "company_name" },
     {
@@ -108,12 +91,8 @@ export default function AllBills() {
         <Button
           icon={<EyeOutlined />}
           onClick={() =>
-            window.open(
-              `${process.env.NEXT_PUBLIC_API_URL}/${record.file.replace(
-                /^\/+/,
-                ""
-              )}`,
-              "_blank"
+            openDocument(record.file, getCookie("access_token")).catch((error) =>
+              alert(error.message)
             )
           }
         />
@@ -224,7 +203,7 @@ export default function AllBills() {
 
         <Table
           columns={columns}
-          dataSource={filteredBills.map((b) => ({
+          dataSource={bills.map((b) => ({
             ...b,
             key: b.company_subscription_id,
           }))}
@@ -232,6 +211,13 @@ export default function AllBills() {
           pagination={{ pageSize: 10 }}
           bordered
         />
+        {nextCursor && (
+          <div style={{ textAlign: "center", marginTop: 16 }}>
+            <Button onClick={loadMore} loading={loadingMore}>
+              Charger plus
+            </Button>
+          </div>
+        )}
       </Layout.Content>
     </Layout>
   );
@@ -3,12 +3,14 @@ import { Table, Button, message, Modal, Input } from "antd";
 import { Layout } from "antd";
 import { motion } from "framer-motion";
 import { useRouter } from "next/router";
+import { fetchAdminPage } from "../utils/fetchAdminPage";
 
 export default function AdminCollaborators() {
   const [collaborators, setCollaborators] = useState([]);
   const [loading, setLoading] = useState(true);
   const [editing, setEditing] = useState(null);
   const [editValues, setEditValues] = useState({});
+  const [nextCursor, setNextCursor] = useState(null);
   const token =
     typeof window !== "undefined" ? localStorage.getItem("token") : null;
 
@@ -16,17 +18,13 @@ export default function AdminCollaborators() {
 
   const handleRetour = () => router.push("/admin/accueil");
 
-  const fetchCollaborators = async () => {
+  // Sans curseur : recharge la première page ; avec : ajoute la page suivante
+  const fetchCollaborators = async (after) => {
+    setLoading(true);
     try {
-      const res = await fetch(
-        `${process.env.NEXT_PUBLIC_API_URL}/admin/collaborators`,
-        {
-          headers: { token },
-        }
-      );
-      if (!res.ok) throw new Error();
-      const data = await res.json();
-      setCollaborators(data);
+      const page = await fetchAdminPage("/admin/collaborators", token, { after });
+      setCollaborators((current) => (after ? [...current, ...page.rows] : page.rows));
+      setNextCursor(page.nextCursor);
     } catch {
       message.error("Erreur lors du chargement");
     } finally {
@@ -162,13 +160,20 @@ export default function AdminCollaborators() {
             color: "#333",
           }}
         >
-          Total des collaborateurs : <strong>{collaborators.length}</strong>
+          Total des collaborateurs : <strong>{collaborators.length}{nextCursor ? "+" : ""}</strong>
         </motion.p>
         <Table
           columns={columns}
           dataSource={collaborators.map((c) => ({ ...c, key: c.user_id }))}
           loading={loading}
         />
+        {nextCursor && (
+          <div style={{ textAlign: "center", marginTop: 16 }}>
+            <Button onClick={() => fetchCollaborators(nextCursor)} loading={loading}>
+              Charger plus
+            </Button>
+          </div>
+        )}
         <Modal
           title="Modifier le collaborateur"
           open={!!editing}
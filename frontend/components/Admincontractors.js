@@ -1,21 +1,49 @@
 import React, { useEffect, useState } from "react";
-import { Table, Typography, message, Layout, Spin } from "antd";
+import { Table, Typography, message, Layout, Spin, Button } from "antd";
 import { useRouter } from "next/router";
+import { useAdminList } from "../utils/fetchAdminPage";
 import { motion } from "framer-motion";
 
 const { Title } = Typography;
 
 const AdminContractors = () => {
-  const [contractors, setContractors] = useState([]);
-  const [loading, setLoading] = useState(true);
   const [sortOrder, setSortOrder] = useState("desc");
   const [interventionFilter, setInterventionFilter] = useState("all");
   const [serviceFilter, setServiceFilter] = useState("all");
+  const [services, setServices] = useState([]);
   const router = useRouter();
+  const token =
+    typeof window !== "undefined" ? localStorage.getItem("token") : null;
 
-  const services = [
-    ...new Set(contractors.map((c) => c.service).filter(Boolean)),
-  ];
+  // Filtres et tri par date de signature faits par l'API : tout changement recharge la première page
+  const {
+    rows: contractors,
+    nextCursor,
+    loading,
+    loadingMore,
+    loadMore,
+  } = useAdminList(
+    "/admin/contractors",
+    token,
+    {
+      sort: "sign_date",
+      order: sortOrder,
+      intervention: interventionFilter === "all" ? null : interventionFilter,
+      service: serviceFilter === "all" ? null : serviceFilter,
+    },
+    (err) => message.error(err.message)
+  );
+
+  useEffect(() => {
+    if (!token) message.error("Token non trouvé");
+  }, []);
+
+  // Les services déjà vus restent proposés quand un filtre réduit la liste chargée
+  useEffect(() => {
+    setServices((current) => [
+      ...new Set([...current, ...contractors.map((c) => c.service).filter(Boolean)]),
+    ]);
+  }, [contractors]);
 
   const interventionCounts = ["both", "incall", "outcall"].reduce(
     (acc, type) => {
@@ -30,56 +58,8 @@ const AdminContractors = () => {
     return acc;
   }, {});
 
-  const filteredContractors = contractors
-    .filter((c) =>
-      interventionFilter === "all"
-        ? true
-        : c.intervention === interventionFilter
-    )
-    .filter((c) =>
-      serviceFilter === "all" ? true : c.service === serviceFilter
-    )
-    .sort((a, b) => {
-      const dateA = new Date(a.sign_date || 0);
-      const dateB = new Date(b.sign_date || 0);
-      return sortOrder === "asc" ? dateA - dateB : dateB - dateA;
-    });
-
   const handleRetour = () => router.push("/admin/accueil");
 
-  useEffect(() => {
-    const fetchContractors = async () => {
-      const token = localStorage.getItem("token");
-      if (!token) return message.error("Token non trouvé");
-
-      try {
-        const res = await fetch(
-          `${process.env.NEXT_PUBLIC_API_URL}/admin/contractors`,
-          {
-            headers: {
-              "Content-Type": "application/json",
-              token: token,
-            },
-          }
-        );
-
-        if (!res.ok) {
-          const err = await res.json();
-          throw new Error(err.detail || "Erreur lors du chargement");
-        }
-
-        const data = await res.json();
-        setContractors(data);
-      } catch (err) {
-        message.error(err.message);
-      } finally {
-        setLoading(false);
-      }
-    };
-
-    fetchContractors();
-  }, []);
-
   const columns = [
     { title: "Nom", dataIndex: "lastname", key: "lastname" },
     { title: "Prénom", dataIndex: "firstname", key: "firstname" },
@@ -180,7 +160,7 @@ const AdminContractors = () => {
             color: "#333",
           }}
         >
-          Total des prestataires : <strong>{contractors.length}</strong>
+          Total des prestataires : <strong>{contractors.length}{nextCursor ? "+" : ""}</strong>
         </motion.p>
         <div
           style={{
@@ -273,13 +253,20 @@ const AdminContractors = () => {
           <Spin size="large" />
         ) : (
           <Table
-            dataSource={filteredContractors}
+            dataSource={contractors}
             columns={columns}
             rowKey="contractor_id"
             pagination={{ pageSize: 10 }}
             scroll={{ x: "max-content" }}
           />
         )}
+        {nextCursor && (
+          <div style={{ textAlign: "center", marginTop: 16 }}>
+            <Button onClick={loadMore} loading={loadingMore}>
+              Charger plus
+            </Button>
+          </div>
+        )}
       </Layout.Content>
     </Layout>
   );
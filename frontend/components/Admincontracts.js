@@ -7,6 +7,7 @@ import React from "react";
 import { EyeOutlined, DeleteOutlined } from "@ant-design/icons";
 import { Popconfirm } from "antd";
 import { StopOutlined } from "@ant-design/icons";
+import { openDocument } from "../utils/openDocument";
 
 const { Title } = Typography;
 
@@ -260,9 +261,8 @@ export default function AllContracts() {
         <Button
           icon={<EyeOutlined />}
           onClick={() =>
-            window.open(
-              `${process.env.NEXT_PUBLIC_API_URL}/${record.file}`,
-              "_blank"
+            openDocument(record.file, localStorage.getItem("token")).catch((error) =>
+              alert(error.message)
             )
           }
         />
@@ -5,14 +5,42 @@ import { useRouter } from "next/router";
 import { motion } from "framer-motion";
 import { EyeOutlined, DeleteOutlined } from "@ant-design/icons";
 import { Dropdown, Menu } from "antd";
+import { openDocument } from "../utils/openDocument";
+import { useAdminList } from "../utils/fetchAdminPage";
 
 const { Title } = Typography;
 
 export default function AllEstimates() {
-  const [estimates, setEstimates] = useState([]);
-  const [loading, setLoading] = useState(true);
   const [filterStatus, setFilterStatus] = useState("all");
   const [sortOrder, setSortOrder] = useState("desc"); // "asc" ou "desc"
+  const token =
+    typeof window !== "undefined" ? localStorage.getItem("token") : null;
+
+  // Statut et tri par date de signature faits par l'API : tout changement recharge la première page
+  const {
+    rows: estimates,
+    setRows: setEstimates,
+    nextCursor,
+    loading,
+    loadingMore,
+    loadMore,
+  } = useAdminList(
+    "/admin/estimates",
+    token,
+    {
+      sort: "signature_date",
+      order: sortOrder,
+      subscription_status: filterStatus === "all" ? null : filterStatus,
+    },
+    (error) => {
+      console.error("Erreur lors de la récupération des devis :", error);
+      message.error("Impossible de charger les devis");
+    }
+  );
+
+  useEffect(() => {
+    if (!token) message.warning("Aucun token trouvé. Connexion requise.");
+  }, []);
 
   const statusCounts = {
     "EN ATTENTE": estimates.filter(
@@ -44,16 +72,6 @@ export default function AllEstimates() {
     />
   );
 
-  const filteredEstimates = estimates
-    .filter((e) =>
-      filterStatus === "all" ? true : e.subscription_status === filterStatus
-    )
-    .sort((a, b) => {
-      const dateA = new Date(a.signature_date);
-      const dateB = new Date(b.signature_date);
-      return sortOrder === "asc" ? dateA - dateB : dateB - dateA;
-    });
-
   const handleDelete = async (subscription_id) => {
     const token = localStorage.getItem("token");
     if (!token) {
@@ -85,44 +103,6 @@ export default function AllEstimates() {
     }
   };
 
-  useEffect(() => {
-    const fetchEstimates = async () => {
-      const token = localStorage.getItem("token");
-      if (!token) {
-        message.warning("Aucun token trouvé. Connexion requise.");
-        setLoading(false);
-        return;
-      }
-
-      try {
-        const res = await fetch(
-          `${process.env.NEXT_PUBLIC_API_URL}/admin/estimates`,
-          {
-            headers: {
-              token,
-              accept: "application/json",
-            },
-          }
-        );
-
-        if (!res.ok) {
-          const msg = await res.text();
-          throw new Error(`Erreur ${res.status}: ${msg}`);
-        }
-
-        const data = await res.json();
-        setEstimates(data);
-      } catch (error) {
-        console.error("Erreur lors de la récupération des devis :", error);
-        message.error("Impossible de charger les devis");
-      } finally {
-        setLoading(false);
-      }
-    };
-
-    fetchEstimates();
-  }, []);
-
   const columns = [
     { title: "Entreprise", dataIndex: "company_name", key: "company_name" },
     {
@@ -161,9 +141,8 @@ export default function AllEstimates() {
         <Button
           icon={<EyeOutlined />}
           onClick={() =>
-            window.open(
-              `${process.env.NEXT_PUBLIC_API_URL}/${record.file}`,
-              "_blank"
+            openDocument(record.file, localStorage.getItem("token")).catch((error) =>
+              alert(error.message)
             )
           }
         />
@@ -281,7 +260,7 @@ export default function AllEstimates() {
 
         <Table
           columns={columns}
-          dataSource={filteredEstimates.map((e) => ({
+          dataSource={estimates.map((e) => ({
             ...e,
             key: e.company_subscription_id,
           }))}
@@ -289,6 +268,13 @@ export default function AllEstimates() {
           pagination={{ pageSize: 10 }}
           bordered
         />
+        {nextCursor && (
+          <div style={{ textAlign: "center", marginTop: 16 }}>
+            <Button onClick={loadMore} loading={loadingMore}>
+              Charger plus
+            </Button>
+          </div>
+        )}
       </Layout.Content>
     </Layout>
   );
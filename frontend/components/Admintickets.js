@@ -4,6 +4,7 @@ import { DeleteOutlined, MailOutlined } from "@ant-design/icons";
 import { motion } from "framer-motion";
 import { Modal, Input } from "antd";
 import { useRouter } from "next/router";
+import { fetchAdminPage } from "../utils/fetchAdminPage";
 const { Title } = Typography;
 
 const { TextArea } = Input;
@@ -14,21 +15,18 @@ export default function AdminTickets() {
   const [replyModalVisible, setReplyModalVisible] = useState(false);
   const [currentTicketId, setCurrentTicketId] = useState(null);
   const [replyMessage, setReplyMessage] = useState("");
+  const [nextCursor, setNextCursor] = useState(null);
 
   const router = useRouter();
 
-  const fetchTickets = async () => {
+  // Sans curseur : recharge la première page (tickets les plus récents) ; avec : ajoute la page suivante
+  const fetchTickets = async (after) => {
     const token = localStorage.getItem("token");
+    setLoading(true);
     try {
-      const res = await fetch(
-        `${process.env.NEXT_PUBLIC_API_URL}/admin/tickets`,
-        {
-          headers: { token },
-        }
-      );
-      const data = await res.json();
-      console.log("Tickets reçus :", data);
-      setTickets(data);
+      const page = await fetchAdminPage("/admin/tickets", token, { after });
+      setTickets((current) => (after ? [...current, ...page.rows] : page.rows));
+      setNextCursor(page.nextCursor);
     } catch {
       message.error("Erreur de chargement des tickets");
     } finally {
@@ -205,7 +203,7 @@ export default function AdminTickets() {
             color: "#333",
           }}
         >
-          Total des tickets: <strong>{tickets.length}</strong>
+          Total des tickets: <strong>{tickets.length}{nextCursor ? "+" : ""}</strong>
         </motion.p>
         <Table
           columns={columns}
@@ -218,6 +216,13 @@ export default function AdminTickets() {
           bordered
           pagination={{ pageSize: 10 }}
         />
+        {nextCursor && (
+          <div style={{ textAlign: "center", marginTop: 16 }}>
+            <Button onClick={() => fetchTickets(nextCursor)} loading={loading}>
+              Charger plus
+            </Button>
+          </div>
+        )}
         <Modal
           open={replyModalVisible}
           title="Répondre au ticket"
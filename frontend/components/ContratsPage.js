@@ -5,6 +5,7 @@ import { Layout, Button, Modal, Form, Input, message } from "antd";
 import { EyeOutlined } from "@ant-design/icons";
 import { motion } from "framer-motion";
 import SignaturePad from "react-signature-canvas";
+import { openDocument } from "../utils/openDocument";
 
 const Table = dynamic(() => import("antd/es/table"), { ssr: false });
 
@@ -135,9 +136,8 @@ const ContratsPage = () => {
         <Button
           icon={<EyeOutlined style={{ fontSize: 18, color: "#007b7f" }} />}
           onClick={() =>
-            window.open(
-              `${process.env.NEXT_PUBLIC_API_URL}/${record.file}`,
-              "_blank"
+            openDocument(record.file, localStorage.getItem("token")).catch((error) =>
+              alert(error.message)
             )
           }
         />
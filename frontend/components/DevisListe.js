@@ -3,6 +3,7 @@ import { Table, Button, Typography, message, Layout } from "antd";
 import { EyeOutlined } from "@ant-design/icons";
 import { useRouter } from "next/router";
 import { motion } from "framer-motion";
+import { openDocument } from "../utils/openDocument";
 
 const { Title } = Typography;
 
@@ -75,9 +76,8 @@ export default function DevisListe() {
         <Button
           icon={<EyeOutlined />}
           onClick={() =>
-            window.open(
-              `${process.env.NEXT_PUBLIC_API_URL}/${record.file}`,
-              "_blank"
+            openDocument(record.file, localStorage.getItem("token")).catch((error) =>
+              alert(error.message)
             )
           }
         />
@@ -5,6 +5,7 @@ import dynamic from "next/dynamic";
 import { motion } from "framer-motion";
 import { useRouter } from "next/router";
 import { loadStripe } from "@stripe/stripe-js";
+import { openDocument } from "../utils/openDocument";
 
 const AntButton = dynamic(() => import("antd/es/button"), { ssr: false });
 const stripePromise = loadStripe(process.env.NEXT_PUBLIC_STRIPE_PUBLIC_KEY);
@@ -123,9 +124,8 @@ const FacturesPage = ({ factures }) => {
           type="text"
           icon={<EyeOutlined style={{ fontSize: 18, color: "#007b7f" }} />}
           onClick={() =>
-            window.open(
-              `${process.env.NEXT_PUBLIC_API_URL}/${record.file}`,
-              "_blank"
+            openDocument(record.file, localStorage.getItem("token")).catch((error) =>
+              alert(error.message)
             )
           }
           style={{ display: "block", margin: "auto" }}
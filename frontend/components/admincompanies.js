@@ -3,54 +3,48 @@ import { Table, Button, Input, message } from "antd";
 import { Layout } from "antd";
 import { motion } from "framer-motion";
 import { useRouter } from "next/router";
+import { useAdminList } from "../utils/fetchAdminPage";
 
 export default function CompaniesPage() {
-  const [companies, setCompanies] = useState([]);
-  const [loading, setLoading] = useState(true);
   const [editingId, setEditingId] = useState(null);
   const [editedData, setEditedData] = useState({});
   const [selectedIndustry, setSelectedIndustry] = useState("all");
+  const [industryOptions, setIndustryOptions] = useState([]);
+  const token =
+    typeof window !== "undefined" ? localStorage.getItem("token") : null;
+  const router = useRouter();
+
+  // Filtre par secteur fait par l'API : changer de secteur recharge la première page
+  const {
+    rows: companies,
+    nextCursor,
+    loading,
+    loadingMore,
+    reload: fetchCompanies,
+    loadMore,
+  } = useAdminList(
+    "/admin/companies",
+    token,
+    { industry: selectedIndustry === "all" ? null : selectedIndustry },
+    () => message.error("Erreur lors du chargement")
+  );
 
   const industries = [
     ...new Set(companies.map((c) => c.industry).filter(Boolean)),
   ];
 
+  // Secteurs déjà rencontrés : la liste ne se réduit pas au secteur filtré
+  useEffect(() => {
+    setIndustryOptions((known) => [...new Set([...known, ...industries])]);
+  }, [companies]);
+
   const industryCounts = industries.reduce((acc, ind) => {
     acc[ind] = companies.filter((c) => c.industry === ind).length;
     return acc;
   }, {});
 
-  const filteredCompanies = companies.filter((c) =>
-    selectedIndustry === "all" ? true : c.industry === selectedIndustry
-  );
-  const token =
-    typeof window !== "undefined" ? localStorage.getItem("token") : null;
-  const router = useRouter();
-
   const handleRetour = () => router.push("/admin/accueil");
 
-  const fetchCompanies = async () => {
-    try {
-      const res = await fetch(
-        `${process.env.NEXT_PUBLIC_API_URL}/admin/companies`,
-        {
-          headers: { token },
-        }
-      );
-      if (!res.ok) throw new Error();
-      const data = await res.json();
-      setCompanies(data);
-    } catch {
-      message.error("Erreur lors du chargement");
-    } finally {
-      setLoading(false);
-    }
-  };
-
-  useEffect(() => {
-    fetchCompanies();
-  }, []);
-
   const handleEdit = (record) => {
     setEditingId(record.company_id);
     setEditedData({ ...record });
@@ -251,7 +245,7 @@ export default function CompaniesPage() {
             color: "#333",
           }}
         >
-          Total des sociétés : <strong>{companies.length}</strong>
+          Total des sociétés : <strong>{companies.length}{nextCursor ? "+" : ""}</strong>
         </motion.p>
         <div style={{ marginBottom: 20, textAlign: "right" }}>
           <span style={{ marginRight: 10 }}>Filtrer par secteur :</span>
@@ -260,7 +254,7 @@ export default function CompaniesPage() {
             onChange={(e) => setSelectedIndustry(e.target.value)}
           >
             <option value="all">Tous les secteurs</option>
-            {industries.map((ind) => (
+            {industryOptions.map((ind) => (
               <option key={ind} value={ind}>
                 {ind}
               </option>
@@ -296,12 +290,19 @@ export default function CompaniesPage() {
         </div>
         <Table
           columns={columns}
-          dataSource={filteredCompanies.map((c) => ({
+          dataSource={companies.map((c) => ({
             ...c,
             key: c.company_id,
           }))}
           loading={loading}
         />
+        {nextCursor && (
+          <div style={{ textAlign: "center", marginTop: 16 }}>
+            <Button onClick={loadMore} loading={loadingMore}>
+              Charger plus
+            </Button>
+          </div>
+        )}
       </Layout.Content>
     </Layout>
   );
@@ -0,0 +1,80 @@
+import { useCallback, useEffect, useRef, useState } from "react";
+
+// Les listes de l'administration sont paginées par l'API : chaque appel renvoie une page et,
+// s'il en reste, l'en-tête X-Next-Cursor à repasser en paramètre `after` pour la suivante.
+// Les paramètres acceptés (sort, order, limit et filtres) sont décrits dans la doc de l'API.
+export async function fetchAdminPage(path, token, params = {}) {
+  const query = new URLSearchParams(
+    Object.entries(params).filter(
+      ([, value]) => value !== undefined && value !== null && value !== ""
+    )
+  ).toString();
+  const response = await fetch(
+    `${process.env.NEXT_PUBLIC_API_URL}${path}${query ? `?${query}` : ""}`,
+    { headers: { token } }
+  );
+  if (!response.ok) {
+    throw new Error(`Liste indisponible (HTTP ${response.status})`);
+  }
+  return {
+    rows: await response.json(),
+    nextCursor: response.headers.get("X-Next-Cursor"),
+  };
+}
+
+// Liste paginée dont le tri et les filtres sont faits par l'API : quand `params` change, la liste
+// repart de la première page (le curseur ne vaut que pour les paramètres qui l'ont produit).
+// Les réponses arrivées après un changement de paramètres sont ignorées.
+export function useAdminList(path, token, params = {}, onError) {
+  const [rows, setRows] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const lastRequest = useRef(0);
+  const paramsKey = JSON.stringify(params);
+
+  const load = useCallback(
+    async (after) => {
+      if (!token) {
+        setLoading(false);
+        return;
+      }
+      const request = ++lastRequest.current;
+      if (after) setLoadingMore(true);
+      else setLoading(true);
+      try {
+        const page = await fetchAdminPage(path, token, {
+          ...JSON.parse(paramsKey),
+          after,
+        });
+        if (request !== lastRequest.current) return;
+        setRows((current) => (after ? [...current, ...page.rows] : page.rows));
+        setNextCursor(page.nextCursor);
+      } catch (error) {
+        if (request === lastRequest.current && onError) onError(error);
+      } finally {
+        if (request === lastRequest.current) {
+          setLoading(false);
+          setLoadingMore(false);
+        }
+      }
+    },
+    // onError volontairement absent : une fonction recréée à chaque rendu relancerait le chargement
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+    [path, token, paramsKey]
+  );
+
+  useEffect(() => {
+    load();
+  }, [load]);
+
+  return {
+    rows,
+    setRows,
+    nextCursor,
+    loading,
+    loadingMore,
+    reload: () => load(),
+    loadMore: () => load(nextCursor),
+  };
+}
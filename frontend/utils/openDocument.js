@@ -0,0 +1,21 @@
+// Les documents (devis, contrats, factures) ne sont plus accessibles par simple lien :
+// l'API vérifie le token. On les récupère donc avec l'en-tête puis on ouvre le fichier reçu.
+export async function openDocument(file, token) {
+  // Onglet ouvert pendant le clic, sinon le navigateur le bloque après l'attente du fetch
+  const tab = window.open("", "_blank");
+  const response = await fetch(
+    `${process.env.NEXT_PUBLIC_API_URL}/${file.replace(/^\/+/, "")}`,
+    { headers: { token } }
+  );
+  if (!response.ok) {
+    if (tab) tab.close();
+    throw new Error(`Document indisponible (HTTP ${response.status})`);
+  }
+  const url = URL.createObjectURL(await response.blob());
+  if (tab) {
+    tab.location.href = url;
+  } else {
+    window.open(url, "_blank");
+  }
+  setTimeout(() => URL.revokeObjectURL(url), 60000);
+}
@@ -22,7 +22,10 @@ CREATE TABLE users (
   PRIMARY KEY(user_id),
   UNIQUE(phone),
   UNIQUE(email),
-  UNIQUE(stripe_id)
+  UNIQUE(stripe_id),
+  INDEX idx_users_lastname(lastname, user_id),
+  INDEX idx_users_firstname(firstname, user_id),
+  INDEX idx_users_inscription_date(inscription_date, user_id)
 );
 
 
@@ -41,6 +44,7 @@ CREATE TABLE sessions(
     exp_date DATETIME not null,
     revoked BOOLEAN not null default FALSE,
     PRIMARY KEY(session_id, user_id),
+    INDEX idx_sessions_exp_date(exp_date),
     FOREIGN KEY(user_id) REFERENCES users(user_id)
 );
 
@@ -74,7 +78,10 @@ CREATE TABLE ngo(
    PRIMARY KEY(ngo_id),
    UNIQUE(name),
    UNIQUE(registration_number),
-   UNIQUE(stripe_id)
+   UNIQUE(stripe_id),
+   INDEX idx_ngo_registration_date(registration_date, ngo_id),
+   INDEX idx_ngo_country(country, ngo_id),
+   INDEX idx_ngo_type(type, ngo_id)
 );
 
 CREATE TABLE packs(
@@ -100,6 +107,9 @@ CREATE TABLE tickets (
      user_id CHAR(36) NOT NULL,
      admin_id CHAR(36),
      PRIMARY KEY(ticket_id),
+     INDEX idx_tickets_open_date(open_date, ticket_id),
+     INDEX idx_tickets_close_date(close_date, open_date, ticket_id),
+     INDEX idx_tickets_title(title, ticket_id),
      FOREIGN KEY(user_id) REFERENCES users(user_id) ON DELETE CASCADE,
      FOREIGN KEY(admin_id) REFERENCES administrators(admin_id)
 );
@@ -131,6 +141,10 @@ CREATE TABLE companies(
    UNIQUE(name),
    UNIQUE(website),
    UNIQUE(registration_number),
+   INDEX idx_companies_registration_date(registration_date, company_id),
+   INDEX idx_companies_revenue(revenue, company_id),
+   INDEX idx_companies_size(size, company_id),
+   INDEX idx_companies_industry(industry, name),
    FOREIGN KEY (company_id) REFERENCES users(user_id) ON DELETE CASCADE,
    FOREIGN KEY(admin_id) REFERENCES administrators(admin_id) ON DELETE SET NULL
 );
@@ -150,6 +164,9 @@ CREATE TABLE contractors(
    PRIMARY KEY(contractor_id),
    UNIQUE(registration_number),
    UNIQUE(contract_file),
+   INDEX idx_contractors_registration_date(registration_date, contractor_id),
+   INDEX idx_contractors_service(service, contractor_id),
+   INDEX idx_contractors_service_price(service_price, contractor_id),
    FOREIGN KEY(contractor_id) REFERENCES users(user_id) ON DELETE CASCADE,
    FOREIGN KEY(admin_id) REFERENCES administrators(admin_id) ON DELETE SET NULL
 );
@@ -171,6 +188,7 @@ CREATE TABLE collaborators(
     collaborator_id CHAR(36),
     company_id CHAR(36) NOT NULL,
     PRIMARY KEY(collaborator_id),
+    INDEX idx_collaborators_company(company_id, collaborator_id),
     FOREIGN KEY(collaborator_id) REFERENCES users(user_id) ON DELETE CASCADE,
     FOREIGN KEY(company_id) REFERENCES companies(company_id)  ON DELETE CASCADE
 );
@@ -193,6 +211,7 @@ CREATE TABLE calendars(
    unvailable_begin_date DATETIME NOT NULL,
    unvailable_end_date DATETIME NOT NULL,
    PRIMARY KEY(contractor_id, calendar_id),
+   INDEX idx_calendars_contractor_begin(contractor_id, unvailable_begin_date),
    FOREIGN KEY(contractor_id) REFERENCES contractors(contractor_id)
 );
 
@@ -217,6 +236,8 @@ CREATE TABLE estimates (
    amount FLOAT NOT NULL DEFAULT 0,
    PRIMARY KEY(company_id, company_subscription_id),
    UNIQUE(file),
+   INDEX idx_estimates_creation_date(creation_date, company_subscription_id, amount),
+   INDEX idx_estimates_amount(amount, company_subscription_id),
    FOREIGN KEY(company_id, company_subscription_id) REFERENCES company_subscriptions(company_id, company_subscription_id) ON DELETE CASCADE
 );
 
@@ -228,6 +249,7 @@ CREATE TABLE bills(
     payed_date DATETIME,
     PRIMARY KEY(company_id, company_subscription_id),
     UNIQUE(file),
+    INDEX idx_bills_payed(payed, company_subscription_id),
     FOREIGN KEY(company_id, company_subscription_id) REFERENCES company_subscriptions(company_id, company_subscription_id) ON DELETE CASCADE
 );
 
@@ -254,6 +276,7 @@ CREATE TABLE posts(
     subject_id CHAR(36) NOT NULL,
     collaborator_id CHAR(36) NOT NULL,
     PRIMARY KEY(post_id),
+    INDEX idx_posts_subject_creation(subject_id, creation_date, post_id),
     FOREIGN KEY(parent_post_id) REFERENCES posts(post_id) ON DELETE CASCADE,
     FOREIGN KEY(subject_id) REFERENCES subjects(subject_id) ON DELETE CASCADE,
     FOREIGN KEY(collaborator_id) REFERENCES collaborators(collaborator_id) ON DELETE CASCADE
@@ -279,8 +302,12 @@ CREATE TABLE medical_appointments(
     price INT NOT NULL default 50,
     place VARCHAR(8) NOT NULL,
     note SMALLINT,
+    active_slot DATETIME,
     PRIMARY KEY(medical_appointment_id),
     UNIQUE(bill_file),
+    UNIQUE KEY uq_medical_appointments_contractor_slot(contractor_id, active_slot),
+    INDEX idx_medical_appointments_creation_contractor(creation_date, contractor_id),
+    INDEX idx_medical_appointments_contractor_date(contractor_id, medical_appointment_date),
     FOREIGN KEY(contractor_id) REFERENCES contractors(contractor_id) ON DELETE CASCADE,
     FOREIGN KEY(collaborator_id) REFERENCES collaborators(collaborator_id) ON DELETE CASCADE
 );
@@ -305,6 +332,7 @@ CREATE TABLE appointments(
     note INT,
     PRIMARY KEY(appointment_id),
     UNIQUE(bill_file),
+    INDEX idx_appointments_creation_contractor(creation_date, contractor_id),
     FOREIGN KEY(contractor_id) REFERENCES contractors(contractor_id) ON DELETE CASCADE,
     FOREIGN KEY(company_id) REFERENCES companies(company_id) ON DELETE CASCADE,
     FOREIGN KEY(room_id) REFERENCES rooms(room_id) ON DELETE CASCADE
@@ -356,6 +384,145 @@ CREATE TABLE chatbot_usages (
     FOREIGN KEY (collaborator_id) REFERENCES collaborators(collaborator_id)
 );
 
+-- Compteur mensuel de messages, incrémenté par ChatbotQuery.log_question
+CREATE TABLE chatbot_monthly_usages (
+    collaborator_id VARCHAR(255) NOT NULL,
+    month DATE NOT NULL,
+    messages_count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (collaborator_id, month),
+    FOREIGN KEY (collaborator_id) REFERENCES collaborators(collaborator_id) ON DELETE CASCADE
+);
+
+-- Consultations offertes consommées par salarié et par période mensuelle (service/collaborator.py)
+CREATE TABLE consultation_entitlements (
+    collaborator_id CHAR(36) NOT NULL,
+    period_start DATETIME NOT NULL,
+    period_end DATETIME NOT NULL,
+    used INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (collaborator_id, period_start),
+    FOREIGN KEY (collaborator_id) REFERENCES collaborators(collaborator_id) ON DELETE CASCADE
+);
+
+-- Stockage des documents par empreinte de contenu (service/document_store.py)
+CREATE TABLE document_blobs (
+    sha256 CHAR(64) NOT NULL,
+    extension VARCHAR(10) NOT NULL DEFAULT '',
+    size BIGINT NOT NULL,
+    ref_count INT NOT NULL DEFAULT 0,
+    created_at DATETIME NOT NULL,
+    unreferenced_at DATETIME,
+    PRIMARY KEY (sha256),
+    INDEX idx_document_blobs_unreferenced (ref_count, unreferenced_at)
+);
+
+CREATE TABLE document_refs (
+    file VARCHAR(255) NOT NULL,
+    sha256 CHAR(64) NOT NULL,
+    created_at DATETIME NOT NULL,
+    PRIMARY KEY (file),
+    INDEX idx_document_refs_sha256 (sha256),
+    FOREIGN KEY (sha256) REFERENCES document_blobs(sha256)
+);
+
+-- Rendus PDF en arrière-plan (service/render_queue.py)
+CREATE TABLE render_jobs(
+    job_id CHAR(36) NOT NULL,
+    kind VARCHAR(30) NOT NULL,
+    file VARCHAR(255) NOT NULL,
+    output_path VARCHAR(255) NOT NULL,
+    payload MEDIUMTEXT NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'PENDING',
+    error TEXT,
+    owner_id CHAR(36),
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    finished_at DATETIME,
+    PRIMARY KEY(job_id),
+    INDEX idx_render_jobs_file(file),
+    INDEX idx_render_jobs_status(status)
+);
+
+-- File d'envoi des e-mails (service/mailer.py)
+CREATE TABLE email_outbox(
+    email_id CHAR(36) NOT NULL,
+    sender VARCHAR(255) NOT NULL,
+    recipient VARCHAR(255) NOT NULL,
+    subject VARCHAR(255) NOT NULL,
+    html MEDIUMTEXT NOT NULL,
+    attachment_path VARCHAR(255),
+    status VARCHAR(20) NOT NULL DEFAULT 'PENDING',
+    attempts INT NOT NULL DEFAULT 0,
+    next_attempt_at DATETIME NOT NULL,
+    last_error TEXT,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    sent_at DATETIME,
+    PRIMARY KEY(email_id),
+    INDEX idx_email_outbox_due(status, next_attempt_at)
+);
+
+-- Événements Stripe reçus par /checkout/webhook, traités par service/stripe_events.py
+CREATE TABLE stripe_events(
+    event_id VARCHAR(255) NOT NULL,
+    type VARCHAR(100) NOT NULL,
+    payload MEDIUMTEXT NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'PENDING',
+    attempts INT NOT NULL DEFAULT 0,
+    next_attempt_at DATETIME NOT NULL,
+    last_error TEXT,
+    received_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    processed_at DATETIME,
+    PRIMARY KEY(event_id),
+    INDEX idx_stripe_events_due(status, next_attempt_at),
+    INDEX idx_stripe_events_received(received_at)
+);
+
+-- Agrégats des tableaux de bord admin, alimentés par StatsRollupQuery.refresh
+CREATE TABLE stats_daily_packs(
+    day DATE NOT NULL,
+    pack_id CHAR(36) NOT NULL,
+    pack_name VARCHAR(50) NOT NULL,
+    estimates_count INT NOT NULL DEFAULT 0,
+    estimates_amount DOUBLE NOT NULL DEFAULT 0,
+    PRIMARY KEY(day, pack_id)
+);
+
+CREATE TABLE stats_daily_companies(
+    day DATE NOT NULL,
+    company_id CHAR(36) NOT NULL,
+    company_name VARCHAR(255) NOT NULL,
+    estimates_count INT NOT NULL DEFAULT 0,
+    estimates_amount DOUBLE NOT NULL DEFAULT 0,
+    PRIMARY KEY(day, company_id)
+);
+
+CREATE TABLE stats_daily_services(
+    day DATE NOT NULL,
+    service VARCHAR(255) NOT NULL,
+    appointments_count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY(day, service)
+);
+
+CREATE TABLE stats_services(
+    service VARCHAR(255) NOT NULL,
+    type VARCHAR(10) NOT NULL,
+    intervention VARCHAR(50) NOT NULL,
+    contractor_count INT NOT NULL DEFAULT 0,
+    service_price INT NOT NULL DEFAULT 0,
+    PRIMARY KEY(service, type, intervention)
+);
+
+CREATE TABLE stats_pack_subscriptions(
+    pack_id CHAR(36) NOT NULL,
+    pack_name VARCHAR(50) NOT NULL,
+    subscriptions_count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY(pack_id)
+);
+
+CREATE TABLE stats_watermarks(
+    source VARCHAR(50) NOT NULL,
+    last_value DATETIME NOT NULL,
+    PRIMARY KEY(source)
+);
+
 -- ==================================================
 -- 1) TABLE : users
 -- ==================================================